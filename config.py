@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 
+# Único ponto que lê o .env — os demais módulos importam daqui ou usam os.getenv
 load_dotenv()
 
 SUPABASE_URL         = os.getenv("SUPABASE_URL")
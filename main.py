@@ -1,13 +1,21 @@
 import sys
 import os
 import traceback
-from dotenv import load_dotenv
-from PyQt6.QtWidgets import QApplication
-from telas.principal.principal_ui import PrincipalUI
-from telas.principal.principal_controller import PrincipalController
-from utils.admin_realtime import iniciar_realtime
+from utils import startup_trace as trace
+
+# .env lido uma vez só, em config — antes de qualquer módulo que leia o ambiente
+with trace.medir("import config"):
+    import config  # noqa: F401
+with trace.medir("import PyQt6"):
+    from PyQt6.QtWidgets import QApplication
+# Páginas e Supabase ficam fora do caminho crítico: as telas importam sob
+# demanda e o cliente só é criado no primeiro fetch (em thread de fundo)
+with trace.medir("import telas.principal"):
+    from telas.principal.principal_ui import PrincipalUI
+    from telas.principal.principal_controller import PrincipalController
+with trace.medir("import admin_realtime"):
+    from utils.admin_realtime import iniciar_realtime
 
-load_dotenv()
 os.environ["QT_LOGGING_RULES"] = "qt.multimedia.ffmpeg=false"
 
 
@@ -25,7 +33,14 @@ def _set_taskbar_icon():
 def main():
     _set_taskbar_icon()
 
-    app = QApplication(sys.argv)
+    with trace.medir("QApplication"):
+        app = QApplication(sys.argv)
+    trace.agendar_relatorio(app)
+
+    # Debug: acusa travadas da GUI (RCC_WATCHDOG_MS=<ms> ou --watchdog)
+    from utils.watchdog_gui import iniciar_watchdog
+
+    iniciar_watchdog()
 
     from PyQt6.QtGui import QIcon
     from utils.resource_path import resource_path
@@ -40,9 +55,11 @@ def main():
             anon_key=os.getenv("SUPABASE_ANON_KEY", ""),
         )
 
-        ui = PrincipalUI()
-        controller = PrincipalController(ui, realtime)
-        ui.show()
+        with trace.medir("janela principal"):
+            ui = PrincipalUI()
+            trace.observar_pintura(ui)
+            controller = PrincipalController(ui, realtime)
+            ui.show()
 
     except Exception:
         print("=" * 60)
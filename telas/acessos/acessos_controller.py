@@ -1,15 +1,8 @@
 import threading
 from datetime import datetime, timezone
-from PyQt6.QtWidgets import (
-    QTableWidgetItem,
-    QWidget,
-    QHBoxLayout,
-    QPushButton,
-    QLabel,
-    QLineEdit,
-    QComboBox,
-)
+from PyQt6.QtWidgets import QLabel, QLineEdit, QComboBox
 from PyQt6.QtCore import Qt, QObject, pyqtSignal
+from telas.tabela_modelo import celula
 from utils.supabase_admin import dar_acesso_extra, revogar_acesso_extra
 
 
@@ -48,6 +41,19 @@ class AcessosController:
         if realtime:
             realtime.acessos_mudou.connect(lambda _: self._recarregar())
 
+        self.ui.tabela.configurar(
+            chave=lambda a: a.get("id"),
+            formatar=self._celulas,
+            acoes=lambda a: [("Revogar", "#dc2626", "revogar")],
+        )
+        self.ui.tabela.registrar_acoes(
+            {
+                "revogar": lambda a: self._confirmar_revogar(
+                    a.get("id", ""), a.get("user_id", "")
+                )
+            }
+        )
+
         self._conectar_eventos()
         self._recarregar()
 
@@ -58,67 +64,40 @@ class AcessosController:
     def _recarregar(self):
         """Acessos extras têm expiração em horas — recarrega do banco."""
         from utils.supabase_admin import listar_acessos_extras
+        from utils.data_service import obter_service
 
-        threading.Thread(
-            target=lambda: self._preencher(listar_acessos_extras()), daemon=True
-        ).start()
+        obter_service().fetch(listar_acessos_extras, self._preencher, chave="acessos")
 
     def _renderizar(self):
         self._recarregar()
 
     def _preencher(self, acessos: list):
-        tabela = self.ui.tabela
-        tabela.setRowCount(0)
-        for a in acessos:
-            row = tabela.rowCount()
-            tabela.insertRow(row)
-            username = a.get("username", "—")
-            modulo = a.get("modulo_nome", "—")
-            acesso_id = a.get("id", "")
-            user_id = a.get("user_id", "")
-            expira = "—"
-            horas = 0
-
-            if a.get("expira_em"):
-                try:
-                    dt = datetime.fromisoformat(a["expira_em"].replace("Z", "+00:00"))
-                    expira = dt.strftime("%d/%m/%Y %H:%M")
-                    diff = dt - datetime.now(timezone.utc)
-                    horas = max(0, int(diff.total_seconds() / 3600))
-                except Exception:
-                    pass
-
-            horas_item = QTableWidgetItem(f"{horas}h restantes")
-            horas_item.setForeground(
-                Qt.GlobalColor.red if horas <= 2 else Qt.GlobalColor.yellow
-            )
-            horas_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
-            tabela.setItem(row, 0, self._item(username))
-            tabela.setItem(row, 1, self._item(modulo))
-            tabela.setItem(row, 2, self._item(expira))
-            tabela.setItem(row, 3, horas_item)
-
-            w = QWidget()
-            l = QHBoxLayout(w)
-            l.setContentsMargins(4, 2, 4, 2)
-            btn = QPushButton("Revogar")
-            btn.setFixedHeight(26)
-            btn.setCursor(Qt.CursorShape.PointingHandCursor)
-            btn.setStyleSheet(
-                """QPushButton {
-                    background-color: #dc2626; color: white;
-                    border-radius: 5px; font-size: 11px;
-                    border: none; padding: 0 8px;
-                }"""
-            )
-            btn.clicked.connect(
-                lambda _, aid=acesso_id, uid=user_id: self._confirmar_revogar(aid, uid)
-            )
-            l.addWidget(btn)
-            l.addStretch()
-            tabela.setCellWidget(row, 4, w)
-            tabela.setRowHeight(row, 40)
+        if acessos is None:
+            return
+        self.ui.tabela.definir_linhas(acessos)
+
+    @staticmethod
+    def _celulas(a: dict) -> list:
+        expira = "—"
+        horas = 0
+        if a.get("expira_em"):
+            try:
+                dt = datetime.fromisoformat(a["expira_em"].replace("Z", "+00:00"))
+                expira = dt.strftime("%d/%m/%Y %H:%M")
+                diff = dt - datetime.now(timezone.utc)
+                horas = max(0, int(diff.total_seconds() / 3600))
+            except Exception:
+                pass
+        return [
+            celula(a.get("username", "—")),
+            celula(a.get("modulo_nome", "—")),
+            celula(expira, ordem=a.get("expira_em") or ""),
+            celula(
+                f"{horas}h restantes",
+                Qt.GlobalColor.red if horas <= 2 else Qt.GlobalColor.yellow,
+                ordem=horas,
+            ),
+        ]
 
     def _dialog_novo_acesso(self):
         from telas.dialogs import DialogBase
@@ -205,8 +184,3 @@ class AcessosController:
             self._workers.append(w)
             w.sucesso.connect(lambda: (self._recarregar(), self._workers.clear()))
             w.executar()
-
-    def _item(self, texto: str) -> QTableWidgetItem:
-        item = QTableWidgetItem(str(texto))
-        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        return item
@@ -1,15 +1,8 @@
 import os, threading
 from datetime import datetime, timezone
-from PyQt6.QtWidgets import (
-    QTableWidgetItem,
-    QWidget,
-    QHBoxLayout,
-    QPushButton,
-    QLabel,
-    QLineEdit,
-    QComboBox,
-)
+from PyQt6.QtWidgets import QLabel, QLineEdit, QComboBox
 from PyQt6.QtCore import Qt, QObject, pyqtSignal, QTimer
+from telas.tabela_modelo import celula
 
 BASICO_ID = os.getenv("PLANO_BASICO_ID", "11111111-1111-1111-1111-111111111111")
 
@@ -50,7 +43,8 @@ class _RpcWorker(QObject):
         try:
             from utils.supabase_admin import _cliente
 
-            _cliente().rpc(self._nome, self._params).execute()
+            with _cliente() as cli:
+                cli.rpc(self._nome, self._params).execute()
             self.sucesso.emit()
         except Exception as e:
             self.erro.emit(str(e))
@@ -76,83 +70,172 @@ class AssinaturasController:
         self._timer = QTimer()
         self._timer.setSingleShot(True)
         self._timer.setInterval(300)
-        self._timer.timeout.connect(self._carregar)
+        # Com a tela oculta a recarga espera e roda uma vez ao voltar
+        self._timer.timeout.connect(lambda: self.ui.quando_visivel(self._carregar))
 
-        def _iniciar(*args, **kwargs):
-            from PyQt6.QtCore import QMetaObject, Qt
-
-            QMetaObject.invokeMethod(
-                self._timer, "start", Qt.ConnectionType.QueuedConnection
-            )
-
-        svc.assinaturas_mudou.connect(_iniciar)
-        svc.usuarios_mudou.connect(_iniciar)
+        # Eventos do Realtime corrigem só as linhas afetadas; um RESYNC ou
+        # evento incompleto no lote é que dispara a recarga (ver _aplicar_lote)
+        svc.lote_mudou.connect(self._aplicar_lote)
 
         self.ui.btn_refresh.clicked.connect(self._carregar)
         self.ui.input_busca.textChanged.connect(self._filtrar)
-        self._todos = []
-        self._carregar()
+        self._busca = ""
+        self.ui.tabela.configurar(
+            chave=self._chave, formatar=self._celulas, acoes=self._acoes
+        )
+        self.ui.tabela.registrar_acoes(
+            {
+                "atribuir": lambda u: self._dialog_atribuir(
+                    u["id"], u.get("username") or "—"
+                ),
+                "renovar": lambda a: self._dialog_renovar(a),
+                "plano": lambda a: self._dialog_mudar_plano(
+                    a.get("user_id", ""), a.get("username", "—")
+                ),
+                "basico": lambda a: self._revogar_para_basico(
+                    a.get("user_id", ""),
+                    a.get("username", "—"),
+                    a.get("plano_nome") or "?",
+                ),
+            }
+        )
+        self.ui.tabela.selectionModel().selectionChanged.connect(self._ao_selecionar)
+        self.ui.btn_renovar_sel.clicked.connect(self._renovar_selecionados)
+        self.ui.btn_revogar_sel.clicked.connect(self._revogar_selecionados)
+        from utils.supabase_admin import pagina_assinaturas
+
+        # Assinaturas pagas primeiro, depois usuários sem assinatura — tudo
+        # paginado no servidor (ver pagina_assinaturas)
+        # Sem busca, a 1ª página fica salva em disco (cache_local) e aparece
+        # já na próxima abertura, antes da resposta do servidor
+        self.ui.tabela.paginar(
+            lambda cursor: pagina_assinaturas(self._busca, cursor),
+            "assinaturas",
+            cache=lambda: None if self._busca else "assinaturas",
+        )
+        self._carregar_planos()
 
     def _carregar(self):
-        from utils.supabase_admin import (
-            listar_assinaturas,
-            listar_usuarios,
-            listar_planos,
-        )
+        self.ui.tabela.recarregar()
+        self._carregar_planos()
+
+    def _carregar_planos(self):
+        from utils.supabase_admin import listar_planos
 
         self._svc.fetch(
-            lambda: {
-                "assinaturas": listar_assinaturas(),
-                "usuarios": listar_usuarios(),
-                "planos": listar_planos(),
-            },
-            self._renderizar,
+            listar_planos, self._renderizar_planos, chave="assinaturas:planos"
         )
 
     def _filtrar(self, texto):
-        if not texto:
-            self._preencher(self._todos[0], self._todos[1])
+        self._busca = texto
+        self.ui.tabela.recarregar()
+
+    def _renderizar_planos(self, planos):
+        if planos is None:
             return
-        ass_f = [
-            a
-            for a in self._todos[0]
-            if texto.lower() in (a.get("username") or "").lower()
-        ]
-        sem_f = [
-            u
-            for u in self._todos[1]
-            if texto.lower() in (u.get("username") or "").lower()
-        ]
-        self._renderizar_dados(ass_f, sem_f)
+        self._planos = [p for p in planos if p.get("id") != BASICO_ID]
+
+    # ── Deltas do Realtime ─────────────────────────────────────
+
+    def _aplicar_lote(self, tabela: str, payloads: list):
+        """Aplica cada {type, record, old_record}; recarrega se algum vier incompleto."""
+        from utils.entity_store import chave_linha
 
-    def _renderizar(self, dados):
-        if not dados:
+        tratar = {
+            "perfis": self._evento_perfil,
+            "assinaturas": self._evento_assinatura,
+        }.get(tabela)
+        if tratar is None:
             return
-        assinaturas = dados.get("assinaturas", [])
-        usuarios = dados.get("usuarios", [])
-        self._planos = [p for p in dados.get("planos", []) if p.get("id") != BASICO_ID]
-        ids_com_ass = {a.get("user_id") for a in assinaturas}
-        sem_assinatura = [u for u in usuarios if u["id"] not in ids_com_ass]
-        self._todos = (assinaturas, sem_assinatura)
-        self._preencher(assinaturas, sem_assinatura)
-
-    def _preencher(self, assinaturas, sem_assinatura):
-        tabela = self.ui.tabela
-        tabela.setRowCount(0)
-        for a in assinaturas:
-            row = tabela.rowCount()
-            tabela.insertRow(row)
-            self._row_com_ass(tabela, row, a)
-        for u in sem_assinatura:
-            row = tabela.rowCount()
-            tabela.insertRow(row)
-            self._row_sem_ass(tabela, row, u)
-
-    def _row_com_ass(self, tabela, row, a):
-        username = a.get("username", "—")
-        plano = a.get("plano_nome", "—")
+        incompleto = False
+        for payload in payloads:
+            tipo = payload.get("type")
+            registro = payload.get("old_record" if tipo == "DELETE" else "record") or {}
+            if chave_linha(tabela, registro) is None or not tratar(tipo, registro):
+                incompleto = True
+        if incompleto:
+            print(f"[Assinaturas] Evento incompleto em {tabela} — recarregando")
+            self._timer.start()
+
+    def _linhas_do_usuario(self, user_id: str) -> list:
+        return [
+            l
+            for l in self.ui.tabela.modelo.linhas()
+            if (l.get("id") if l.get("_sem_assinatura") else l.get("user_id"))
+            == user_id
+        ]
+
+    def _evento_assinatura(self, tipo: str, r: dict) -> bool:
+        from utils.entity_store import obter_store
+        from utils.supabase_admin import _identidade
+
+        modelo = self.ui.tabela.modelo
+        if tipo == "DELETE":
+            modelo.remover(("ass", r["id"]))
+            return True
+        uid = r.get("user_id")
+        atual = modelo.linha(("ass", r["id"]))
+        sem = modelo.linha(("sem", uid))
+        if not r.get("ativo") or r.get("plano_id") == BASICO_ID:
+            # Deixou de ser paga: a linha vira "sem assinatura" no fim
+            if atual is not None:
+                modelo.remover(("ass", r["id"]))
+                modelo.upsert(
+                    {
+                        "id": uid,
+                        "username": atual.get("username"),
+                        "_sem_assinatura": True,
+                    },
+                    no_inicio=False,
+                )
+            return True
+        if atual is None and sem is None and tipo == "UPDATE":
+            return True  # linha ainda não carregada — vem com a paginação
+        plano = obter_store().obter("planos", r.get("plano_id"))
+        username = (atual or sem or {}).get("username") or _identidade(uid).get(
+            "username"
+        )
+        if plano is None or not username:
+            return False
+        modelo.remover(("sem", uid))
+        modelo.upsert(
+            {
+                **(atual or {}),
+                **r,
+                "plano_nome": plano.get("nome"),
+                "username": username,
+            }
+        )
+        return True
+
+    def _evento_perfil(self, tipo: str, r: dict) -> bool:
+        modelo = self.ui.tabela.modelo
+        if tipo == "DELETE":
+            for l in self._linhas_do_usuario(r["id"]):
+                modelo.remover(self._chave(l))
+            return True
+        linhas = self._linhas_do_usuario(r["id"])
+        for l in linhas:
+            modelo.upsert({**l, "username": r.get("username")})
+        busca = self._busca.strip().lower()
+        if not linhas and tipo == "INSERT":
+            if busca in (r.get("username") or "").lower():
+                modelo.upsert({**r, "_sem_assinatura": True}, no_inicio=False)
+        return True
+
+    @staticmethod
+    def _chave(linha: dict):
+        if linha.get("_sem_assinatura"):
+            return ("sem", linha.get("id"))
+        return ("ass", linha.get("id") or linha.get("user_id"))
+
+    def _celulas(self, linha: dict) -> list:
+        if linha.get("_sem_assinatura"):
+            return self._celulas_sem_ass(linha)
+        return self._celulas_com_ass(linha)
+
+    def _celulas_com_ass(self, a: dict) -> list:
         ativo = a.get("ativo", False)
-        user_id = a.get("user_id", "")
         criado = expira = "—"
         dias = 0
         if a.get("criado_em"):
@@ -172,92 +255,126 @@ class AssinaturasController:
             expira = "Sem expiração"
             dias = 99999
 
-        status_item = QTableWidgetItem("✅ Ativo" if ativo else "❌ Inativo")
-        status_item.setForeground(Qt.GlobalColor.green if ativo else Qt.GlobalColor.red)
-        status_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
         if dias == 99999:
-            dias_item = QTableWidgetItem("∞")
-            dias_item.setForeground(Qt.GlobalColor.cyan)
+            dias_cel = celula("∞", Qt.GlobalColor.cyan, dias)
         else:
-            dias_item = QTableWidgetItem(f"{max(0,dias)} dias")
-            dias_item.setForeground(
-                Qt.GlobalColor.red
-                if dias <= 2
-                else Qt.GlobalColor.yellow if dias <= 7 else Qt.GlobalColor.white
-            )
-        dias_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
-        tabela.setItem(row, 0, self._item(username))
-        tabela.setItem(row, 1, self._item(plano))
-        tabela.setItem(row, 2, status_item)
-        tabela.setItem(row, 3, self._item(criado))
-        tabela.setItem(row, 4, self._item(expira))
-        tabela.setItem(row, 5, dias_item)
-
-        w = QWidget()
-        l = QHBoxLayout(w)
-        l.setContentsMargins(4, 2, 4, 2)
-        l.setSpacing(4)
-
-        def _btn(txt, cor):
-            b = QPushButton(txt)
-            b.setFixedHeight(26)
-            b.setCursor(Qt.CursorShape.PointingHandCursor)
-            b.setStyleSheet(
-                f"""QPushButton {{
-                background-color: {cor}; color: white;
-                border-radius: 5px; font-size: 11px;
-                border: none; padding: 0 8px;
-            }}"""
+            dias_cel = celula(
+                f"{max(0,dias)} dias",
+                (
+                    Qt.GlobalColor.red
+                    if dias <= 2
+                    else Qt.GlobalColor.yellow if dias <= 7 else Qt.GlobalColor.white
+                ),
+                dias,
             )
-            return b
-
-        btn_renovar = _btn("Renovar", "#16a34a")
-        btn_plano = _btn("Plano", "#2563eb")
-        btn_basico = _btn("→ Básico", "#dc2626")
-        btn_renovar.clicked.connect(lambda _, uid=user_id: self._dialog_renovar(uid))
-        btn_plano.clicked.connect(
-            lambda _, uid=user_id, u=username: self._dialog_mudar_plano(uid, u)
-        )
-        btn_basico.clicked.connect(
-            lambda _, uid=user_id, u=username: self._revogar_para_basico(uid, u)
-        )
-        l.addWidget(btn_renovar)
-        l.addWidget(btn_plano)
-        l.addWidget(btn_basico)
-        l.addStretch()
-        tabela.setCellWidget(row, 6, w)
-        tabela.setRowHeight(row, 40)
-
-    def _row_sem_ass(self, tabela, row, u):
-        username = u.get("username") or "—"
-        user_id = u["id"]
-        tabela.setItem(row, 0, self._item(username))
-        tabela.setItem(row, 1, self._item("Sem plano"))
-        item_s = QTableWidgetItem("— Sem assinatura")
-        item_s.setForeground(Qt.GlobalColor.darkGray)
-        item_s.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        tabela.setItem(row, 2, item_s)
-        for col in [3, 4, 5]:
-            tabela.setItem(row, col, self._item("—"))
-        w = QWidget()
-        l = QHBoxLayout(w)
-        l.setContentsMargins(4, 2, 4, 2)
-        btn = QPushButton("Atribuir Plano")
-        btn.setFixedHeight(26)
-        btn.setCursor(Qt.CursorShape.PointingHandCursor)
-        btn.setStyleSheet(
-            """QPushButton { background-color: #7c3aed; color: white;
-            border-radius: 5px; font-size: 11px; border: none; padding: 0 8px; }"""
-        )
-        btn.clicked.connect(
-            lambda _, uid=user_id, un=username: self._dialog_atribuir(uid, un)
+
+        return [
+            celula(a.get("username", "—")),
+            celula(a.get("plano_nome", "—")),
+            celula(
+                "✅ Ativo" if ativo else "❌ Inativo",
+                Qt.GlobalColor.green if ativo else Qt.GlobalColor.red,
+            ),
+            celula(criado, ordem=a.get("criado_em") or ""),
+            celula(expira, ordem=a.get("expira_em") or "9999"),
+            dias_cel,
+        ]
+
+    @staticmethod
+    def _celulas_sem_ass(u: dict) -> list:
+        return [
+            celula(u.get("username") or "—"),
+            celula("Sem plano"),
+            celula("— Sem assinatura", Qt.GlobalColor.darkGray),
+            celula("—", ordem=""),
+            celula("—", ordem=""),
+            celula("—", ordem=-1),
+        ]
+
+    @staticmethod
+    def _acoes(linha: dict) -> list:
+        if linha.get("_sem_assinatura"):
+            return [("Atribuir Plano", "#7c3aed", "atribuir")]
+        return [
+            ("Renovar", "#16a34a", "renovar"),
+            ("Plano", "#2563eb", "plano"),
+            ("→ Básico", "#dc2626", "basico"),
+        ]
+
+    # ── Ações em lote ──────────────────────────────────────────
+
+    def _selecionadas(self) -> list:
+        """Só linhas com assinatura entram nas ações em lote."""
+        return [
+            a
+            for a in self.ui.tabela.linhas_selecionadas()
+            if not a.get("_sem_assinatura")
+        ]
+
+    def _ao_selecionar(self, *_):
+        n = len(self._selecionadas())
+        self.ui.lbl_selecao.setText(f"{n} selecionadas" if n > 1 else "")
+        self.ui.btn_renovar_sel.setEnabled(n > 0)
+        self.ui.btn_revogar_sel.setEnabled(n > 0)
+
+    def _renovar_selecionados(self):
+        from telas.dialogs import DialogBase
+        from utils.supabase_admin import renovar_assinaturas
+
+        linhas = self._selecionadas()
+        if not linhas:
+            return
+        dialog = DialogBase(f"🔄  Renovar {len(linhas)} Assinaturas", parent=self.ui)
+        lbl = QLabel("Quantos dias adicionar a cada assinatura?")
+        lbl.setStyleSheet("color: #aaa; font-size: 11px; font-weight: bold;")
+        inp = QLineEdit("30")
+        inp.setFixedHeight(36)
+        inp.setStyleSheet(dialog._estilo_input())
+        lbl_aviso = QLabel("")
+        lbl_aviso.setStyleSheet("color: #ff5c5c; font-size: 11px;")
+        dialog._layout_corpo.insertWidget(0, lbl)
+        dialog._layout_corpo.insertWidget(1, inp)
+        dialog._layout_corpo.insertWidget(2, lbl_aviso)
+
+        def _salvar():
+            try:
+                dias = int(inp.text().strip())
+                if dias <= 0:
+                    raise ValueError
+            except ValueError:
+                lbl_aviso.setText("⚠️  Digite um número válido.")
+                return
+            dialog.accept()
+            self._executar_lote(lambda: renovar_assinaturas(linhas, dias), "Renovando")
+
+        dialog._btn_confirmar.clicked.connect(_salvar)
+        dialog.exec()
+
+    def _revogar_selecionados(self):
+        from telas.dialogs import DialogConfirmacao
+        from utils.supabase_admin import revogar_assinaturas
+
+        linhas = self._selecionadas()
+        if not linhas:
+            return
+        msg = (
+            f"Revogar {len(linhas)} assinaturas? Os usuários receberão o plano Básico."
         )
-        l.addWidget(btn)
-        l.addStretch()
-        tabela.setCellWidget(row, 6, w)
-        tabela.setRowHeight(row, 40)
+        if DialogConfirmacao(msg, parent=self.ui).exec():
+            self._executar_lote(lambda: revogar_assinaturas(linhas), "Revogando")
+
+    def _executar_lote(self, fn, verbo: str):
+        self.ui.btn_renovar_sel.setEnabled(False)
+        self.ui.btn_revogar_sel.setEnabled(False)
+        self.ui.lbl_selecao.setText(f"{verbo}...")
+        self._svc.fetch(fn, self._ao_concluir_lote)
+
+    def _ao_concluir_lote(self, resultados):
+        from utils.supabase_admin import resumo_lote
+
+        _, msg = resumo_lote(resultados or {})
+        self._ao_selecionar()
+        self.ui.lbl_selecao.setText(msg)
 
     def _estilo_combo(self):
         return (
@@ -272,14 +389,20 @@ class AssinaturasController:
     def _dialog_atribuir(self, user_id, username):
         from utils.supabase_admin import listar_planos
 
+        # Com cliques repetidos só o pedido mais recente abre o dialog
+        self._svc.cancelar("assinaturas:dialog_atribuir")
         self._svc.fetch(
             listar_planos,
             lambda planos: self._abrir_dialog_atribuir(user_id, username, planos or []),
+            chave="assinaturas:dialog_atribuir",
         )
 
     def _abrir_dialog_atribuir(self, user_id, username, planos):
         from telas.dialogs import DialogBase
 
+        if not self.ui.isVisible():
+            return  # o usuário saiu da tela antes de os planos chegarem
+
         dialog = DialogBase("🎯  Atribuir Plano", parent=self.ui)
         lbl_info = QLabel(f"Usuário: <b style='color:#FFD700'>{username}</b>")
         lbl_info.setStyleSheet("color: #cccccc; font-size: 12px;")
@@ -343,16 +466,21 @@ class AssinaturasController:
     def _dialog_mudar_plano(self, user_id, username=""):
         from utils.supabase_admin import listar_planos
 
+        self._svc.cancelar("assinaturas:dialog_mudar")
         self._svc.fetch(
             listar_planos,
             lambda planos: self._abrir_dialog_mudar_plano(
                 user_id, username, planos or []
             ),
+            chave="assinaturas:dialog_mudar",
         )
 
     def _abrir_dialog_mudar_plano(self, user_id, username, planos):
         from telas.dialogs import DialogBase
 
+        if not self.ui.isVisible():
+            return
+
         dialog = DialogBase("🎯  Mudar Plano", parent=self.ui)
         lbl_plano = QLabel("Selecione o novo plano:")
         lbl_plano.setStyleSheet("color: #aaa; font-size: 11px; font-weight: bold;")
@@ -410,7 +538,7 @@ class AssinaturasController:
         dialog._btn_confirmar.clicked.connect(_salvar)
         dialog.exec()
 
-    def _dialog_renovar(self, user_id):
+    def _dialog_renovar(self, ass: dict):
         from telas.dialogs import DialogBase
         from utils.supabase_admin import renovar_assinatura
 
@@ -436,7 +564,14 @@ class AssinaturasController:
                 return
             dialog._btn_confirmar.setEnabled(False)
             dialog._btn_confirmar.setText("Salvando...")
-            w = AssWorker(renovar_assinatura, user_id, dias)
+            w = AssWorker(
+                renovar_assinatura,
+                ass.get("user_id", ""),
+                dias,
+                ass.get("username"),
+                ass.get("plano_nome"),
+                ass.get("expira_em") or "",
+            )
             self._workers.append(w)
             w.sucesso.connect(lambda: (dialog.accept(), self._workers.clear()))
             w.erro.connect(
@@ -451,27 +586,9 @@ class AssinaturasController:
         dialog._btn_confirmar.clicked.connect(_salvar)
         dialog.exec()
 
-    def _revogar_para_basico(self, user_id, username):
+    def _revogar_para_basico(self, user_id, username, plano_anterior):
         from telas.dialogs import DialogConfirmacao
 
-        # Descobre plano atual antes de revogar
-        plano_anterior = "?"
-        try:
-            from utils.supabase_admin import _cliente
-
-            ass = (
-                _cliente()
-                .table("v_assinaturas")
-                .select("plano_nome")
-                .eq("user_id", user_id)
-                .eq("ativo", True)
-                .limit(1)
-                .execute()
-            )
-            if ass.data:
-                plano_anterior = ass.data[0].get("plano_nome", "?")
-        except Exception:
-            pass
         msg = f"Revogar plano de '{username}'? O usuário receberá o plano Básico sem expiração."
         if DialogConfirmacao(msg, parent=self.ui).exec():
             w = _chamar_rpc(
@@ -491,8 +608,3 @@ class AssinaturasController:
             _logs.registrar(acao, detalhes={"username": username, **detalhes})
         except Exception as e:
             print(f"[Log] Erro: {e}")
-
-    def _item(self, texto):
-        item = QTableWidgetItem(str(texto))
-        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        return item
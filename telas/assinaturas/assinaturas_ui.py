@@ -1,4 +1,4 @@
-from PyQt6.QtWidgets import QHBoxLayout
+from PyQt6.QtWidgets import QHBoxLayout, QLabel
 from telas.base import TelaBase
 
 class AssinaturasUI(TelaBase):
@@ -11,7 +11,18 @@ class AssinaturasUI(TelaBase):
         self.input_busca = self._criar_input_busca("🔍  Buscar por usuário...")
         self.btn_refresh = self._criar_btn_acao("🔄", "#2a3f7a", "#FFD700")
         self.btn_refresh.setFixedWidth(40)
+
+        # Ações em lote sobre as linhas selecionadas
+        self.lbl_selecao     = QLabel("")
+        self.btn_renovar_sel = self._criar_btn_acao("🔄  Renovar", "#2563eb", "white")
+        self.btn_revogar_sel = self._criar_btn_acao("⬇  Revogar", "#dc2626", "white")
+        self.btn_renovar_sel.setEnabled(False)
+        self.btn_revogar_sel.setEnabled(False)
+
         layout_acoes.addWidget(self.input_busca)
+        layout_acoes.addWidget(self.lbl_selecao)
+        layout_acoes.addWidget(self.btn_renovar_sel)
+        layout_acoes.addWidget(self.btn_revogar_sel)
         layout_acoes.addWidget(self.btn_refresh)
         self._layout_raiz.addLayout(layout_acoes)
 
@@ -1,9 +1,10 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QPushButton, QFrame, QTableWidget, QTableWidgetItem,
+    QPushButton, QFrame,
     QHeaderView, QLineEdit
 )
 from PyQt6.QtCore import Qt
+from telas.tabela_modelo import TabelaView
 
 
 class TelaBase(QWidget):
@@ -11,11 +12,25 @@ class TelaBase(QWidget):
 
     def __init__(self, titulo: str, descricao: str, parent=None):
         super().__init__(parent)
+        self._adiados: dict = {}  # fn → None (ordem de chegada, sem repetir)
         self._layout_raiz = QVBoxLayout(self)
         self._layout_raiz.setContentsMargins(24, 24, 24, 24)
         self._layout_raiz.setSpacing(16)
         self._construir_cabecalho(titulo, descricao)
 
+    def quando_visivel(self, fn):
+        """Roda `fn` agora se a tela está visível; senão uma vez só, ao ser exibida."""
+        if self.isVisible():
+            fn()
+        else:
+            self._adiados[fn] = None
+
+    def showEvent(self, evento):
+        super().showEvent(evento)
+        adiados, self._adiados = self._adiados, {}
+        for fn in adiados:
+            fn()
+
     def _construir_cabecalho(self, titulo: str, descricao: str):
         cabecalho = QFrame()
         cabecalho.setStyleSheet("""
@@ -78,18 +93,16 @@ class TelaBase(QWidget):
         """)
         return btn
 
-    def _criar_tabela(self, colunas: list) -> QTableWidget:
-        tabela = QTableWidget()
-        tabela.setColumnCount(len(colunas))
-        tabela.setHorizontalHeaderLabels(colunas)
-        tabela.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        tabela.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+    def _criar_tabela(self, colunas: list) -> TabelaView:
+        tabela = TabelaView(colunas)
+        tabela.setEditTriggers(TabelaView.EditTrigger.NoEditTriggers)
+        tabela.setSelectionBehavior(TabelaView.SelectionBehavior.SelectRows)
         tabela.setAlternatingRowColors(True)
         tabela.verticalHeader().setVisible(False)
         tabela.horizontalHeader().setStretchLastSection(True)
         tabela.setShowGrid(False)
         tabela.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: rgba(15, 26, 61, 0.5);
                 alternate-background-color: rgba(26, 40, 84, 0.4);
                 border: 1px solid #2a3f7a;
@@ -97,11 +110,11 @@ class TelaBase(QWidget):
                 color: white;
                 gridline-color: transparent;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 6px;
                 border: none;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: rgba(255, 215, 0, 0.15);
                 color: #FFD700;
             }
@@ -133,8 +146,3 @@ class TelaBase(QWidget):
             QLineEdit:focus { border: 1px solid #FFD700; }
         """)
         return inp
-
-    def _item_centralizado(self, texto: str) -> QTableWidgetItem:
-        item = QTableWidgetItem(str(texto))
-        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        return item
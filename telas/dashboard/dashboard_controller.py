@@ -1,14 +1,8 @@
 import threading
-from PyQt6.QtWidgets import (
-    QTableWidgetItem,
-    QWidget,
-    QHBoxLayout,
-    QPushButton,
-    QLabel,
-    QLineEdit,
-)
+from PyQt6.QtWidgets import QPushButton, QLabel, QLineEdit
 from PyQt6.QtCore import Qt, QObject, pyqtSignal
-from utils.supabase_admin import aprovar_solicitacao, rejeitar_solicitacao
+from telas.tabela_modelo import celula
+from utils import cache_local
 
 
 class AprovacaoWorker(QObject):
@@ -25,6 +19,8 @@ class AprovacaoWorker(QObject):
         threading.Thread(target=self._run, daemon=True).start()
 
     def _run(self):
+        from utils.supabase_admin import aprovar_solicitacao
+
         ok, msg = aprovar_solicitacao(self._sol_id, self._username, self._dias)
         (self.sucesso if ok else self.erro).emit(msg)
 
@@ -41,6 +37,8 @@ class RejeicaoWorker(QObject):
         threading.Thread(target=self._run, daemon=True).start()
 
     def _run(self):
+        from utils.supabase_admin import rejeitar_solicitacao
+
         ok, _ = rejeitar_solicitacao(self._sol_id)
         self.concluido.emit() if ok else self.erro.emit("Erro ao rejeitar")
 
@@ -58,14 +56,37 @@ class UpdateWorker(QObject):
             import time
 
             # Atualiza apenas o timestamp — o cliente busca versão do GitHub
-            _cliente().table("configuracoes").update({"updated_at": "now()"}).eq(
-                "chave", "versao_disponivel"
-            ).execute()
+            with _cliente() as cli:
+                cli.table("configuracoes").update({"updated_at": "now()"}).eq(
+                    "chave", "versao_disponivel"
+                ).execute()
             self.sucesso.emit()
         except Exception as e:
             self.erro.emit(str(e))
 
 
+class AprovacaoLoteWorker(QObject):
+    progresso = pyqtSignal(str, str, str)  # (sol_id, estado, msg)
+    concluido = pyqtSignal(dict)
+
+    def __init__(self, solicitacoes):
+        super().__init__()
+        self._solicitacoes = solicitacoes
+
+    def executar(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        from utils.supabase_admin import aprovar_solicitacoes
+
+        try:
+            resultados = aprovar_solicitacoes(self._solicitacoes, self.progresso.emit)
+        except Exception as e:
+            print(f"[Aprovação] Erro no lote: {e}")
+            resultados = {}
+        self.concluido.emit(resultados)
+
+
 class DashboardController:
 
     def __init__(self, ui, svc):
@@ -73,9 +94,12 @@ class DashboardController:
         self._svc = svc
         self._workers = []
 
-        svc.assinaturas_mudou.connect(self._carregar)
-        svc.solicitacoes_mudou.connect(self._carregar)
-        svc.sessoes_mudou.connect(self._carregar_sessoes)
+        # Com a tela oculta as recargas esperam e rodam uma vez ao voltar
+        svc.assinaturas_mudou.connect(lambda: self.ui.quando_visivel(self._carregar))
+        svc.solicitacoes_mudou.connect(lambda: self.ui.quando_visivel(self._carregar))
+        svc.sessoes_mudou.connect(
+            lambda: self.ui.quando_visivel(self._carregar_sessoes)
+        )
 
         btn_att = self.ui.findChild(QPushButton, "btn_atualizar_dashboard")
         if btn_att:
@@ -83,36 +107,65 @@ class DashboardController:
 
         self.ui.btn_disparar_update.clicked.connect(self._dialog_disparar_update)
 
+        self.ui.tabela_solicitacoes.configurar(
+            chave=lambda s: s.get("id"),
+            formatar=self._celulas_solicitacao,
+            acoes=self._acoes_solicitacao,
+        )
+        self.ui.tabela_solicitacoes.registrar_acoes(
+            {
+                "aprovar": lambda s: self._dialog_aprovar(
+                    s["id"], s.get("username", "—")
+                ),
+                "rejeitar": lambda s: self._dialog_rejeitar(
+                    s["id"], s.get("username", "—")
+                ),
+            }
+        )
+        self._estados: dict[str, tuple[str, str]] = {}  # sol_id → (estado, msg)
+        self._lote: AprovacaoLoteWorker | None = None
+        self.ui.btn_aprovar_sel.clicked.connect(
+            lambda: self._aprovar_lote(
+                self.ui.tabela_solicitacoes.linhas_selecionadas()
+            )
+        )
+        self.ui.btn_aprovar_todas.clicked.connect(
+            lambda: self._aprovar_lote(self.ui.tabela_solicitacoes.modelo.linhas())
+        )
+        self.ui.btn_retomar.clicked.connect(self._retomar_lote)
+        self._verificar_interrompidas()
+
+        self.ui.tabela_expirando.configurar(
+            chave=lambda d: d.get("id") or d.get("user_id"),
+            formatar=self._celulas_expirando,
+            altura=36,
+        )
+
+        # Último snapshot salvo aparece já; o servidor reconcilia em seguida
+        self._renderizar(cache_local.ler("dashboard"), do_cache=True)
         self._carregar()
         self._carregar_sessoes()
 
     def _carregar(self):
-        from utils.supabase_admin import (
-            resumo_geral,
-            listar_solicitacoes,
-            listar_expirando,
-        )
+        from utils.supabase_admin import snapshot_dashboard
 
-        self._svc.fetch(
-            lambda: {
-                "resumo": resumo_geral(),
-                "solicitacoes": listar_solicitacoes(),
-                "expirando": listar_expirando(7),
-            },
-            self._renderizar,
-        )
+        self._svc.fetch(snapshot_dashboard, self._renderizar, chave="dashboard")
 
     def _carregar_sessoes(self):
         from utils.supabase_admin import listar_sessoes_ativas
 
-        self._svc.fetch(listar_sessoes_ativas, self._atualizar_card_online)
+        self._svc.fetch(
+            listar_sessoes_ativas, self._atualizar_card_online, chave="sessoes"
+        )
 
-    def _renderizar(self, dados):
+    def _renderizar(self, dados, do_cache=False):
         if not dados:
             return
+        if not do_cache:
+            cache_local.gravar("dashboard", dados)
         self._atualizar_cards(dados.get("resumo", {}))
-        self._atualizar_solicitacoes(dados.get("solicitacoes", []))
-        self._atualizar_expirando(dados.get("expirando", []))
+        self._atualizar_solicitacoes(dados.get("solicitacoes", []), do_cache)
+        self._atualizar_expirando(dados.get("expirando", []), do_cache)
 
     def _atualizar_cards(self, r):
         if not r:
@@ -127,72 +180,149 @@ class DashboardController:
             return
         self.ui.card_ativos.lbl_valor.setText(str(len(sessoes)))
 
-    def _atualizar_solicitacoes(self, solicitacoes):
+    def _atualizar_solicitacoes(self, solicitacoes, do_cache=False):
+        # Mantém o andamento do lote nas linhas que ainda estão pendentes
+        self.ui.tabela_solicitacoes.definir_linhas(
+            [
+                (
+                    {**s, "_estado": self._estados[s["id"]]}
+                    if s.get("id") in self._estados
+                    else s
+                )
+                for s in solicitacoes or []
+            ],
+            do_cache=do_cache,
+        )
+
+    def _atualizar_expirando(self, expirando, do_cache=False):
+        self.ui.tabela_expirando.definir_linhas(expirando or [], do_cache=do_cache)
+
+    _ESTADOS = {
+        "fila": ("⏳ Na fila", Qt.GlobalColor.gray),
+        "criando": ("⚙️ Criando usuário...", Qt.GlobalColor.yellow),
+        "criado": ("⚙️ Finalizando...", Qt.GlobalColor.yellow),
+        "aprovado": ("✅ Aprovado", Qt.GlobalColor.green),
+        "erro": ("❌ Erro", Qt.GlobalColor.red),
+    }
+
+    @classmethod
+    def _celulas_solicitacao(cls, s: dict) -> list:
+        username = s.get("username", "—")
+        celulas = [celula(username), celula(f"{username}@rcc.app")]
+        if "_estado" in s:
+            estado, msg = s["_estado"]
+            texto, cor = cls._ESTADOS.get(estado, (estado, None))
+            if estado == "erro":
+                # Com erro os botões voltam; a mensagem ocupa a coluna do e-mail
+                celulas[1] = celula(f"{texto}: {msg}" if msg else texto, cor)
+            else:
+                # Durante o lote a coluna de ações mostra o andamento
+                celulas.append(celula(texto, cor))
+        return celulas
+
+    @staticmethod
+    def _acoes_solicitacao(s: dict) -> list:
+        if "_estado" in s and s["_estado"][0] != "erro":
+            return []
+        return [
+            ("✅ Aprovar", "#16a34a", "aprovar"),
+            ("❌ Rejeitar", "#dc2626", "rejeitar"),
+        ]
+
+    # ── Aprovação em lote ──────────────────────────────────────
+
+    def _verificar_interrompidas(self):
+        from utils.supabase_admin import aprovacoes_interrompidas
+
+        n = len(aprovacoes_interrompidas())
+        self.ui.btn_retomar.setText(f"▶  Retomar aprovação ({n})")
+        self.ui.btn_retomar.setVisible(n > 0 and self._lote is None)
+
+    def _retomar_lote(self):
+        from utils.supabase_admin import aprovacoes_interrompidas
+
+        self._aprovar_lote(aprovacoes_interrompidas(), confirmar=False)
+
+    def _aprovar_lote(self, solicitacoes: list, confirmar: bool = True):
+        from telas.dialogs import DialogConfirmacao
+
+        solicitacoes = [s for s in solicitacoes if s.get("id")]
+        if not solicitacoes or self._lote is not None:
+            return
+        if (
+            confirmar
+            and not DialogConfirmacao(
+                f"Aprovar {len(solicitacoes)} solicitações?", parent=self.ui
+            ).exec()
+        ):
+            return
+
+        self._estados = {s["id"]: ("fila", "") for s in solicitacoes}
+        self._progresso = {"total": len(solicitacoes), "feitos": 0}
         tabela = self.ui.tabela_solicitacoes
-        tabela.setRowCount(0)
-        for s in solicitacoes or []:
-            row = tabela.rowCount()
-            tabela.insertRow(row)
-            sol_id = s.get("id", "")
-            username = s.get("username", "—")
-            email = f"{username}@rcc.app"
-            tabela.setItem(row, 0, self._item(username))
-            tabela.setItem(row, 1, self._item(email))
-            w = QWidget()
-            l = QHBoxLayout(w)
-            l.setContentsMargins(4, 2, 4, 2)
-            l.setSpacing(4)
-            btn_a = QPushButton("✅ Aprovar")
-            btn_r = QPushButton("❌ Rejeitar")
-            for btn in [btn_a, btn_r]:
-                btn.setFixedHeight(26)
-                btn.setCursor(Qt.CursorShape.PointingHandCursor)
-            btn_a.setStyleSheet(
-                "QPushButton { background-color: #16a34a; color: white; border-radius: 5px; font-size: 11px; border: none; padding: 0 8px; }"
-            )
-            btn_r.setStyleSheet(
-                "QPushButton { background-color: #dc2626; color: white; border-radius: 5px; font-size: 11px; border: none; padding: 0 8px; }"
-            )
-            btn_a.clicked.connect(
-                lambda _, sid=sol_id, u=username: self._dialog_aprovar(sid, u)
+        for s in solicitacoes:
+            linha = tabela.modelo.linha(s["id"])
+            if linha is not None:
+                tabela.modelo.upsert({**linha, "_estado": self._estados[s["id"]]})
+
+        self._lote = AprovacaoLoteWorker(solicitacoes)
+        self._lote.progresso.connect(self._ao_progresso_lote)
+        self._lote.concluido.connect(self._ao_concluir_lote)
+        for btn in (self.ui.btn_aprovar_sel, self.ui.btn_aprovar_todas):
+            btn.setEnabled(False)
+        self.ui.btn_retomar.setVisible(False)
+        self.ui.lbl_lote.setText(f"0 / {len(solicitacoes)}")
+        self._lote.executar()
+
+    def _ao_progresso_lote(self, sol_id: str, estado: str, msg: str):
+        self._estados[sol_id] = (estado, msg)
+        if estado in ("aprovado", "erro"):
+            self._progresso["feitos"] += 1
+            self.ui.lbl_lote.setText(
+                f"{self._progresso['feitos']} / {self._progresso['total']}"
             )
-            btn_r.clicked.connect(
-                lambda _, sid=sol_id, u=username: self._dialog_rejeitar(sid, u)
+        linha = self.ui.tabela_solicitacoes.modelo.linha(sol_id)
+        if linha is not None:
+            self.ui.tabela_solicitacoes.modelo.upsert(
+                {**linha, "_estado": (estado, msg)}
             )
-            l.addWidget(btn_a)
-            l.addWidget(btn_r)
-            l.addStretch()
-            tabela.setCellWidget(row, 2, w)
-            tabela.setRowHeight(row, 40)
 
-    def _atualizar_expirando(self, expirando):
+    def _ao_concluir_lote(self, resultados: dict):
+        from utils.supabase_admin import resumo_lote
+
+        self._lote = None
+        # Só os erros continuam marcados até o próximo lote
+        self._estados = {k: v for k, v in self._estados.items() if v[0] == "erro"}
+        for btn in (self.ui.btn_aprovar_sel, self.ui.btn_aprovar_todas):
+            btn.setEnabled(True)
+        self.ui.lbl_lote.setText(resumo_lote(resultados)[1] if resultados else "")
+        self._verificar_interrompidas()
+        self._carregar()
+
+    @staticmethod
+    def _celulas_expirando(dados: dict) -> list:
         from datetime import datetime, timezone
 
-        tabela = self.ui.tabela_expirando
-        tabela.setRowCount(0)
-        for dados in expirando or []:
-            row = tabela.rowCount()
-            tabela.insertRow(row)
-            expira_raw = dados.get("expira_em", "")
-            try:
-                dt = datetime.fromisoformat(expira_raw.replace("Z", "+00:00"))
-                dias = (dt - datetime.now(timezone.utc)).days
-                expira = dt.strftime("%d/%m/%Y")
-                dias_item = QTableWidgetItem(f"{max(0,dias)} dias")
-                dias_item.setForeground(
-                    Qt.GlobalColor.red
-                    if dias <= 2
-                    else Qt.GlobalColor.yellow if dias <= 5 else Qt.GlobalColor.white
-                )
-                dias_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            except Exception:
-                expira = expira_raw
-                dias_item = self._item("—")
-            tabela.setItem(row, 0, self._item(dados.get("username", "—")))
-            tabela.setItem(row, 1, self._item(dados.get("plano_nome", "—")))
-            tabela.setItem(row, 2, self._item(expira))
-            tabela.setItem(row, 3, dias_item)
-            tabela.setRowHeight(row, 36)
+        expira_raw = dados.get("expira_em", "")
+        try:
+            dt = datetime.fromisoformat(expira_raw.replace("Z", "+00:00"))
+            dias = (dt - datetime.now(timezone.utc)).days
+            expira = dt.strftime("%d/%m/%Y")
+            cor = (
+                Qt.GlobalColor.red
+                if dias <= 2
+                else Qt.GlobalColor.yellow if dias <= 5 else Qt.GlobalColor.white
+            )
+            dias_cel = celula(f"{max(0,dias)} dias", cor, ordem=dias)
+        except Exception:
+            expira = expira_raw
+            dias_cel = celula("—", ordem=0)
+        return [
+            celula(dados.get("username", "—")),
+            celula(dados.get("plano_nome", "—")),
+            celula(expira, ordem=expira_raw or ""),
+            dias_cel,
+        ]
 
     # ── Dialog Disparar Update ─────────────────────────────────
 
@@ -287,8 +417,3 @@ class DashboardController:
             self._workers.append(w)
             w.concluido.connect(lambda: self._workers.clear())
             w.executar()
-
-    def _item(self, texto):
-        item = QTableWidgetItem(str(texto))
-        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        return item
@@ -111,7 +111,22 @@ class DashboardUI(TelaBase):
 
         self.tabela_solicitacoes = self._criar_tabela(["Usuário", "E-mail", "Ações"])
 
+        # Aprovação em lote
+        layout_lote = QHBoxLayout()
+        self.btn_aprovar_sel = self._criar_btn_acao("✅  Aprovar selecionadas", "#16a34a", "white")
+        self.btn_aprovar_todas = self._criar_btn_acao("✅  Aprovar todas", "#2a3f7a", "#FFD700")
+        self.btn_retomar = self._criar_btn_acao("▶  Retomar aprovação", "#d97706", "white")
+        self.btn_retomar.setVisible(False)
+        self.lbl_lote = QLabel("")
+        self.lbl_lote.setStyleSheet("color: #aaa; font-size: 11px;")
+        layout_lote.addWidget(self.btn_aprovar_sel)
+        layout_lote.addWidget(self.btn_aprovar_todas)
+        layout_lote.addWidget(self.btn_retomar)
+        layout_lote.addWidget(self.lbl_lote)
+        layout_lote.addStretch()
+
         layout_sol.addWidget(lbl_sol)
+        layout_sol.addLayout(layout_lote)
         layout_sol.addWidget(self.tabela_solicitacoes)
 
         # Expirando em breve (direita)
@@ -1,5 +1,7 @@
-from PyQt6.QtWidgets import QTableWidgetItem
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import QTimer
+from telas.tabela_modelo import celula
+
+_PAGINA = 200
 
 
 class LogsController:
@@ -12,7 +14,8 @@ class LogsController:
         self._timer = QTimer()
         self._timer.setSingleShot(True)
         self._timer.setInterval(300)
-        self._timer.timeout.connect(self._carregar)
+        # Com a tela oculta a recarga espera e roda uma vez ao voltar
+        self._timer.timeout.connect(lambda: self.ui.quando_visivel(self._carregar))
 
         def _iniciar(*args, **kwargs):
             from PyQt6.QtCore import QMetaObject, Qt
@@ -33,77 +36,113 @@ class LogsController:
 
         self.ui.btn_refresh.clicked.connect(self._carregar)
         self.ui.input_busca.textChanged.connect(self._filtrar)
-        self._todos = []
+        self.ui.combo_acao.currentIndexChanged.connect(self._carregar)
+        self.ui.combo_usuario.currentIndexChanged.connect(self._carregar)
+        self.ui.data_desde.dateChanged.connect(self._carregar)
+        self.ui.data_ate.dateChanged.connect(self._carregar)
+        self.ui.tabela.configurar(
+            chave=lambda l: l.get("id"), formatar=self._celulas, altura=36
+        )
+        # Páginas por id decrescente direto do banco local, ao rolar
+        self._busca = ""
         self._carregar()
 
+    def _filtros(self) -> dict:
+        """Filtros atuais da tela, lidos na thread principal."""
+        from telas.logs.logs_ui import DATA_VAZIA
+
+        filtros = {
+            "acao": self.ui.combo_acao.currentData(),
+            "username": self.ui.combo_usuario.currentData(),
+        }
+        desde, ate = self.ui.data_desde.date(), self.ui.data_ate.date()
+        if desde != DATA_VAZIA:
+            filtros["desde"] = desde.toString("yyyy-MM-dd")
+        if ate != DATA_VAZIA:
+            # Dia seguinte: "2026-10-02" fica antes de qualquer hora desse
+            # dia na comparação de texto, então `<=` pega o dia `ate` inteiro
+            filtros["ate"] = ate.addDays(1).toString("yyyy-MM-dd")
+        return {k: v for k, v in filtros.items() if v}
+
+    def _pagina(self, antes_de, busca="", filtros=None):
+        from utils.supabase_admin import consultar_logs
+
+        logs = consultar_logs(
+            busca, antes_de=antes_de, limite=_PAGINA, **(filtros or {})
+        )
+        cursor = logs[-1].get("id") if len(logs) >= _PAGINA else None
+        return {"linhas": logs, "cursor": cursor}
+
     def _carregar(self):
-        from utils.supabase_admin import listar_logs
+        # Busca e filtros congelados aqui: a página roda fora da thread principal
+        busca, filtros = self._busca, self._filtros()
+        self.ui.tabela.paginar(
+            lambda antes_de: self._pagina(antes_de, busca, filtros), "logs"
+        )
+        self._carregar_filtros()
 
-        self._svc.fetch(lambda: listar_logs(200), self._renderizar)
+    def _carregar_filtros(self):
+        from utils.supabase_admin import filtros_logs
 
-    def _filtrar(self, texto):
-        filtrados = (
-            [
-                l
-                for l in self._todos
-                if texto.lower() in (l.get("acao") or "").lower()
-                or texto.lower() in (l.get("username") or "").lower()
-                or texto.lower() in str(l.get("detalhes") or "").lower()
-            ]
-            if texto
-            else self._todos
-        )
-        self._preencher(filtrados)
+        self._svc.fetch(filtros_logs, self._preencher_filtros, chave="logs:filtros")
 
-    def _renderizar(self, logs):
-        if logs is None:
+    def _preencher_filtros(self, valores):
+        if not valores:
             return
-        self._todos = logs
-        self._preencher(logs)
-
-    def _preencher(self, logs):
-        from datetime import datetime, timezone
-
-        tabela = self.ui.tabela
-        tabela.setRowCount(0)
-        for l in logs:
-            row = tabela.rowCount()
-            tabela.insertRow(row)
-            criado = "—"
-            try:
-                dt = datetime.fromisoformat(
-                    l.get("criado_em", "").replace("Z", "+00:00")
-                )
-                criado = dt.strftime("%d/%m/%Y %H:%M")
-            except Exception:
-                pass
-
-            # Extrai username dos detalhes se não estiver no campo direto
-            username = l.get("username") or ""
-            if not username:
-                detalhes = l.get("detalhes") or {}
-                if isinstance(detalhes, dict):
-                    username = detalhes.get("username", "—")
-
-            # Formata detalhes removendo o username para não duplicar
+        for combo, itens in (
+            (self.ui.combo_acao, valores.get("acoes") or []),
+            (self.ui.combo_usuario, valores.get("usuarios") or []),
+        ):
+            atual = combo.currentData()
+            if atual and atual not in itens:
+                itens = [*itens, atual]  # o filtro em uso não some da lista
+            combo.blockSignals(True)
+            while combo.count() > 1:
+                combo.removeItem(1)
+            for item in itens:
+                combo.addItem(item, item)
+            if atual in itens:
+                combo.setCurrentIndex(itens.index(atual) + 1)
+            combo.blockSignals(False)
+
+    def _filtrar(self, texto):
+        # Fetches com a mesma chave se substituem: só a última busca chega
+        self._busca = texto
+        self._carregar()
+
+    @staticmethod
+    def _celulas(l: dict) -> list:
+        from datetime import datetime
+
+        criado = "—"
+        try:
+            dt = datetime.fromisoformat(l.get("criado_em", "").replace("Z", "+00:00"))
+            criado = dt.strftime("%d/%m/%Y %H:%M")
+        except Exception:
+            pass
+
+        # Extrai username dos detalhes se não estiver no campo direto
+        username = l.get("username") or ""
+        if not username:
             detalhes = l.get("detalhes") or {}
             if isinstance(detalhes, dict):
-                det_exibir = {k: v for k, v in detalhes.items() if k != "username"}
-                det_str = (
-                    ", ".join(f"{k}: {v}" for k, v in det_exibir.items())
-                    if det_exibir
-                    else "—"
-                )
-            else:
-                det_str = str(detalhes) if detalhes else "—"
-
-            tabela.setItem(row, 0, self._item(criado))
-            tabela.setItem(row, 1, self._item(l.get("acao", "—")))
-            tabela.setItem(row, 2, self._item(username))
-            tabela.setItem(row, 3, self._item(det_str))
-            tabela.setRowHeight(row, 36)
-
-    def _item(self, texto):
-        item = QTableWidgetItem(str(texto))
-        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        return item
+                username = detalhes.get("username", "—")
+
+        # Formata detalhes removendo o username para não duplicar
+        detalhes = l.get("detalhes") or {}
+        if isinstance(detalhes, dict):
+            det_exibir = {k: v for k, v in detalhes.items() if k != "username"}
+            det_str = (
+                ", ".join(f"{k}: {v}" for k, v in det_exibir.items())
+                if det_exibir
+                else "—"
+            )
+        else:
+            det_str = str(detalhes) if detalhes else "—"
+
+        return [
+            celula(criado, ordem=l.get("criado_em") or ""),
+            celula(l.get("acao", "—")),
+            celula(username),
+            celula(det_str),
+        ]
@@ -1,6 +1,28 @@
-from PyQt6.QtWidgets import QHBoxLayout
+from PyQt6.QtCore import QDate
+from PyQt6.QtWidgets import QHBoxLayout, QComboBox, QDateEdit, QLabel
 from telas.base import TelaBase
 
+# Data mínima dos QDateEdit: exibida como "—" e tratada como "sem filtro"
+DATA_VAZIA = QDate(2000, 1, 1)
+
+_ESTILO_FILTRO = """
+    QComboBox, QDateEdit {
+        background-color: rgba(255, 255, 255, 0.05);
+        border: 1px solid #2a3f7a;
+        border-radius: 8px;
+        color: white;
+        padding: 0 12px;
+        font-size: 12px;
+    }
+    QComboBox:focus, QDateEdit:focus { border: 1px solid #FFD700; }
+    QComboBox::drop-down { border: none; }
+    QComboBox QAbstractItemView {
+        background-color: #1a2854;
+        color: white;
+        border: 1px solid #FFD700;
+    }
+"""
+
 class LogsUI(TelaBase):
     def __init__(self):
         super().__init__("📝  Logs", "Histórico de ações administrativas")
@@ -8,13 +30,28 @@ class LogsUI(TelaBase):
 
     def _construir(self):
         layout_acoes = QHBoxLayout()
-        self.input_busca = self._criar_input_busca("🔍  Buscar por ação ou usuário...")
+        self.input_busca = self._criar_input_busca("🔍  Buscar por ação, usuário ou detalhe...")
         self.btn_refresh = self._criar_btn_acao("🔄", "#2a3f7a", "#FFD700")
         self.btn_refresh.setFixedWidth(40)
         layout_acoes.addWidget(self.input_busca)
         layout_acoes.addWidget(self.btn_refresh)
         self._layout_raiz.addLayout(layout_acoes)
 
+        # Filtros: ação, usuário e período (datas em "—" não filtram)
+        layout_filtros = QHBoxLayout()
+        self.combo_acao = self._criar_combo("Todas as ações")
+        self.combo_usuario = self._criar_combo("Todos os usuários")
+        self.data_desde = self._criar_data()
+        self.data_ate = self._criar_data()
+        layout_filtros.addWidget(self.combo_acao, 2)
+        layout_filtros.addWidget(self.combo_usuario, 2)
+        for texto, campo in (("De", self.data_desde), ("até", self.data_ate)):
+            lbl = QLabel(texto)
+            lbl.setStyleSheet("color: #aaa; font-size: 11px;")
+            layout_filtros.addWidget(lbl)
+            layout_filtros.addWidget(campo, 1)
+        self._layout_raiz.addLayout(layout_filtros)
+
         self.tabela = self._criar_tabela([
             "Data/Hora", "Ação", "Usuário", "Detalhes"
         ])
@@ -22,3 +59,21 @@ class LogsUI(TelaBase):
         self.tabela.setColumnWidth(1, 160)
         self.tabela.setColumnWidth(2, 120)
         self._layout_raiz.addWidget(self.tabela)
+
+    def _criar_combo(self, todos: str) -> QComboBox:
+        combo = QComboBox()
+        combo.setFixedHeight(36)
+        combo.setStyleSheet(_ESTILO_FILTRO)
+        combo.addItem(todos, None)
+        return combo
+
+    def _criar_data(self) -> QDateEdit:
+        campo = QDateEdit()
+        campo.setFixedHeight(36)
+        campo.setStyleSheet(_ESTILO_FILTRO)
+        campo.setCalendarPopup(True)
+        campo.setDisplayFormat("dd/MM/yyyy")
+        campo.setMinimumDate(DATA_VAZIA)
+        campo.setSpecialValueText("—")
+        campo.setDate(DATA_VAZIA)
+        return campo
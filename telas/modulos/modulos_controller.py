@@ -1,12 +1,8 @@
-from PyQt6.QtWidgets import (
-    QTableWidgetItem,
-    QWidget,
-    QHBoxLayout,
-    QPushButton,
-    QLabel,
-    QLineEdit,
-)
-from PyQt6.QtCore import Qt, QObject, pyqtSignal, QThread
+from PyQt6.QtWidgets import QLabel, QLineEdit
+from PyQt6.QtCore import Qt, pyqtSignal, QThread
+from telas.tabela_modelo import celula
+from utils import cache_local
+from utils.data_service import WorkerEmThread
 from utils.supabase_admin import (
     criar_modulo,
     editar_modulo,
@@ -15,7 +11,7 @@ from utils.supabase_admin import (
 )
 
 
-class ModulosWorker(QObject):
+class ModulosWorker(WorkerEmThread):
     salvar_pronto = pyqtSignal(bool, str)
     editar_pronto = pyqtSignal(bool)
     toggle_pronto = pyqtSignal()
@@ -53,81 +49,69 @@ class ModulosController:
         self.worker.excluir_pronto.connect(self._finalizar_exclusao)
         self.thread.start()
 
-        svc.modulos_mudou.connect(self._carregar)
+        # Com a tela oculta a recarga espera e roda uma vez ao voltar
+        svc.modulos_mudou.connect(lambda: self.ui.quando_visivel(self._carregar))
 
-        self.ui.btn_refresh.clicked.connect(self._carregar)
+        # Atualizar ignora o cache de referência e vai ao banco
+        self.ui.btn_refresh.clicked.connect(lambda: self._carregar(fresco=True))
         self.ui.btn_novo.clicked.connect(self._dialog_novo_modulo)
+        self.ui.tabela.configurar(
+            chave=lambda m: m.get("id"), formatar=self._celulas, acoes=self._acoes
+        )
+        self.ui.tabela.registrar_acoes(
+            {
+                "editar": lambda m: self._dialog_editar(
+                    m["id"], m.get("nome", ""), m.get("descricao", "")
+                ),
+                "toggle": lambda m: self.worker.chamar(
+                    "toggle", m["id"], m.get("ativo", True)
+                ),
+                "excluir": lambda m: self._dialog_excluir(m["id"], m.get("nome", "")),
+            }
+        )
+        # Último snapshot salvo aparece já; o servidor reconcilia em seguida
+        self._renderizar(cache_local.ler("modulos"), do_cache=True)
         self._carregar()
 
-    def _carregar(self):
+    def _carregar(self, fresco=False):
         from utils.supabase_admin import listar_modulos
 
-        self._svc.fetch(listar_modulos, self._renderizar)
+        self._svc.fetch(
+            lambda: listar_modulos(fresco), self._renderizar, chave="modulos"
+        )
 
-    def _renderizar(self, modulos):
+    def _renderizar(self, modulos, do_cache=False):
         if modulos is None:
             return
-        tabela = self.ui.tabela
-        tabela.setRowCount(0)
-        for m in modulos:
-            row = tabela.rowCount()
-            tabela.insertRow(row)
-            ativo = m.get("ativo", True)
-            modulo_id = m.get("id", "")
-
-            status = QTableWidgetItem("✅ Ativo" if ativo else "❌ Inativo")
-            status.setForeground(Qt.GlobalColor.green if ativo else Qt.GlobalColor.red)
-            status.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
-            tabela.setItem(row, 0, self._item(m.get("id", "—")))
-            tabela.setItem(row, 1, self._item(m.get("nome", "—")))
-            tabela.setItem(row, 2, self._item(m.get("descricao", "—")))
-            tabela.setItem(row, 3, status)
-
-            w = QWidget()
-            l = QHBoxLayout(w)
-            l.setContentsMargins(4, 2, 4, 2)
-            l.setSpacing(4)
-
-            def _btn(txt, cor):
-                b = QPushButton(txt)
-                b.setFixedHeight(26)
-                b.setCursor(Qt.CursorShape.PointingHandCursor)
-                b.setStyleSheet(
-                    f"""QPushButton {{
-                    background-color: {cor}; color: white;
-                    border-radius: 5px; font-size: 11px;
-                    border: none; padding: 0 8px;
-                }}"""
-                )
-                return b
-
-            btn_editar = _btn("Editar", "#2563eb")
-            btn_toggle = _btn(
-                "Desativar" if ativo else "Ativar", "#dc2626" if ativo else "#16a34a"
-            )
-            btn_excluir = _btn("Excluir", "#6b7280")
-
-            btn_editar.clicked.connect(
-                lambda _, mid=modulo_id, n=m.get("nome", ""), d=m.get(
-                    "descricao", ""
-                ): self._dialog_editar(mid, n, d)
-            )
-            btn_toggle.clicked.connect(
-                lambda _, mid=modulo_id, a=ativo: self.worker.toggle(mid, a)
-            )
-            btn_excluir.clicked.connect(
-                lambda _, mid=modulo_id, n=m.get("nome", ""): self._dialog_excluir(
-                    mid, n
-                )
-            )
-
-            l.addWidget(btn_editar)
-            l.addWidget(btn_toggle)
-            l.addWidget(btn_excluir)
-            l.addStretch()
-            tabela.setCellWidget(row, 4, w)
-            tabela.setRowHeight(row, 40)
+        if not do_cache:
+            cache_local.gravar("modulos", modulos)
+        self.ui.tabela.definir_linhas(modulos, do_cache=do_cache)
+
+    @staticmethod
+    def _celulas(m: dict) -> list:
+        ativo = m.get("ativo", True)
+        return [
+            celula(m.get("id", "—")),
+            celula(m.get("nome", "—")),
+            celula(m.get("descricao", "—")),
+            celula(
+                "✅ Ativo" if ativo else "❌ Inativo",
+                Qt.GlobalColor.green if ativo else Qt.GlobalColor.red,
+            ),
+        ]
+
+    @staticmethod
+    def _acoes(m: dict) -> list:
+        ativo = m.get("ativo", True)
+        return [
+            ("Editar", "#2563eb", "editar"),
+            (
+                "Desativar" if ativo else "Ativar",
+                "#dc2626" if ativo else "#16a34a",
+                "toggle",
+            ),
+            ("Excluir", "#6b7280", "excluir"),
+        ]
 
     def _dialog_novo_modulo(self):
         from telas.dialogs import DialogBase
@@ -162,7 +146,7 @@ class ModulosController:
             self._lbl_ref = lbl_aviso
             dialog._btn_confirmar.setEnabled(False)
             dialog._btn_confirmar.setText("Salvando...")
-            self.worker.salvar(mid, nome, inp_desc.text())
+            self.worker.chamar("salvar", mid, nome, inp_desc.text())
 
         dialog._btn_confirmar.clicked.connect(_salvar)
         dialog.exec()
@@ -195,7 +179,8 @@ class ModulosController:
 
         def _salvar():
             self._dialog_ref = dialog
-            self.worker.editar(mid, inp_nome.text(), inp_desc.text())
+            dialog._btn_confirmar.setEnabled(False)
+            self.worker.chamar("editar", mid, inp_nome.text(), inp_desc.text())
 
         dialog._btn_confirmar.clicked.connect(_salvar)
         dialog.exec()
@@ -203,6 +188,8 @@ class ModulosController:
     def _finalizar_editar(self, ok):
         if ok:
             self._dialog_ref.accept()
+        else:
+            self._dialog_ref._btn_confirmar.setEnabled(True)
 
     def _dialog_excluir(self, mid, nome):
         from telas.dialogs import DialogBase
@@ -229,7 +216,7 @@ class ModulosController:
             self._lbl_ref = lbl_aviso
             dialog._btn_confirmar.setEnabled(False)
             dialog._btn_confirmar.setText("Excluindo...")
-            self.worker.excluir(mid)
+            self.worker.chamar("excluir", mid)
 
         dialog._btn_confirmar.clicked.connect(_confirmar)
         dialog.exec()
@@ -241,8 +228,3 @@ class ModulosController:
             self._lbl_ref.setText(f"⚠️  {msg}")
             self._dialog_ref._btn_confirmar.setEnabled(True)
             self._dialog_ref._btn_confirmar.setText("Excluir")
-
-    def _item(self, texto):
-        item = QTableWidgetItem(str(texto))
-        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        return item
@@ -1,13 +1,8 @@
-from PyQt6.QtWidgets import (
-    QTableWidgetItem,
-    QWidget,
-    QHBoxLayout,
-    QPushButton,
-    QLabel,
-    QLineEdit,
-    QCheckBox,
-)
-from PyQt6.QtCore import Qt, QObject, pyqtSignal, QThread
+from PyQt6.QtWidgets import QLabel, QLineEdit, QCheckBox
+from PyQt6.QtCore import Qt, pyqtSignal, QThread
+from telas.tabela_modelo import celula
+from utils import cache_local
+from utils.data_service import WorkerEmThread
 from utils.supabase_admin import (
     criar_plano,
     editar_plano,
@@ -18,7 +13,7 @@ from utils.supabase_admin import (
 )
 
 
-class PlanosWorker(QObject):
+class PlanosWorker(WorkerEmThread):
     salvar_pronto = pyqtSignal(bool, str)
     editar_pronto = pyqtSignal(bool)
     modulos_pronto = pyqtSignal()
@@ -67,95 +62,103 @@ class PlanosController:
         self.worker.delete_pronto.connect(self._finalizar_exclusao)
         self.thread.start()
 
-        svc.planos_mudou.connect(self._carregar)
+        # Com a tela oculta a recarga espera e roda uma vez ao voltar
+        svc.planos_mudou.connect(lambda: self.ui.quando_visivel(self._carregar))
 
-        self.ui.btn_refresh.clicked.connect(self._carregar)
+        # Atualizar ignora o cache de referência e vai ao banco
+        self.ui.btn_refresh.clicked.connect(lambda: self._carregar(fresco=True))
         self.ui.btn_novo.clicked.connect(self._dialog_novo_plano)
+        self.ui.tabela.configurar(
+            chave=lambda p: p.get("id"), formatar=self._celulas, acoes=self._acoes
+        )
+        self.ui.tabela.registrar_acoes(
+            {
+                "editar": lambda p: self._dialog_editar(
+                    p["id"], p.get("nome", ""), p.get("descricao", "")
+                ),
+                "modulos": lambda p: self._dialog_modulos(
+                    p["id"], [m["modulo_id"] for m in p.get("planos_modulos", [])]
+                ),
+                "toggle": lambda p: self.worker.chamar(
+                    "toggle", p["id"], p.get("ativo", True)
+                ),
+                "excluir": lambda p: self._confirmar_exclusao(p["id"]),
+            }
+        )
+        # Último snapshot salvo aparece já; o servidor reconcilia em seguida
+        self._renderizar(cache_local.ler("planos"), do_cache=True)
         self._carregar()
 
-    def _carregar(self):
+    def _carregar(self, fresco=False):
         from utils.supabase_admin import listar_planos, listar_modulos
 
         self._svc.fetch(
-            lambda: {"planos": listar_planos(), "modulos": listar_modulos()},
+            {
+                "planos": lambda: listar_planos(fresco),
+                "modulos": lambda: listar_modulos(fresco),
+            },
             self._renderizar,
+            chave="planos",
         )
 
-    def _renderizar(self, dados):
+    def _renderizar(self, dados, do_cache=False):
         if not dados:
             return
+        if not do_cache:
+            cache_local.gravar("planos", dados)
+        mudou_modulos = dados.get("modulos", []) != self._modulos
         self._modulos = dados.get("modulos", [])
-        tabela = self.ui.tabela
-        tabela.setRowCount(0)
-        for p in dados.get("planos", []):
-            row = tabela.rowCount()
-            tabela.insertRow(row)
-            ativo = p.get("ativo", True)
-            plano_id = p.get("id", "")
-            mids = [m["modulo_id"] for m in p.get("planos_modulos", [])]
-            nomes = [m["nome"] for m in self._modulos if m["id"] in mids]
-            mod_txt = ", ".join(nomes) if nomes else "Nenhum"
-
-            status = QTableWidgetItem("✅ Ativo" if ativo else "❌ Inativo")
-            status.setForeground(Qt.GlobalColor.green if ativo else Qt.GlobalColor.red)
-            status.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
-            tabela.setItem(row, 0, self._item(p.get("nome", "—")))
-            tabela.setItem(row, 1, self._item(p.get("descricao", "—")))
-            tabela.setItem(row, 2, self._item(mod_txt))
-            tabela.setItem(row, 3, status)
-
-            w = QWidget()
-            l = QHBoxLayout(w)
-            l.setContentsMargins(4, 2, 4, 2)
-            l.setSpacing(4)
-
-            def _btn(txt, cor):
-                b = QPushButton(txt)
-                b.setFixedHeight(26)
-                b.setCursor(Qt.CursorShape.PointingHandCursor)
-                b.setStyleSheet(
-                    f"""QPushButton {{
-                    background-color: {cor}; color: white;
-                    border-radius: 5px; font-size: 11px;
-                    border: none; padding: 0 8px;
-                }}"""
-                )
-                return b
-
-            btn_editar = _btn("Editar", "#2563eb")
-            btn_modulos = _btn("Módulos", "#7c3aed")
-            btn_toggle = _btn(
-                "Desativar" if ativo else "Ativar", "#dc2626" if ativo else "#16a34a"
-            )
-            btn_excluir = _btn("Excluir", "#6b7280")
+        self.ui.tabela.definir_linhas(dados.get("planos", []), do_cache=do_cache)
+        if mudou_modulos:
+            # Nomes dos módulos aparecem em todas as linhas
+            self.ui.tabela.modelo.reformatar()
+
+    def _celulas(self, p: dict) -> list:
+        ativo = p.get("ativo", True)
+        mids = [m["modulo_id"] for m in p.get("planos_modulos", [])]
+        nomes = [m["nome"] for m in self._modulos if m["id"] in mids]
+        return [
+            celula(p.get("nome", "—")),
+            celula(p.get("descricao", "—")),
+            celula(", ".join(nomes) if nomes else "Nenhum"),
+            celula(
+                "✅ Ativo" if ativo else "❌ Inativo",
+                Qt.GlobalColor.green if ativo else Qt.GlobalColor.red,
+            ),
+        ]
+
+    @staticmethod
+    def _acoes(p: dict) -> list:
+        ativo = p.get("ativo", True)
+        return [
+            ("Editar", "#2563eb", "editar"),
+            ("Módulos", "#7c3aed", "modulos"),
+            (
+                "Desativar" if ativo else "Ativar",
+                "#dc2626" if ativo else "#16a34a",
+                "toggle",
+            ),
+            ("Excluir", "#6b7280", "excluir"),
+        ]
 
-            btn_editar.clicked.connect(
-                lambda _, pid=plano_id, n=p.get("nome", ""), d=p.get(
-                    "descricao", ""
-                ): self._dialog_editar(pid, n, d)
-            )
-            btn_modulos.clicked.connect(
-                lambda _, pid=plano_id, m=mids: self._dialog_modulos(pid, m)
-            )
-            btn_toggle.clicked.connect(
-                lambda _, pid=plano_id, a=ativo: self.worker.toggle(pid, a)
-            )
-            btn_excluir.clicked.connect(
-                lambda _, pid=plano_id: self._confirmar_exclusao(pid)
-            )
+    def _dialog_novo_plano(self):
+        from utils.supabase_admin import listar_modulos
 
-            l.addWidget(btn_editar)
-            l.addWidget(btn_modulos)
-            l.addWidget(btn_toggle)
-            l.addWidget(btn_excluir)
-            l.addStretch()
-            tabela.setCellWidget(row, 4, w)
-            tabela.setRowHeight(row, 40)
+        # Módulos vêm fora da GUI (em geral do cache de referência);
+        # com cliques repetidos só o pedido mais recente abre o dialog
+        self._svc.cancelar("planos:dialog_novo")
+        self._svc.fetch(
+            listar_modulos,
+            lambda modulos: self._abrir_dialog_novo_plano(modulos or []),
+            chave="planos:dialog_novo",
+        )
 
-    def _dialog_novo_plano(self):
+    def _abrir_dialog_novo_plano(self, modulos):
         from telas.dialogs import DialogBase
 
+        if not self.ui.isVisible():
+            return  # o usuário saiu da tela antes de os módulos chegarem
+
         dialog = DialogBase("➕  Novo Plano", parent=self.ui)
 
         def _campo(lbl_txt, ph, idx):
@@ -175,9 +178,7 @@ class PlanosController:
         lbl_mod.setStyleSheet("color: #aaa; font-size: 11px; font-weight: bold;")
         dialog._layout_corpo.insertWidget(4, lbl_mod)
         checks = {}
-        from utils.supabase_admin import listar_modulos as _lm
-
-        for i, m in enumerate(_lm()):
+        for i, m in enumerate(modulos):
             cb = QCheckBox(m["nome"])
             cb.setStyleSheet("color: white; font-size: 12px;")
             dialog._layout_corpo.insertWidget(5 + i, cb)
@@ -193,7 +194,9 @@ class PlanosController:
                 return
             self._dialog_ref = dialog
             self._lbl_ref = lbl_aviso
-            self.worker.salvar(
+            dialog._btn_confirmar.setEnabled(False)
+            self.worker.chamar(
+                "salvar",
                 nome,
                 inp_desc.text(),
                 [mid for mid, cb in checks.items() if cb.isChecked()],
@@ -206,6 +209,7 @@ class PlanosController:
         if ok:
             self._dialog_ref.accept()
         else:
+            self._dialog_ref._btn_confirmar.setEnabled(True)
             self._lbl_ref.setText(f"⚠️  {msg}")
 
     def _dialog_editar(self, pid, nome, descricao):
@@ -228,7 +232,8 @@ class PlanosController:
 
         def _salvar():
             self._dialog_ref = dialog
-            self.worker.editar(pid, inp_nome.text(), inp_desc.text())
+            dialog._btn_confirmar.setEnabled(False)
+            self.worker.chamar("editar", pid, inp_nome.text(), inp_desc.text())
 
         dialog._btn_confirmar.clicked.connect(_salvar)
         dialog.exec()
@@ -236,19 +241,34 @@ class PlanosController:
     def _finalizar_editar(self, ok):
         if ok:
             self._dialog_ref.accept()
+        else:
+            self._dialog_ref._btn_confirmar.setEnabled(True)
 
     def _dialog_modulos(self, pid, modulos_atuais):
-        from telas.dialogs import DialogBase
         from utils.supabase_admin import listar_modulos
 
+        # Cache de referência (o Realtime o invalida), lido fora da GUI
+        self._svc.cancelar("planos:dialog_modulos")
+        self._svc.fetch(
+            listar_modulos,
+            lambda modulos: self._abrir_dialog_modulos(
+                pid, modulos_atuais, modulos or []
+            ),
+            chave="planos:dialog_modulos",
+        )
+
+    def _abrir_dialog_modulos(self, pid, modulos_atuais, modulos):
+        from telas.dialogs import DialogBase
+
+        if not self.ui.isVisible():
+            return
+
         dialog = DialogBase("🧩  Módulos do Plano", parent=self.ui)
         lbl = QLabel("Selecione os módulos incluídos:")
         lbl.setStyleSheet("color: #aaa; font-size: 11px; font-weight: bold;")
         dialog._layout_corpo.insertWidget(0, lbl)
         checks = {}
-        # Busca módulos frescos do banco ao abrir o dialog
-        modulos_frescos = listar_modulos()
-        for i, m in enumerate(modulos_frescos):
+        for i, m in enumerate(modulos):
             cb = QCheckBox(m["nome"])
             cb.setChecked(m["id"] in modulos_atuais)
             cb.setStyleSheet("color: white; font-size: 12px;")
@@ -257,8 +277,12 @@ class PlanosController:
 
         def _salvar():
             self._dialog_ref = dialog
-            self.worker.atualizar_modulos(
-                pid, {mid: cb.isChecked() for mid, cb in checks.items()}, modulos_atuais
+            dialog._btn_confirmar.setEnabled(False)
+            self.worker.chamar(
+                "atualizar_modulos",
+                pid,
+                {mid: cb.isChecked() for mid, cb in checks.items()},
+                modulos_atuais,
             )
 
         dialog._btn_confirmar.clicked.connect(_salvar)
@@ -281,7 +305,8 @@ class PlanosController:
 
         def _confirmar():
             self._dialog_ref = dialog
-            self.worker.excluir(pid)
+            dialog._btn_confirmar.setEnabled(False)
+            self.worker.chamar("excluir", pid)
 
         dialog._btn_confirmar.clicked.connect(_confirmar)
         dialog.exec()
@@ -289,8 +314,5 @@ class PlanosController:
     def _finalizar_exclusao(self, ok):
         if ok:
             self._dialog_ref.accept()
-
-    def _item(self, texto):
-        item = QTableWidgetItem(str(texto))
-        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        return item
+        else:
+            self._dialog_ref._btn_confirmar.setEnabled(True)
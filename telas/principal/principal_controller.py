@@ -1,18 +1,32 @@
-from PyQt6.QtCore import QTimer
-
-from telas.dashboard.dashboard_ui import DashboardUI
-from telas.dashboard.dashboard_controller import DashboardController
-from telas.usuarios.usuarios_ui import UsuariosUI
-from telas.usuarios.usuarios_controller import UsuariosController
-from telas.assinaturas.assinaturas_ui import AssinaturasUI
-from telas.assinaturas.assinaturas_controller import AssinaturasController
-from telas.planos.planos_ui import PlanosUI
-from telas.planos.planos_controller import PlanosController
-from telas.modulos.modulos_ui import ModulosUI
-from telas.modulos.modulos_controller import ModulosController
-from telas.logs.logs_ui import LogsUI
-from telas.logs.logs_controller import LogsController
+from importlib import import_module
+from utils import startup_trace as trace
 from utils.data_service import obter_service
+from utils.entity_store import obter_store
+
+
+# Tabelas do Realtime que cada página precisa ao vivo; as demais ficam
+# pausadas e, ao voltar, o AdminRealtime busca só o que mudou no meio tempo.
+# Solicitações ficam sempre ligadas: pedido novo deve chegar na hora.
+_TABELAS_POR_PAGINA = {
+    "dashboard": {"assinaturas", "perfis", "sessoes_ativas"},
+    "usuarios": {"perfis", "assinaturas", "sessoes_ativas", "planos"},
+    "assinaturas": {"perfis", "assinaturas", "planos"},
+    "planos": {"planos", "modulos", "planos_modulos"},
+    "modulos": {"modulos", "planos_modulos"},
+    "logs": set(),
+}
+_SEMPRE_ATIVAS = {"solicitacoes"}
+
+# Página → (pacote em telas/, classe da UI, classe do controller, recebe o Realtime).
+# Os módulos só são importados na primeira visita à página.
+_PAGINAS = {
+    "dashboard": ("dashboard", "DashboardUI", "DashboardController", False),
+    "usuarios": ("usuarios", "UsuariosUI", "UsuariosController", False),
+    "assinaturas": ("assinaturas", "AssinaturasUI", "AssinaturasController", False),
+    "planos": ("planos", "PlanosUI", "PlanosController", True),
+    "modulos": ("modulos", "ModulosUI", "ModulosController", True),
+    "logs": ("logs", "LogsUI", "LogsController", False),
+}
 
 
 class PrincipalController:
@@ -21,9 +35,11 @@ class PrincipalController:
         self.ui = ui
         self._realtime = realtime
         self._paginas = {}
-        self._timers = []
+        self._controllers = {}
+        self._store_carregado = False
 
         self._svc = obter_service()
+        self._store = obter_store()
         self._conectar_realtime()
         self._carregar_paginas()
         self._conectar_eventos()
@@ -36,13 +52,23 @@ class PrincipalController:
         rt = self._realtime
         svc = self._svc
 
+        # O debounce é só o do AdminRealtime: cada janela vira um lote
+        # deduplicado por chave, entregue ao store e às telas paginadas
+        # Após uma queda o AdminRealtime injeta só o delta da lacuna nesses
+        # mesmos lotes (ou um RESYNC por tabela) — nada de recarregar tudo
+        # Primeiro a invalidação do cache de planos/módulos: o lote sai antes
+        # dos sinais *_mudou, então as recargas já encontram o cache limpo
+        rt.lote.connect(self._invalidar_referencia)
+        rt.lote.connect(self._store.aplicar_lote)
+        # Usuários e assinaturas aplicam o lote nas linhas, sem recarga
+        rt.lote.connect(svc.lote_mudou)
+        rt.estado_mudou.connect(self._ao_mudar_conexao)
+
         # Mapa: sinal_realtime → método de emissão do DataService
         # Usa métodos nomeados em vez de lambda para evitar problemas com args
+        # (perfis não entra: só as telas de usuários/assinaturas o exibem)
         mapa = [
-            (rt.usuarios_mudou, svc.emitir_usuarios),
             (rt.assinaturas_mudou, svc.emitir_assinaturas),
-            # assinatura mudou → recarrega aba usuários também (plano exibido lá)
-            (rt.assinaturas_mudou, svc.emitir_usuarios),
             (rt.planos_mudou, svc.emitir_planos),
             (rt.planos_modulos_mudou, svc.emitir_planos),
             (rt.modulos_mudou, svc.emitir_modulos),
@@ -52,48 +78,65 @@ class PrincipalController:
         ]
 
         for sinal_rt, emitir_fn in mapa:
-            t = QTimer()
-            t.setSingleShot(True)
-            t.setInterval(300)
-            t.timeout.connect(emitir_fn)
             # O sinal do Realtime emite dict — precisamos ignorar esse arg
-            # Usamos uma função intermediária que aceita qualquer arg
-            sinal_rt.connect(self._fazer_iniciador(t))
-            self._timers.append(t)
-
-        print(f"[Principal] Realtime conectado — 8 tabelas monitoradas")
+            sinal_rt.connect(self._fazer_emissor(emitir_fn))
+
+    def _ao_mudar_conexao(self, estado: str, espera: float):
+        textos = {
+            "conectando": ("⟳  Conectando...", "#8899bb"),
+            "conectado": ("●  Ao vivo", "#16a34a"),
+            "sincronizando": ("⟳  Sincronizando...", "#FFD700"),
+            "reconectando": (f"⚠  Reconectando em {espera:.0f}s", "#dc2626"),
+            "parado": ("○  Offline", "#8899bb"),
+        }
+        texto, cor = textos.get(estado, (estado, "#8899bb"))
+        self.ui.lbl_conexao.setText(texto)
+        self.ui.lbl_conexao.setStyleSheet(f"color: {cor}; font-size: 11px;")
 
     @staticmethod
-    def _fazer_iniciador(timer: QTimer):
-        def _iniciar(*args, **kwargs):
-            print(f"[Principal] evento Realtime recebido → timer iniciado")
-            from PyQt6.QtCore import QMetaObject, Qt
+    def _invalidar_referencia(tabela: str, _lote: list):
+        from utils.supabase_admin import invalidar_referencia
 
-            QMetaObject.invokeMethod(timer, "start", Qt.ConnectionType.QueuedConnection)
+        invalidar_referencia(tabela)
 
-        return _iniciar
+    @staticmethod
+    def _fazer_emissor(emitir_fn):
+        def _emitir(*args, **kwargs):
+            emitir_fn()
+
+        return _emitir
 
     def _carregar_paginas(self):
         svc = self._svc
         rt = self._realtime
 
-        paginas = {
-            "dashboard": (DashboardUI, lambda ui: DashboardController(ui, svc)),
-            "usuarios": (UsuariosUI, lambda ui: UsuariosController(ui, svc)),
-            "assinaturas": (AssinaturasUI, lambda ui: AssinaturasController(ui, svc)),
-            "planos": (PlanosUI, lambda ui: PlanosController(ui, svc, rt)),
-            "modulos": (ModulosUI, lambda ui: ModulosController(ui, svc, rt)),
-            "logs": (LogsUI, lambda ui: LogsController(ui, svc)),
-        }
+        def _fabrica(pacote, nome_ui, nome_controller, usa_rt):
+            def _criar():
+                ui_mod = import_module(f"telas.{pacote}.{pacote}_ui")
+                ctrl_mod = import_module(f"telas.{pacote}.{pacote}_controller")
+                pagina_ui = getattr(ui_mod, nome_ui)()
+                extra = (rt,) if usa_rt else ()
+                controller = getattr(ctrl_mod, nome_controller)(pagina_ui, svc, *extra)
+                return pagina_ui, controller
 
-        self._controllers = {}
+            return _criar
+
+        # Só guarda as fábricas: cada página nasce na primeira visita,
+        # então a abertura paga apenas pelo dashboard
+        self._fabricas = {p: _fabrica(*d) for p, d in _PAGINAS.items()}
 
-        for id_pagina, (UIClass, factory) in paginas.items():
-            pagina_ui = UIClass()
-            controller = factory(pagina_ui)
-            self._controllers[id_pagina] = controller
-            self.ui.area_conteudo.addWidget(pagina_ui)
-            self._paginas[id_pagina] = pagina_ui
+    def _criar_pagina(self, id_pagina: str):
+        if id_pagina in self._paginas or id_pagina not in self._fabricas:
+            return
+        # O store (nomes de planos etc.) só serve às outras telas
+        if id_pagina != "dashboard" and not self._store_carregado:
+            self._store_carregado = True
+            self._store.carregar()
+        with trace.medir(f"página {id_pagina}"):
+            pagina_ui, controller = self._fabricas[id_pagina]()
+        self._controllers[id_pagina] = controller
+        self.ui.area_conteudo.addWidget(pagina_ui)
+        self._paginas[id_pagina] = pagina_ui
 
     def _conectar_eventos(self):
         self.ui.btn_fechar.clicked.connect(self._fechar)
@@ -109,8 +152,19 @@ class PrincipalController:
             btn.setChecked(False)
         if id_pagina in self.ui.btns_menu:
             self.ui.btns_menu[id_pagina].setChecked(True)
+        self._criar_pagina(id_pagina)
         if id_pagina in self._paginas:
             self.ui.area_conteudo.setCurrentWidget(self._paginas[id_pagina])
+        self._ajustar_canais(id_pagina)
+
+    def _ajustar_canais(self, id_pagina: str):
+        """Pausa os canais que a página visível não usa e retoma os que usa."""
+        if not self._realtime or id_pagina not in _TABELAS_POR_PAGINA:
+            return
+        ativas = _TABELAS_POR_PAGINA[id_pagina] | _SEMPRE_ATIVAS
+        todas = set(self._realtime._TABELAS)
+        self._realtime.retomar(*(todas & ativas))
+        self._realtime.pausar(*(todas - ativas))
 
     def _toggle_menu(self):
         expandido = self.ui.menu_lateral.width() > 60
@@ -151,6 +205,11 @@ class PrincipalController:
                 from utils.supabase_admin import _logs
 
                 _logs.forcar_salvar()
+            from utils import cache_local
+            from utils.cliente_pool import obter_pool
+
+            cache_local.descarregar()
+            obter_pool().limpar()
         except Exception as e:
             print(f"Erro ao fechar: {e}")
         self.ui.close()
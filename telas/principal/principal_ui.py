@@ -56,6 +56,10 @@ class PrincipalUI(QMainWindow):
         self.lbl_titulo.setObjectName("label_titulo")
         self.lbl_titulo.setStyleSheet("font-size: 14px; font-weight: bold;")
 
+        # Estado da conexão Realtime (texto definido pelo controller)
+        self.lbl_conexao = QLabel("")
+        self.lbl_conexao.setStyleSheet("color: #8899bb; font-size: 11px;")
+
         self.btn_minimizar = QPushButton("─")
         self.btn_minimizar.setObjectName("btn_minimizar")
         self.btn_minimizar.setFixedSize(32, 32)
@@ -73,6 +77,8 @@ class PrincipalUI(QMainWindow):
 
         layout_barra.addWidget(self.lbl_titulo)
         layout_barra.addStretch()
+        layout_barra.addWidget(self.lbl_conexao)
+        layout_barra.addSpacing(12)
         layout_barra.addWidget(self.btn_minimizar)
         layout_barra.addWidget(self.btn_maximizar)
         layout_barra.addWidget(self.btn_fechar)
@@ -220,12 +226,12 @@ class PrincipalUI(QMainWindow):
             }
             QStackedWidget#area_conteudo { background-color: transparent; }
             QLabel { color: #cccccc; }
-            QTableWidget {
+            QTableView {
                 background-color: rgba(15, 26, 61, 0.5);
                 border: 1px solid #2a3f7a; border-radius: 8px;
                 color: white; gridline-color: #1a2854;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: rgba(255, 215, 0, 0.15); color: #FFD700;
             }
             QHeaderView::section {
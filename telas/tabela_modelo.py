@@ -0,0 +1,607 @@
+"""
+Tabelas model/view — modelo por entidade com atualização por linha,
+filtro/ordenação via proxy e botões de ação pintados por delegate.
+"""
+
+from PyQt6.QtWidgets import QTableView, QStyledItemDelegate, QHeaderView
+from PyQt6.QtCore import (
+    Qt,
+    QAbstractTableModel,
+    QModelIndex,
+    QSortFilterProxyModel,
+    QRect,
+    QEvent,
+    QTimer,
+    pyqtSignal,
+)
+from PyQt6.QtGui import QColor, QBrush, QFont, QFontMetrics, QPainter
+
+PAPEL_LINHA = Qt.ItemDataRole.UserRole  # dict da linha
+PAPEL_ORDEM = Qt.ItemDataRole.UserRole + 1  # valor usado na ordenação
+PAPEL_ACOES = Qt.ItemDataRole.UserRole + 2  # [(texto, cor, acao), ...]
+PAPEL_CHAVE = Qt.ItemDataRole.UserRole + 3  # chave da linha no modelo
+
+_COR_DESTAQUE = QColor(255, 215, 0, 45)  # linhas que mudaram ao reconciliar
+_DESTAQUE_MS = 4000
+
+
+def celula(texto, cor=None, ordem=None) -> tuple:
+    """Uma célula formatada: (texto exibido, cor do texto, valor de ordenação)."""
+    texto = str(texto)
+    return (texto, cor, texto if ordem is None else ordem)
+
+
+class ModeloTabela(QAbstractTableModel):
+    """
+    Linhas indexadas por chave. `definir` compara com o conteúdo atual e
+    emite só rowsInserted/rowsRemoved/dataChanged das linhas que mudaram.
+    """
+
+    def __init__(self, titulos: list, parent=None):
+        super().__init__(parent)
+        self._titulos = list(titulos)
+        self._chave = lambda linha: linha.get("id")
+        self._formatar = lambda linha: []
+        self._acoes = None
+        self._linhas: list[dict] = []
+        self._celulas: list[list[tuple]] = []
+        self._botoes: list[list[tuple]] = []
+        self._posicao: dict = {}
+        self._destacadas: set = set()
+        # Paginação sob demanda: a view chama fetchMore ao rolar até o fim
+        self.tem_mais = False
+        self.buscando = False
+        self.pedir_mais = None  # callable sem argumentos
+
+    def configurar(self, chave, formatar, acoes=None):
+        """
+        `formatar(linha)` devolve a lista de células das colunas de dados;
+        com `acoes(linha)`, a última coluna é a de botões.
+        """
+        self.beginResetModel()
+        self._chave = chave
+        self._formatar = formatar
+        self._acoes = acoes
+        self._celulas = [self._formatar(l) for l in self._linhas]
+        self._botoes = [self._calcular_botoes(l) for l in self._linhas]
+        self.endResetModel()
+
+    # ── API Qt ────────────────────────────────────────────────
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._linhas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._titulos)
+
+    def headerData(self, secao, orientacao, papel=Qt.ItemDataRole.DisplayRole):
+        if (
+            orientacao == Qt.Orientation.Horizontal
+            and papel == Qt.ItemDataRole.DisplayRole
+        ):
+            return self._titulos[secao]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return (
+            not parent.isValid()
+            and self.tem_mais
+            and not self.buscando
+            and self.pedir_mais is not None
+        )
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self.buscando = True
+            self.pedir_mais()
+
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def data(self, index, papel=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        r, c = index.row(), index.column()
+        if papel == PAPEL_LINHA:
+            return self._linhas[r]
+        if papel == PAPEL_ACOES:
+            return self._botoes[r]
+        if papel == PAPEL_CHAVE:
+            return self._chave(self._linhas[r])
+        if papel == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        if papel == Qt.ItemDataRole.BackgroundRole:
+            if self._destacadas and self._chave(self._linhas[r]) in self._destacadas:
+                return QBrush(_COR_DESTAQUE)
+            return None
+        celulas = self._celulas[r]
+        if c >= len(celulas):
+            return None
+        texto, cor, ordem = celulas[c]
+        if papel == Qt.ItemDataRole.DisplayRole:
+            return texto
+        if papel == Qt.ItemDataRole.ForegroundRole and cor is not None:
+            return QBrush(QColor(cor))
+        if papel == PAPEL_ORDEM:
+            return ordem
+        return None
+
+    # ── atualização incremental ───────────────────────────────
+
+    def linhas(self) -> list:
+        return list(self._linhas)
+
+    def linha(self, chave) -> dict | None:
+        i = self._posicao.get(chave)
+        return None if i is None else self._linhas[i]
+
+    def definir(self, linhas: list, destacar: bool = False):
+        """
+        Substitui o conteúdo, mexendo só nas linhas que mudaram. Com
+        `destacar`, as linhas novas ou com células diferentes ficam
+        marcadas até `limpar_destaques`.
+        """
+        antes = (
+            {self._chave(l): c for l, c in zip(self._linhas, self._celulas)}
+            if destacar
+            else None
+        )
+        self._definir(linhas)
+        if antes is not None:
+            self._destacadas = {
+                self._chave(l)
+                for l, c in zip(self._linhas, self._celulas)
+                if antes.get(self._chave(l)) != c
+            }
+            for k in self._destacadas:
+                self._avisar_linha(self._posicao[k])
+
+    def limpar_destaques(self):
+        destacadas, self._destacadas = self._destacadas, set()
+        for k in destacadas:
+            if k in self._posicao:
+                self._avisar_linha(self._posicao[k])
+
+    def _definir(self, linhas: list):
+        novas, vistas = [], set()
+        for l in linhas or []:
+            k = self._chave(l)
+            if k not in vistas:
+                vistas.add(k)
+                novas.append(l)
+
+        # 1. remove as que sumiram (de baixo para cima, em blocos contíguos)
+        sumiram = [
+            i for i, l in enumerate(self._linhas) if self._chave(l) not in vistas
+        ]
+        for inicio, fim in reversed(self._blocos(sumiram)):
+            self.beginRemoveRows(QModelIndex(), inicio, fim)
+            del self._linhas[inicio : fim + 1]
+            del self._celulas[inicio : fim + 1]
+            del self._botoes[inicio : fim + 1]
+            self.endRemoveRows()
+        self._reindexar()
+
+        # 2. se a ordem relativa das que ficaram mudou, reset é mais barato
+        atuais = [self._chave(l) for l in self._linhas]
+        presentes = set(atuais)
+        if [self._chave(l) for l in novas if self._chave(l) in presentes] != atuais:
+            self._resetar(novas)
+            return
+
+        # 3. percorre a nova lista inserindo/atualizando na posição certa
+        for i, l in enumerate(novas):
+            k = self._chave(l)
+            if i < len(self._linhas) and self._chave(self._linhas[i]) == k:
+                if self._linhas[i] != l:
+                    self._substituir(i, l)
+            else:
+                self._inserir(i, l)
+        self._reindexar()
+
+    def anexar(self, linhas: list):
+        """Acrescenta uma página no fim, ignorando chaves já presentes."""
+        novas, vistas = [], set(self._posicao)
+        for l in linhas or []:
+            k = self._chave(l)
+            if k not in vistas:
+                vistas.add(k)
+                novas.append(l)
+        if not novas:
+            return
+        inicio = len(self._linhas)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(novas) - 1)
+        self._linhas.extend(novas)
+        self._celulas.extend(self._formatar(l) for l in novas)
+        self._botoes.extend(self._calcular_botoes(l) for l in novas)
+        self.endInsertRows()
+        self._reindexar()
+
+    def upsert(self, linha: dict, no_inicio: bool = True):
+        """Atualiza a linha com a mesma chave ou insere uma nova."""
+        i = self._posicao.get(self._chave(linha))
+        if i is not None:
+            if self._linhas[i] != linha:
+                self._substituir(i, linha)
+            return
+        self._inserir(0 if no_inicio else len(self._linhas), linha)
+        self._reindexar()
+
+    def remover(self, chave):
+        i = self._posicao.get(chave)
+        if i is None:
+            return
+        self.beginRemoveRows(QModelIndex(), i, i)
+        del self._linhas[i], self._celulas[i], self._botoes[i]
+        self.endRemoveRows()
+        self._reindexar()
+
+    def reformatar(self, chaves=None):
+        """
+        Recalcula as células (ex.: dado externo mudou) e avisa só as
+        diferentes. Com `chaves`, só as linhas dessas chaves.
+        """
+        if chaves is None:
+            indices = range(len(self._linhas))
+        else:
+            indices = [self._posicao[k] for k in chaves if k in self._posicao]
+        for i in indices:
+            l = self._linhas[i]
+            celulas, botoes = self._formatar(l), self._calcular_botoes(l)
+            if celulas != self._celulas[i] or botoes != self._botoes[i]:
+                self._celulas[i], self._botoes[i] = celulas, botoes
+                self._avisar_linha(i)
+
+    # ── internos ──────────────────────────────────────────────
+
+    def _calcular_botoes(self, linha) -> list:
+        return self._acoes(linha) if self._acoes else []
+
+    def _substituir(self, i: int, linha: dict):
+        self._linhas[i] = linha
+        self._celulas[i] = self._formatar(linha)
+        self._botoes[i] = self._calcular_botoes(linha)
+        self._avisar_linha(i)
+
+    def _inserir(self, i: int, linha: dict):
+        self.beginInsertRows(QModelIndex(), i, i)
+        self._linhas.insert(i, linha)
+        self._celulas.insert(i, self._formatar(linha))
+        self._botoes.insert(i, self._calcular_botoes(linha))
+        self.endInsertRows()
+
+    def _avisar_linha(self, i: int):
+        self.dataChanged.emit(self.index(i, 0), self.index(i, len(self._titulos) - 1))
+
+    def _resetar(self, linhas: list):
+        self.beginResetModel()
+        self._linhas = list(linhas)
+        self._celulas = [self._formatar(l) for l in self._linhas]
+        self._botoes = [self._calcular_botoes(l) for l in self._linhas]
+        self.endResetModel()
+        self._reindexar()
+
+    def _reindexar(self):
+        self._posicao = {self._chave(l): i for i, l in enumerate(self._linhas)}
+
+    @staticmethod
+    def _blocos(indices: list) -> list:
+        blocos = []
+        for i in indices:
+            if blocos and blocos[-1][1] == i - 1:
+                blocos[-1][1] = i
+            else:
+                blocos.append([i, i])
+        return blocos
+
+
+class FiltroTabela(QSortFilterProxyModel):
+    """Filtro de texto sem diferenciar maiúsculas, só nas colunas escolhidas."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.colunas_filtro = (0,)
+        self.setSortRole(PAPEL_ORDEM)
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+
+    def filterAcceptsRow(self, linha, pai):
+        regex = self.filterRegularExpression()
+        if not regex.pattern():
+            return True
+        modelo = self.sourceModel()
+        for c in self.colunas_filtro:
+            texto = modelo.data(modelo.index(linha, c, pai)) or ""
+            if regex.match(texto).hasMatch():
+                return True
+        return False
+
+
+class AcoesDelegate(QStyledItemDelegate):
+    """
+    Pinta os botões de ação da linha e traduz cliques em `acionado`.
+    Um único delegate por tabela: nenhum widget por linha, geometria dos
+    botões e cores em cache, hover/pressionado rastreados pelo viewport.
+    """
+
+    acionado = pyqtSignal(str, object)  # (acao, chave da linha)
+
+    _ALTURA = 26
+    _ESPACO = 4
+    _MARGEM = 4
+    _PADDING = 8
+
+    def __init__(self, view: QTableView, coluna: int):
+        super().__init__(view)
+        self._view = view
+        self._coluna = coluna
+        self._fonte = QFont()
+        self._fonte.setPixelSize(11)
+        self._metricas = QFontMetrics(self._fonte)
+        self._offsets: dict[tuple, list[tuple[int, int]]] = {}  # textos → [(x, w)]
+        self._cores: dict[str, tuple[QColor, QColor, QColor]] = {}
+        self._hover: tuple[int, int] | None = None  # (linha, botão)
+        self._pressionado: tuple[int, int] | None = None
+        view.setMouseTracking(True)
+        view.viewport().installEventFilter(self)
+
+    # ── geometria ─────────────────────────────────────────────
+
+    def _retangulos(self, area: QRect, botoes: list) -> list:
+        textos = tuple(b[0] for b in botoes)
+        offsets = self._offsets.get(textos)
+        if offsets is None:
+            x, offsets = self._MARGEM, []
+            for texto in textos:
+                largura = self._metricas.horizontalAdvance(texto) + 2 * self._PADDING
+                offsets.append((x, largura))
+                x += largura + self._ESPACO
+            self._offsets[textos] = offsets
+        y = area.top() + (area.height() - self._ALTURA) // 2
+        return [QRect(area.left() + x, y, w, self._ALTURA) for x, w in offsets]
+
+    def _cor(self, cor: str) -> tuple:
+        """(normal, hover, pressionado) — calculadas uma vez por cor."""
+        if cor not in self._cores:
+            base = QColor(cor)
+            self._cores[cor] = (base, base.lighter(115), base.darker(120))
+        return self._cores[cor]
+
+    def _botao_em(self, pos):
+        """(index, i, acao) do botão sob `pos` no viewport, ou None."""
+        index = self._view.indexAt(pos)
+        if not index.isValid() or index.column() != self._coluna:
+            return None
+        botoes = index.data(PAPEL_ACOES) or []
+        rets = self._retangulos(self._view.visualRect(index), botoes)
+        for i, ((_, _, acao), ret) in enumerate(zip(botoes, rets)):
+            if ret.contains(pos):
+                return index, i, acao
+        return None
+
+    # ── pintura ───────────────────────────────────────────────
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        botoes = index.data(PAPEL_ACOES) or []
+        if not botoes:
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setFont(self._fonte)
+        linha = index.row()
+        for i, ((texto, cor, _), ret) in enumerate(
+            zip(botoes, self._retangulos(option.rect, botoes))
+        ):
+            normal, hover, pressionado = self._cor(cor)
+            if self._pressionado == (linha, i):
+                fundo = pressionado
+            elif self._hover == (linha, i):
+                fundo = hover
+            else:
+                fundo = normal
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(fundo)
+            painter.drawRoundedRect(ret, 5, 5)
+            painter.setPen(QColor("white"))
+            painter.drawText(ret, Qt.AlignmentFlag.AlignCenter, texto)
+        painter.restore()
+
+    # ── mouse ─────────────────────────────────────────────────
+
+    def eventFilter(self, obj, evento):
+        tipo = evento.type()
+        if tipo == QEvent.Type.Leave:
+            self._definir_hover(None)
+            self._pressionado = None
+            return False
+        if tipo not in (
+            QEvent.Type.MouseMove,
+            QEvent.Type.MouseButtonPress,
+            QEvent.Type.MouseButtonRelease,
+        ):
+            return False
+
+        alvo = self._botao_em(evento.position().toPoint())
+        self._definir_hover(alvo)
+        if (
+            tipo == QEvent.Type.MouseMove
+            or evento.button() != Qt.MouseButton.LeftButton
+        ):
+            return False
+
+        if tipo == QEvent.Type.MouseButtonPress:
+            if alvo is None:
+                return False
+            self._pressionado = (alvo[0].row(), alvo[1])
+            self._atualizar_celula(alvo[0])
+            return True
+
+        # Release: só dispara se soltou sobre o mesmo botão que foi pressionado
+        pressionado, self._pressionado = self._pressionado, None
+        if pressionado is None:
+            return False
+        if alvo is not None and (alvo[0].row(), alvo[1]) == pressionado:
+            self._atualizar_celula(alvo[0])
+            self.acionado.emit(alvo[2], alvo[0].data(PAPEL_CHAVE))
+        else:
+            self._view.viewport().update()
+        return True
+
+    def _definir_hover(self, alvo):
+        novo = None if alvo is None else (alvo[0].row(), alvo[1])
+        if novo == self._hover:
+            return
+        antigo, self._hover = self._hover, novo
+        viewport = self._view.viewport()
+        if novo is None:
+            viewport.unsetCursor()
+        else:
+            viewport.setCursor(Qt.CursorShape.PointingHandCursor)
+        for par in (antigo, novo):
+            if par is not None:
+                modelo = self._view.model()
+                self._atualizar_celula(modelo.index(par[0], self._coluna))
+
+    def _atualizar_celula(self, index):
+        if index.isValid():
+            self._view.viewport().update(self._view.visualRect(index))
+
+
+class TabelaView(QTableView):
+    """
+    QTableView já ligada a um ModeloTabela + FiltroTabela.
+    Cliques nos botões são despachados pela chave da linha: o handler
+    registrado para a ação recebe a versão atual da linha no modelo.
+    """
+
+    acao_clicada = pyqtSignal(str, dict)  # (acao, linha)
+
+    def __init__(self, titulos: list, parent=None):
+        super().__init__(parent)
+        self.modelo = ModeloTabela(titulos, self)
+        self.proxy = FiltroTabela(self)
+        self.proxy.setSourceModel(self.modelo)
+        self.setModel(self.proxy)
+        self.setSortingEnabled(True)
+        self.sortByColumn(-1, Qt.SortOrder.AscendingOrder)  # ordem do servidor
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.verticalHeader().setDefaultSectionSize(40)
+        self.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
+        self._delegate: AcoesDelegate | None = None
+        self._handlers: dict = {}
+        self._buscar = None  # paginação: buscar(cursor) → {"linhas", "cursor"}
+        self._chave_fetch = ""
+        self._cursor = None
+        self._geracao = 0
+        self._cache = None  # () → chave no cache_local, ou None para não usar
+        self._de_cache = False  # conteúdo atual veio do disco, não do servidor
+
+    def configurar(
+        self, chave, formatar, acoes=None, colunas_filtro=(0,), altura: int = 40
+    ):
+        self.modelo.configurar(chave, formatar, acoes)
+        self.proxy.colunas_filtro = tuple(colunas_filtro)
+        self.verticalHeader().setDefaultSectionSize(altura)
+        if acoes and self._delegate is None:
+            coluna = self.modelo.columnCount() - 1
+            self._delegate = AcoesDelegate(self, coluna)
+            self._delegate.acionado.connect(self._despachar)
+            self.setItemDelegateForColumn(coluna, self._delegate)
+
+    def registrar_acoes(self, handlers: dict):
+        """{acao: fn(linha)} — chamados ao clicar no botão correspondente."""
+        self._handlers.update(handlers)
+
+    def definir_linhas(self, linhas: list, do_cache: bool = False):
+        """
+        `do_cache=True` marca o conteúdo como snapshot do disco; a próxima
+        carga (a do servidor) destaca por alguns segundos as linhas que mudaram.
+        """
+        if do_cache:
+            self.modelo.definir(linhas)
+            self._de_cache = True
+            return
+        destacar, self._de_cache = self._de_cache, False
+        self.modelo.definir(linhas, destacar=destacar)
+        if destacar:
+            QTimer.singleShot(_DESTAQUE_MS, self.modelo.limpar_destaques)
+
+    # ── paginação no servidor ─────────────────────────────────
+
+    def paginar(self, buscar, chave: str, cache=None):
+        """
+        Liga a tabela a uma fonte paginada: `buscar(cursor)` roda fora da
+        thread principal e devolve {"linhas": [...], "cursor": próximo ou
+        None}. A 1ª página vem já; as seguintes quando a rolagem chega ao fim.
+        Com `cache()` devolvendo uma chave, a 1ª página é salva em disco e,
+        com a tabela vazia, exibida de lá enquanto o servidor responde.
+        """
+        self._buscar = buscar
+        self._chave_fetch = chave
+        self._cache = cache
+        self.modelo.pedir_mais = lambda: self._pedir(self._cursor, substituir=False)
+        self.recarregar()
+
+    def recarregar(self):
+        """Volta para a 1ª página (nova busca ou dados mudaram)."""
+        if self._buscar is None:
+            return
+        self._geracao += 1
+        self.modelo.tem_mais = False
+        chave_cache = self._cache() if self._cache else None
+        if chave_cache is None:
+            self._de_cache = False
+        elif not self.modelo.rowCount():
+            from utils import cache_local
+
+            salvo = cache_local.ler(chave_cache)
+            if salvo:
+                self.definir_linhas(salvo, do_cache=True)
+        self._pedir(None, substituir=True, chave_cache=chave_cache)
+
+    def _pedir(self, cursor, substituir: bool, chave_cache=None):
+        from utils.data_service import obter_service
+
+        geracao, buscar = self._geracao, self._buscar
+        self.modelo.buscando = True
+        # Chaves separadas: "mais linhas" não cancela um recarregamento
+        obter_service().fetch(
+            lambda: buscar(cursor),
+            lambda r: self._ao_receber(r, geracao, substituir, chave_cache),
+            chave=self._chave_fetch + ("" if substituir else ":mais"),
+        )
+
+    def _ao_receber(self, resultado, geracao: int, substituir: bool, chave_cache):
+        if geracao != self._geracao:
+            return  # página de uma busca anterior
+        self.modelo.buscando = False
+        if resultado is None:
+            return
+        linhas = resultado.get("linhas") or []
+        if substituir:
+            self.definir_linhas(linhas)
+            if chave_cache:
+                from utils import cache_local
+
+                cache_local.gravar(chave_cache, linhas)
+        else:
+            self.modelo.anexar(linhas)
+        self._cursor = resultado.get("cursor")
+        self.modelo.tem_mais = self._cursor is not None
+
+    def linhas_selecionadas(self) -> list:
+        """Linhas selecionadas (dicts do modelo), na ordem exibida."""
+        indices = sorted(self.selectionModel().selectedRows(), key=lambda i: i.row())
+        return [self.proxy.mapToSource(i).data(PAPEL_LINHA) for i in indices]
+
+    def filtrar(self, texto: str):
+        self.proxy.setFilterFixedString(texto or "")
+
+    def _despachar(self, acao: str, chave):
+        linha = self.modelo.linha(chave)
+        if linha is None:
+            return  # linha sumiu entre o clique e o despacho
+        handler = self._handlers.get(acao)
+        if handler:
+            handler(linha)
+        self.acao_clicada.emit(acao, linha)
@@ -1,13 +1,7 @@
 import threading
-from PyQt6.QtWidgets import (
-    QTableWidgetItem,
-    QWidget,
-    QHBoxLayout,
-    QPushButton,
-    QLabel,
-    QLineEdit,
-)
+from PyQt6.QtWidgets import QLabel, QLineEdit
 from PyQt6.QtCore import Qt, QObject, pyqtSignal
+from telas.tabela_modelo import celula
 from utils.supabase_admin import (
     ativar_usuario,
     desativar_usuario,
@@ -21,12 +15,8 @@ def _criar_usuario_completo(
     username: str, senha: str, plano_id: str, dias: int
 ) -> tuple[bool, str]:
     """Cria usuário e atribui plano em sequência."""
-    from utils.supabase_admin import criar_usuario
-    from supabase import create_client
-    from dotenv import load_dotenv
-    import os
+    from utils.supabase_admin import criar_usuario, _cliente
 
-    load_dotenv()
     ok, resultado = criar_usuario(username, senha)
     if not ok:
         return False, resultado
@@ -34,17 +24,15 @@ def _criar_usuario_completo(
     user_id = resultado
     if plano_id:
         try:
-            cli = create_client(
-                os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_KEY")
-            )
-            cli.rpc(
-                "atribuir_plano",
-                {
-                    "p_user_id": user_id,
-                    "p_plano_id": plano_id,
-                    "p_dias": dias,
-                },
-            ).execute()
+            with _cliente() as cli:
+                cli.rpc(
+                    "atribuir_plano",
+                    {
+                        "p_user_id": user_id,
+                        "p_plano_id": plano_id,
+                        "p_dias": dias,
+                    },
+                ).execute()
         except Exception as e:
             return True, f"Usuário criado mas erro ao atribuir plano: {e}"
     return True, "Usuário criado."
@@ -77,149 +65,248 @@ class UsuariosController:
         self._svc = svc
         self._workers = []
 
-        svc.usuarios_mudou.connect(self._carregar)
-        svc.sessoes_mudou.connect(self._carregar)
+        # Eventos do Realtime corrigem só a linha afetada; um RESYNC ou
+        # evento incompleto no lote é que dispara a recarga (ver _aplicar_lote)
+        svc.lote_mudou.connect(self._aplicar_lote)
 
         self.ui.btn_refresh.clicked.connect(self._carregar)
         self.ui.btn_novo.clicked.connect(self._dialog_novo_usuario)
         self.ui.input_busca.textChanged.connect(self._filtrar)
 
-        self._todos = []
-        self._carregar()
+        self._online: set = set()
+        self._busca = ""
+        self.ui.tabela.configurar(
+            chave=lambda u: u.get("id"),
+            formatar=self._celulas,
+            acoes=self._acoes,
+        )
+        self.ui.tabela.registrar_acoes(
+            {
+                "toggle": lambda u: self._toggle_usuario(
+                    u["id"], u.get("ativo", False)
+                ),
+                "senha": lambda u: self._dialog_resetar_senha(u["id"]),
+                "deletar": lambda u: self._confirmar_deletar(
+                    u["id"], u.get("username", "—")
+                ),
+            }
+        )
+        self.ui.tabela.selectionModel().selectionChanged.connect(self._ao_selecionar)
+        self.ui.btn_ativar_sel.clicked.connect(lambda: self._alterar_selecionados(True))
+        self.ui.btn_desativar_sel.clicked.connect(
+            lambda: self._alterar_selecionados(False)
+        )
+        from utils.supabase_admin import pagina_usuarios
+
+        # Páginas do servidor: a 1ª agora, as demais ao rolar até o fim
+        # Sem busca, a 1ª página fica salva em disco (cache_local) e aparece
+        # já na próxima abertura, antes da resposta do servidor
+        self.ui.tabela.paginar(
+            lambda cursor: pagina_usuarios(self._busca, cursor),
+            "usuarios",
+            cache=lambda: None if self._busca else "usuarios",
+        )
+        self._carregar_sessoes()
 
     def _carregar(self):
-        from utils.supabase_admin import listar_usuarios, listar_sessoes_ativas
+        self.ui.tabela.recarregar()
+        self._carregar_sessoes()
+
+    def _carregar_sessoes(self):
+        from utils.supabase_admin import listar_sessoes_ativas
 
         self._svc.fetch(
-            lambda: {"usuarios": listar_usuarios(), "sessoes": listar_sessoes_ativas()},
-            self._renderizar,
+            listar_sessoes_ativas, self._renderizar_sessoes, chave="usuarios:sessoes"
         )
 
     def _filtrar(self, texto: str):
-        if not self._todos:
-            return
-        filtrados = (
-            [
-                u
-                for u in self._todos
-                if texto.lower() in (u.get("username") or "").lower()
-                or texto.lower() in (u.get("email") or "").lower()
-            ]
-            if texto
-            else self._todos
-        )
-        self._preencher(filtrados, [])
+        # Busca no servidor; pedidos da mesma chave se substituem
+        self._busca = texto
+        self.ui.tabela.recarregar()
 
-    def _renderizar(self, dados):
-        if not dados:
+    def _renderizar_sessoes(self, sessoes):
+        if sessoes is None:
             return
-        usuarios = dados.get("usuarios", [])
-        sessoes = dados.get("sessoes", [])
-        self._todos = usuarios
-        self._preencher(usuarios, sessoes)
-
-    def _preencher(self, usuarios, sessoes):
-        from datetime import datetime, timezone
-
         # sessoes pode ser lista de dicts ou lista de strings (user_id direto)
-        ids_online = set()
-        for s in sessoes or []:
+        online = set()
+        for s in sessoes:
             if isinstance(s, dict):
-                ids_online.add(s.get("user_id"))
+                online.add(s.get("user_id"))
             elif isinstance(s, str):
-                ids_online.add(s)
-
-        tabela = self.ui.tabela
-        tabela.setRowCount(0)
-        for u in usuarios:
-            row = tabela.rowCount()
-            tabela.insertRow(row)
-            uid = u.get("id", "")
-            username = u.get("username", "—")
-            email = u.get("email", "—")
-            ativo = u.get("ativo", False)
-            online = uid in ids_online
-            ass = u.get("assinatura") or {}
-            plano = ass.get("plano_nome", "Sem plano")
-
-            # Expira em
-            expira_txt = "—"
-            if ass.get("expira_em"):
-                try:
-                    dt = datetime.fromisoformat(ass["expira_em"].replace("Z", "+00:00"))
-                    expira_txt = dt.strftime("%d/%m/%Y")
-                except Exception:
-                    pass
-            elif ass.get("plano_id"):
-                expira_txt = "Sem expiração"
-
-            # Cadastro
-            cadastro_txt = "—"
-            if u.get("criado_em"):
-                try:
-                    dt = datetime.fromisoformat(u["criado_em"].replace("Z", "+00:00"))
-                    cadastro_txt = dt.strftime("%d/%m/%Y")
-                except Exception:
-                    pass
-
-            status_txt = (
-                "🟢 Online" if online else ("✅ Ativo" if ativo else "❌ Inativo")
-            )
-            status_item = QTableWidgetItem(status_txt)
-            status_item.setForeground(
-                Qt.GlobalColor.green
-                if online
-                else Qt.GlobalColor.yellow if ativo else Qt.GlobalColor.red
+                online.add(s)
+        if online != self._online:
+            self._online = online
+            self.ui.tabela.modelo.reformatar()
+
+    # ── Deltas do Realtime ─────────────────────────────────────
+
+    def _aplicar_lote(self, tabela: str, payloads: list):
+        """
+        Aplica cada {type, record, old_record} na linha afetada. Se algum
+        vier incompleto, recarrega uma vez só no fim do lote.
+        """
+        from utils.entity_store import chave_linha
+
+        tratar = {
+            "perfis": self._evento_perfil,
+            "assinaturas": self._evento_assinatura,
+            "sessoes_ativas": self._evento_sessao,
+        }.get(tabela)
+        if tratar is None:
+            return
+        incompleto = False
+        for payload in payloads:
+            tipo = payload.get("type")
+            registro = payload.get("old_record" if tipo == "DELETE" else "record") or {}
+            if chave_linha(tabela, registro) is None or not tratar(tipo, registro):
+                incompleto = True
+        if incompleto:
+            print(f"[Usuarios] Evento incompleto em {tabela} — recarregando")
+            # Com a tela oculta a recarga espera e roda uma vez ao voltar
+            self.ui.quando_visivel(
+                self._carregar_sessoes if tabela == "sessoes_ativas" else self._carregar
             )
-            status_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
-            # col 0-5: dados
-            tabela.setItem(row, 0, self._item(username))
-            tabela.setItem(row, 1, self._item(email))
-            tabela.setItem(row, 2, status_item)
-            tabela.setItem(row, 3, self._item(plano))
-            tabela.setItem(row, 4, self._item(expira_txt))
-            tabela.setItem(row, 5, self._item(cadastro_txt))
-
-            # col 6: ações
-            w = QWidget()
-            l = QHBoxLayout(w)
-            l.setContentsMargins(4, 2, 4, 2)
-            l.setSpacing(4)
-
-            def _btn(txt, cor):
-                b = QPushButton(txt)
-                b.setFixedHeight(26)
-                b.setCursor(Qt.CursorShape.PointingHandCursor)
-                b.setStyleSheet(
-                    f"""QPushButton {{
-                    background-color: {cor}; color: white;
-                    border-radius: 5px; font-size: 11px;
-                    border: none; padding: 0 8px;
-                }}"""
-                )
-                return b
 
-            btn_toggle = _btn(
-                "Desativar" if ativo else "Ativar", "#dc2626" if ativo else "#16a34a"
-            )
-            btn_senha = _btn("Senha", "#2563eb")
-            btn_del = _btn("🗑", "#7f1d1d")
+    def _evento_perfil(self, tipo: str, r: dict) -> bool:
+        modelo = self.ui.tabela.modelo
+        if tipo == "DELETE":
+            modelo.remover(r["id"])
+            return True
+        atual = modelo.linha(r["id"])
+        if atual is None:
+            # Fora das páginas carregadas: só um cadastro novo entra (no topo)
+            busca = self._busca.strip().lower()
+            if tipo != "INSERT" or busca not in (r.get("username") or "").lower():
+                return True
+        modelo.upsert({**r, "assinatura": (atual or {}).get("assinatura")})
+        return True
+
+    def _evento_assinatura(self, tipo: str, r: dict) -> bool:
+        from utils.entity_store import obter_store
+
+        modelo = self.ui.tabela.modelo
+        if tipo == "DELETE":
+            # old_record traz só o id: procura o dono entre as linhas carregadas
+            for u in modelo.linhas():
+                if (u.get("assinatura") or {}).get("id") == r["id"]:
+                    modelo.upsert({**u, "assinatura": None})
+            return True
+        u = modelo.linha(r.get("user_id"))
+        if u is None:
+            return True
+        atual = u.get("assinatura") or {}
+        if not r.get("ativo"):
+            if atual.get("id") == r["id"]:
+                modelo.upsert({**u, "assinatura": None})
+            return True
+        plano = obter_store().obter("planos", r.get("plano_id"))
+        if plano is None:
+            return False  # sem o nome do plano não dá para montar a célula
+        ass = {**atual, **r, "plano_nome": plano.get("nome")}
+        modelo.upsert({**u, "assinatura": ass})
+        return True
+
+    def _evento_sessao(self, tipo: str, r: dict) -> bool:
+        uid = r["user_id"]
+        if tipo == "DELETE":
+            self._online.discard(uid)
+        else:
+            self._online.add(uid)
+        self.ui.tabela.modelo.reformatar([uid])
+        return True
+
+    def _celulas(self, u: dict) -> list:
+        from datetime import datetime
+
+        ativo = u.get("ativo", False)
+        online = u.get("id") in self._online
+        ass = u.get("assinatura") or {}
+
+        # Expira em
+        expira_txt, expira_ord = "—", ""
+        if ass.get("expira_em"):
+            try:
+                dt = datetime.fromisoformat(ass["expira_em"].replace("Z", "+00:00"))
+                expira_txt, expira_ord = dt.strftime("%d/%m/%Y"), ass["expira_em"]
+            except Exception:
+                pass
+        elif ass.get("plano_id"):
+            expira_txt, expira_ord = "Sem expiração", "9999"
+
+        # Cadastro
+        cadastro_txt = "—"
+        if u.get("criado_em"):
+            try:
+                dt = datetime.fromisoformat(u["criado_em"].replace("Z", "+00:00"))
+                cadastro_txt = dt.strftime("%d/%m/%Y")
+            except Exception:
+                pass
+
+        status_txt = "🟢 Online" if online else ("✅ Ativo" if ativo else "❌ Inativo")
+        status_cor = (
+            Qt.GlobalColor.green
+            if online
+            else Qt.GlobalColor.yellow if ativo else Qt.GlobalColor.red
+        )
+        return [
+            celula(u.get("username", "—")),
+            celula(u.get("email", "—")),
+            celula(status_txt, status_cor),
+            celula(ass.get("plano_nome", "Sem plano")),
+            celula(expira_txt, ordem=expira_ord),
+            celula(cadastro_txt, ordem=u.get("criado_em") or ""),
+        ]
+
+    @staticmethod
+    def _acoes(u: dict) -> list:
+        ativo = u.get("ativo", False)
+        return [
+            (
+                "Desativar" if ativo else "Ativar",
+                "#dc2626" if ativo else "#16a34a",
+                "toggle",
+            ),
+            ("Senha", "#2563eb", "senha"),
+            ("🗑", "#7f1d1d", "deletar"),
+        ]
+
+    # ── Ações em lote ──────────────────────────────────────────
+
+    def _ao_selecionar(self, *_):
+        n = len(self.ui.tabela.linhas_selecionadas())
+        self.ui.lbl_selecao.setText(f"{n} selecionados" if n > 1 else "")
+        self.ui.btn_ativar_sel.setEnabled(n > 0)
+        self.ui.btn_desativar_sel.setEnabled(n > 0)
+
+    def _alterar_selecionados(self, ativo: bool):
+        from telas.dialogs import DialogConfirmacao
+        from utils.supabase_admin import definir_usuarios_ativos
+
+        linhas = [
+            u
+            for u in self.ui.tabela.linhas_selecionadas()
+            if bool(u.get("ativo")) != ativo
+        ]
+        if not linhas:
+            return
+        verbo = "Ativar" if ativo else "Desativar"
+        if not DialogConfirmacao(
+            f"{verbo} {len(linhas)} usuários selecionados?", parent=self.ui
+        ).exec():
+            return
+        self.ui.btn_ativar_sel.setEnabled(False)
+        self.ui.btn_desativar_sel.setEnabled(False)
+        self.ui.lbl_selecao.setText(f"{verbo[:-1]}ndo {len(linhas)}...")
+        self._svc.fetch(
+            lambda: definir_usuarios_ativos(linhas, ativo), self._ao_concluir_lote
+        )
 
-            btn_toggle.clicked.connect(
-                lambda _, i=uid, a=ativo: self._toggle_usuario(i, a)
-            )
-            btn_senha.clicked.connect(lambda _, i=uid: self._dialog_resetar_senha(i))
-            btn_del.clicked.connect(
-                lambda _, i=uid, n=username: self._confirmar_deletar(i, n)
-            )
+    def _ao_concluir_lote(self, resultados):
+        from utils.supabase_admin import resumo_lote
 
-            l.addWidget(btn_toggle)
-            l.addWidget(btn_senha)
-            l.addWidget(btn_del)
-            l.addStretch()
-            tabela.setCellWidget(row, 6, w)
-            tabela.setRowHeight(row, 40)
+        _, msg = resumo_lote(resultados or {})
+        self._ao_selecionar()
+        self.ui.lbl_selecao.setText(msg)
 
     def _toggle_usuario(self, uid: str, ativo: bool):
         from utils.supabase_admin import desativar_usuario
@@ -270,10 +357,24 @@ class UsuariosController:
         dialog.exec()
 
     def _dialog_novo_usuario(self):
-        from telas.dialogs import DialogBase
         from utils.supabase_admin import listar_planos
+
+        # Planos vêm fora da GUI (em geral do cache de referência);
+        # com cliques repetidos só o pedido mais recente abre o dialog
+        self._svc.cancelar("usuarios:dialog_novo")
+        self._svc.fetch(
+            listar_planos,
+            lambda planos: self._abrir_dialog_novo_usuario(planos or []),
+            chave="usuarios:dialog_novo",
+        )
+
+    def _abrir_dialog_novo_usuario(self, planos):
+        from telas.dialogs import DialogBase
         import os
 
+        if not self.ui.isVisible():
+            return  # o usuário saiu da tela antes de os planos chegarem
+
         BASICO_ID = os.getenv("PLANO_BASICO_ID", "11111111-1111-1111-1111-111111111111")
         dialog = DialogBase("➕  Novo Usuário", parent=self.ui)
 
@@ -302,7 +403,7 @@ class UsuariosController:
             QComboBox::drop-down { border: none; }
             QComboBox QAbstractItemView { background-color: #1a2854; color: white; border: 1px solid #FFD700; }"""
         )
-        for p in listar_planos():
+        for p in planos:
             if p["id"] != BASICO_ID:
                 combo.addItem(p["nome"], p["id"])
         lbl_dias = QLabel("Dias (0 = sem expiração):")
@@ -351,12 +452,7 @@ class UsuariosController:
         if DialogConfirmacao(
             f"Deletar usuário '{username}'? Esta ação é irreversível.", parent=self.ui
         ).exec():
-            w = UsuarioWorker(deletar_usuario, uid)
+            w = UsuarioWorker(deletar_usuario, uid, username)
             self._workers.append(w)
             w.sucesso.connect(lambda: self._workers.clear())
             w.executar()
-
-    def _item(self, texto):
-        item = QTableWidgetItem(str(texto))
-        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        return item
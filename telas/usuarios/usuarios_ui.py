@@ -1,4 +1,4 @@
-from PyQt6.QtWidgets import QHBoxLayout, QVBoxLayout, QFrame
+from PyQt6.QtWidgets import QHBoxLayout, QVBoxLayout, QFrame, QLabel
 from telas.base import TelaBase
 
 
@@ -18,7 +18,17 @@ class UsuariosUI(TelaBase):
         self.btn_refresh = self._criar_btn_acao("🔄", "#2a3f7a", "#FFD700")
         self.btn_refresh.setFixedWidth(40)
 
+        # Ações em lote sobre as linhas selecionadas
+        self.lbl_selecao       = QLabel("")
+        self.btn_ativar_sel    = self._criar_btn_acao("✅  Ativar", "#16a34a", "white")
+        self.btn_desativar_sel = self._criar_btn_acao("⛔  Desativar", "#dc2626", "white")
+        self.btn_ativar_sel.setEnabled(False)
+        self.btn_desativar_sel.setEnabled(False)
+
         layout_acoes.addWidget(self.input_busca)
+        layout_acoes.addWidget(self.lbl_selecao)
+        layout_acoes.addWidget(self.btn_ativar_sel)
+        layout_acoes.addWidget(self.btn_desativar_sel)
         layout_acoes.addWidget(self.btn_novo)
         layout_acoes.addWidget(self.btn_refresh)
 
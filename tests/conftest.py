@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# logs_manager, cache_local e o diário de aprovações gravam em LOCALAPPDATA
+# já no import: os testes usam uma pasta própria, nunca a do usuário
+os.environ["LOCALAPPDATA"] = tempfile.mkdtemp(prefix="rcc-testes-")
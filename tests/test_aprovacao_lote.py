@@ -0,0 +1,144 @@
+"""
+aprovar_solicitacoes: só solicitações pendentes e retomada pelo diário
+depois de um fechamento entre criar o usuário no Auth e anotá-lo.
+"""
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from utils import supabase_admin
+
+
+class _Consulta:
+    """Builder do PostgREST sobre listas em memória (só o que o lote usa)."""
+
+    def __init__(self, banco, tabela):
+        self._banco = banco
+        self._tabela = tabela
+        self._filtros = []
+        self._mudanca = None
+
+    def select(self, *_a, **_kw):
+        return self
+
+    def update(self, valores):
+        self._mudanca = valores
+        return self
+
+    def upsert(self, linhas, **_kw):
+        for nova in linhas:
+            atual = next(
+                (l for l in self._banco[self._tabela] if l["id"] == nova["id"]), None
+            )
+            if atual is None:
+                self._banco[self._tabela].append(dict(nova))
+            else:
+                atual.update(nova)
+        return self
+
+    def in_(self, coluna, valores):
+        self._filtros.append(lambda l: l.get(coluna) in valores)
+        return self
+
+    def eq(self, coluna, valor):
+        self._filtros.append(lambda l: l.get(coluna) == valor)
+        return self
+
+    def execute(self):
+        linhas = [
+            l for l in self._banco[self._tabela] if all(f(l) for f in self._filtros)
+        ]
+        if self._mudanca is not None:
+            for l in linhas:
+                l.update(self._mudanca)
+        return SimpleNamespace(data=[dict(l) for l in linhas])
+
+
+class _Auth:
+    def __init__(self):
+        self.usuarios = {}  # email → id
+        self.criacoes = 0
+
+    def create_user(self, dados):
+        self.criacoes += 1
+        if dados["email"] in self.usuarios:
+            raise Exception("A user with this email address has already been registered")
+        self.usuarios[dados["email"]] = f"u{len(self.usuarios) + 1}"
+        return SimpleNamespace(user=SimpleNamespace(id=self.usuarios[dados["email"]]))
+
+    def list_users(self, page=1, per_page=50):
+        todos = [SimpleNamespace(email=e, id=i) for e, i in self.usuarios.items()]
+        return todos[(page - 1) * per_page : page * per_page]
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    banco = {
+        "solicitacoes": [
+            {"id": "s1", "username": "Fulano", "senha_real": "x", "status": "pendente"}
+        ],
+        "perfis": [],
+    }
+    auth = _Auth()
+    cli = SimpleNamespace(
+        table=lambda nome: _Consulta(banco, nome),
+        auth=SimpleNamespace(admin=auth),
+    )
+
+    @contextmanager
+    def _cliente():
+        yield cli
+
+    monkeypatch.setattr(supabase_admin, "_cliente", _cliente)
+    monkeypatch.setattr(
+        supabase_admin, "_DIARIO_APROVACOES", tmp_path / "aprovacoes.json"
+    )
+    banco["auth"] = auth
+    return banco
+
+
+def test_aprova_e_limpa_o_diario(banco):
+    r = supabase_admin.aprovar_solicitacoes([{"id": "s1", "username": "Fulano"}])
+
+    assert r == {"s1": (True, "Aprovado.")}
+    assert banco["solicitacoes"][0]["status"] == "aprovado"
+    assert banco["perfis"] == [{"id": "u1", "username": "fulano"}]
+    assert supabase_admin.aprovacoes_interrompidas() == []
+
+
+def test_retoma_usuario_criado_antes_de_anotar(banco):
+    # Execução anterior: criou no Auth e fechou antes de gravar o user_id
+    banco["auth"].usuarios["fulano@rcc.app"] = "u9"
+    supabase_admin._gravar_diario({"s1": {"username": "fulano", "criando": True}})
+
+    r = supabase_admin.aprovar_solicitacoes(
+        supabase_admin.aprovacoes_interrompidas()
+    )
+
+    assert r == {"s1": (True, "Aprovado.")}
+    assert banco["perfis"] == [{"id": "u9", "username": "fulano"}]
+    assert banco["solicitacoes"][0]["status"] == "aprovado"
+    assert supabase_admin.aprovacoes_interrompidas() == []
+
+
+def test_username_de_outra_pessoa_continua_erro(banco):
+    banco["auth"].usuarios["fulano@rcc.app"] = "u9"
+
+    r = supabase_admin.aprovar_solicitacoes([{"id": "s1", "username": "Fulano"}])
+
+    assert r == {"s1": (False, "Username já está em uso.")}
+    assert banco["perfis"] == []
+    assert banco["solicitacoes"][0]["status"] == "pendente"
+    assert supabase_admin.aprovacoes_interrompidas() == []
+
+
+def test_solicitacao_ja_decidida_nao_cria_usuario(banco):
+    banco["solicitacoes"][0]["status"] = "rejeitado"
+
+    r = supabase_admin.aprovar_solicitacoes([{"id": "s1", "username": "Fulano"}])
+
+    assert r["s1"][0] is False
+    assert banco["auth"].criacoes == 0
+    assert banco["solicitacoes"][0]["status"] == "rejeitado"
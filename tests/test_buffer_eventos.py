@@ -0,0 +1,65 @@
+"""_BufferEventos: coalescência por chave primária e transbordo em RESYNC."""
+
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from utils.admin_realtime import _BufferEventos  # noqa: E402
+
+
+def _evento(tipo, id_, **campos):
+    linha = {"id": id_, **campos}
+    if tipo == "DELETE":
+        return {"type": tipo, "record": {}, "old_record": {"id": id_}}
+    return {"type": tipo, "record": linha, "old_record": {}}
+
+
+def test_ultimo_evento_da_linha_vence():
+    buffer = _BufferEventos(["planos"], limite=10)
+
+    assert buffer.adicionar("planos", _evento("UPDATE", 1, nome="a")) is True
+    assert buffer.adicionar("planos", _evento("UPDATE", 2, nome="b")) is False
+    buffer.adicionar("planos", _evento("UPDATE", 1, nome="c"))
+
+    lote = buffer.retirar("planos")
+    assert [(p["record"]["id"], p["record"]["nome"]) for p in lote] == [
+        (2, "b"),
+        (1, "c"),
+    ]
+    assert buffer.metricas()["coalescidos"] == 1
+    assert buffer.retirar("planos") == []
+
+
+def test_insert_seguido_de_update_continua_insert_e_de_delete_some():
+    buffer = _BufferEventos(["planos"], limite=10)
+    buffer.adicionar("planos", _evento("INSERT", 1, nome="a"))
+    buffer.adicionar("planos", _evento("UPDATE", 1, nome="b"))
+    buffer.adicionar("planos", _evento("INSERT", 2))
+    buffer.adicionar("planos", _evento("DELETE", 2))
+
+    lote = buffer.retirar("planos")
+    assert len(lote) == 1
+    assert lote[0]["type"] == "INSERT" and lote[0]["record"]["nome"] == "b"
+
+
+def test_transbordo_vira_um_unico_resync():
+    buffer = _BufferEventos(["planos", "modulos"], limite=3)
+    for i in range(4):
+        buffer.adicionar("planos", _evento("UPDATE", i))
+    buffer.adicionar("planos", _evento("UPDATE", 99))  # descartado
+    buffer.adicionar("modulos", _evento("UPDATE", 1))
+
+    assert [p["type"] for p in buffer.retirar("planos")] == ["RESYNC"]
+    assert len(buffer.retirar("modulos")) == 1  # outras tabelas não sofrem
+    assert buffer.metricas()["descartados"] == 5
+
+
+def test_resync_nao_pisa_evento_ao_vivo():
+    buffer = _BufferEventos(["planos"], limite=10)
+    buffer.rastrear_ao_vivo(True)
+    buffer.adicionar("planos", _evento("UPDATE", 1, nome="ao vivo"))
+    buffer.adicionar("planos", _evento("UPDATE", 1, nome="consulta"), resync=True)
+    buffer.adicionar("planos", _evento("UPDATE", 2, nome="consulta"), resync=True)
+
+    lote = {p["record"]["id"]: p["record"]["nome"] for p in buffer.retirar("planos")}
+    assert lote == {1: "ao vivo", 2: "consulta"}
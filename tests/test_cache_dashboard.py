@@ -0,0 +1,113 @@
+"""
+O snapshot do dashboard vai para o cache em disco: senha_real das
+solicitações não pode chegar lá, venha da RPC ou das consultas paralelas.
+"""
+
+import json
+from contextlib import contextmanager
+
+import pytest
+
+from utils import cache_local, supabase_admin
+
+_SOLICITACAO = {
+    "id": "s1",
+    "username": "fulano",
+    "status": "pendente",
+    "criado_em": "2026-10-01T12:00:00+00:00",
+    "senha_real": "segredo123",
+}
+
+
+class _Resposta:
+    def __init__(self, data):
+        self.data = data
+        self.count = 0
+
+
+class _Consulta:
+    """Imita o builder do PostgREST: respeita o select(), ignora filtros."""
+
+    def __init__(self, linhas):
+        self._linhas = linhas
+        self._colunas = "*"
+
+    def select(self, colunas="*", **_):
+        self._colunas = colunas
+        return self
+
+    def __getattr__(self, _nome):
+        return lambda *a, **kw: self
+
+    def execute(self):
+        if self._colunas == "*":
+            return _Resposta([dict(l) for l in self._linhas])
+        campos = self._colunas.split(",")
+        return _Resposta([{c: l[c] for c in campos if c in l} for l in self._linhas])
+
+
+class _Chamada:
+    def __init__(self, data):
+        self._data = data
+
+    def execute(self):
+        return _Resposta(self._data)
+
+
+class _Cliente:
+    def __init__(self, rpc):
+        self._rpc = rpc
+
+    def table(self, _nome):
+        return _Consulta([_SOLICITACAO])
+
+    def rpc(self, _nome, _params):
+        return self._rpc()
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
+    monkeypatch.setattr(supabase_admin, "_consultas_resumo", dict)
+    monkeypatch.setattr(supabase_admin, "listar_expirando", lambda dias=7: [])
+    monkeypatch.setattr(supabase_admin, "_rpc_snapshot_ausente_ate", 0.0)
+    return tmp_path
+
+
+def _usar_cliente(monkeypatch, rpc):
+    @contextmanager
+    def _cliente():
+        yield _Cliente(rpc)
+
+    monkeypatch.setattr(supabase_admin, "_cliente", _cliente)
+
+
+def _gravado_em_disco() -> str:
+    cache_local.gravar("dashboard", supabase_admin.snapshot_dashboard())
+    cache_local.descarregar()
+    return cache_local._arquivo("dashboard").read_text(encoding="utf-8")
+
+
+def test_snapshot_da_rpc_nao_grava_senha(cache, monkeypatch):
+    resposta = {"resumo": {}, "solicitacoes": [_SOLICITACAO], "expirando": []}
+    _usar_cliente(monkeypatch, lambda: _Chamada(resposta))
+
+    conteudo = _gravado_em_disco()
+
+    assert "senha_real" not in conteudo
+    assert json.loads(conteudo)["dados"]["solicitacoes"][0]["username"] == "fulano"
+
+
+def test_snapshot_sem_rpc_nao_grava_senha(cache, monkeypatch):
+    class _Ausente(Exception):
+        code = "PGRST202"
+
+    def _rpc():
+        raise _Ausente("função não encontrada")
+
+    _usar_cliente(monkeypatch, _rpc)
+
+    conteudo = _gravado_em_disco()
+
+    assert "senha_real" not in conteudo
+    assert json.loads(conteudo)["dados"]["solicitacoes"][0]["username"] == "fulano"
@@ -0,0 +1,100 @@
+"""_CacheTTL: acerto no TTL, stale-while-revalidate, invalidação e erros."""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from utils import supabase_admin
+from utils.supabase_admin import _CacheTTL
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(
+        supabase_admin, "time", SimpleNamespace(monotonic=lambda: agora[0])
+    )
+    return agora
+
+
+class _Fonte:
+    """Devolve [n] na n-ésima busca; com `liberar`, a busca espera o evento."""
+
+    def __init__(self):
+        self.buscas = 0
+        self.liberar = None
+        self.erro = None
+
+    def __call__(self):
+        if self.liberar is not None:
+            self.liberar.wait(5)
+        if self.erro is not None:
+            raise self.erro
+        self.buscas += 1
+        return [self.buscas]
+
+
+def _esperar_revalidacao(nome):
+    for t in threading.enumerate():
+        if t.name == f"Revalidar-{nome}":
+            t.join(5)
+
+
+def test_dentro_do_ttl_serve_da_memoria(relogio):
+    fonte = _Fonte()
+    cache = _CacheTTL("teste", fonte, ttl=60)
+
+    assert cache.obter() == [1]
+    relogio[0] += 59
+    assert cache.obter() == [1]
+    assert fonte.buscas == 1
+    assert cache.stats["faltas"] == 1 and cache.stats["acertos"] == 1
+
+
+def test_vencido_serve_o_antigo_e_revalida_uma_vez(relogio):
+    fonte = _Fonte()
+    cache = _CacheTTL("vencido", fonte, ttl=60)
+    cache.obter()
+    relogio[0] += 61
+    fonte.liberar = threading.Event()
+
+    # Enquanto a revalidação não termina, todos recebem o valor velho
+    assert cache.obter() == [1]
+    assert cache.obter() == [1]
+    fonte.liberar.set()
+    _esperar_revalidacao("vencido")
+
+    assert cache.obter() == [2]
+    assert fonte.buscas == 2
+    assert cache.stats["velhos"] == 2 and cache.stats["revalidacoes"] == 1
+
+
+def test_revalidacao_antiga_nao_grava_depois_de_invalidar(relogio):
+    fonte = _Fonte()
+    cache = _CacheTTL("invalidado", fonte, ttl=60)
+    cache.obter()
+    relogio[0] += 61
+    fonte.liberar = threading.Event()
+    cache.obter()  # dispara a revalidação, que fica presa
+    cache.invalidar()
+    fonte.liberar.set()
+    _esperar_revalidacao("invalidado")
+
+    # A busca de antes da invalidação não conta: quem pede busca de novo
+    assert cache.obter() == [3]
+    assert fonte.buscas == 3
+
+
+def test_erro_mantem_o_ultimo_valor_bom(relogio):
+    fonte = _Fonte()
+    cache = _CacheTTL("erro", fonte, ttl=60)
+    cache.obter()
+    fonte.erro = RuntimeError("offline")
+
+    assert cache.obter(fresco=True) == [1]
+    assert cache.stats["erros"] == 1
+
+    cache.invalidar()
+    with pytest.raises(RuntimeError):
+        cache.obter()
@@ -0,0 +1,127 @@
+"""PoolClientes: reuso, descarte por idade/ociosidade/erro e pool esgotado."""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from utils import cliente_pool
+from utils.cliente_pool import PoolClientes, PoolEsgotado
+
+
+class _Pool(PoolClientes):
+    """Cria objetos simples no lugar de clientes Supabase e anota os fechados."""
+
+    def __init__(self, **kw):
+        super().__init__("http://teste", "chave", **kw)
+        self.fechados = []
+
+    def _criar(self):
+        return object()
+
+    def _fechar(self, cli):
+        self.fechados.append(cli)
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(cliente_pool, "time", SimpleNamespace(monotonic=lambda: agora[0]))
+    return agora
+
+
+def test_reusa_o_cliente_devolvido():
+    pool = _Pool()
+    with pool.cliente() as a:
+        pass
+    with pool.cliente() as b:
+        pass
+
+    assert a is b
+    assert pool.stats["criados"] == 1 and pool.stats["reusos"] == 1
+
+
+def test_descarta_cliente_ocioso_ou_velho(relogio):
+    pool = _Pool(idade_max=900, ocioso_max=120)
+    with pool.cliente() as a:
+        pass
+    relogio[0] += 121  # ocioso demais
+    with pool.cliente() as b:
+        pass
+    for _ in range(10):  # em uso sempre, mas velho demais
+        relogio[0] += 100
+        with pool.cliente() as c:
+            pass
+
+    assert b is not a and c is not b
+    assert pool.fechados == [a, b]
+    assert pool.stats["descartados"] == 2
+
+
+def test_descarta_cliente_com_erro_de_transporte():
+    httpx = pytest.importorskip("httpx")
+    pool = _Pool()
+    with pytest.raises(httpx.ConnectError):
+        with pool.cliente() as a:
+            raise httpx.ConnectError("caiu")
+    with pool.cliente() as b:
+        pass
+
+    assert b is not a
+    assert pool.fechados == [a]
+
+
+def test_erro_da_aplicacao_nao_descarta():
+    pool = _Pool()
+    with pytest.raises(ValueError):
+        with pool.cliente() as a:
+            raise ValueError("consulta inválida")
+    with pool.cliente() as b:
+        pass
+
+    assert b is a
+    assert pool.fechados == []
+
+
+def test_pool_esgotado_desiste_no_prazo():
+    pool = _Pool(tamanho=1, espera_max=0.05)
+    with pool.cliente():
+        with pytest.raises(PoolEsgotado):
+            with pool.cliente():
+                pass
+
+    assert pool.stats["esgotado"] == 1
+    with pool.cliente():  # o cliente devolvido volta a servir
+        pass
+
+
+def test_espera_cliente_devolvido_dentro_do_prazo():
+    pool = _Pool(tamanho=1, espera_max=5)
+    emprestado, liberar = threading.Event(), threading.Event()
+
+    def _segurar():
+        with pool.cliente():
+            emprestado.set()
+            liberar.wait(5)
+
+    t = threading.Thread(target=_segurar)
+    t.start()
+    emprestado.wait(5)
+    threading.Timer(0.05, liberar.set).start()
+    with pool.cliente():
+        pass
+    t.join()
+
+    assert pool.stats["criados"] == 1 and pool.stats["esgotado"] == 0
+
+
+def test_consulta_aninhada_roda_na_mesma_thread():
+    from utils.cliente_pool import submeter_consulta
+
+    def _externa():
+        interna = submeter_consulta(lambda: threading.current_thread().name)
+        return threading.current_thread().name, interna.result(timeout=5)
+
+    externa, interna = submeter_consulta(_externa).result(timeout=5)
+
+    assert externa.startswith("Consulta") and interna == externa
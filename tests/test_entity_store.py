@@ -0,0 +1,62 @@
+"""EntityStore.aplicar: deltas na cópia local e lacunas que pedem resync."""
+
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from utils.entity_store import EntityStore  # noqa: E402
+
+
+@pytest.fixture
+def store(monkeypatch):
+    s = EntityStore(svc=None)
+    s.resyncs = []
+    monkeypatch.setattr(s, "_agendar_resync", lambda *t: s.resyncs.extend(t))
+    s._ao_carregar({"planos": [{"id": 1, "nome": "Básico"}]})
+    return s
+
+
+def test_insert_update_e_delete_alteram_o_indice(store):
+    assert store.aplicar("planos", {"type": "INSERT", "record": {"id": 2}}) == (2,)
+    store.aplicar("planos", {"type": "UPDATE", "record": {"id": 1, "nome": "Pro"}})
+    store.aplicar("planos", {"type": "DELETE", "old_record": {"id": 2}})
+
+    assert store.obter("planos", 1)["nome"] == "Pro"
+    assert store.obter("planos", 2) is None
+    assert store.resyncs == []
+
+
+def test_update_de_linha_desconhecida_e_lacuna(store):
+    chave = store.aplicar("planos", {"type": "UPDATE", "record": {"id": 7}})
+
+    assert chave == (7,) and store.obter("planos", 7) == {"id": 7}
+    assert store.resyncs == ["planos"]
+
+
+def test_payload_sem_chave_e_resync_agendam_recarga(store):
+    assert store.aplicar("planos", {"type": "INSERT", "record": {"nome": "x"}}) is None
+    assert store.aplicar("planos", {"type": "DELETE", "old_record": {}}) is None
+    assert store.aplicar("planos", {"type": "RESYNC"}) is None
+
+    assert store.resyncs == ["planos"] * 3
+
+
+def test_tabela_nao_carregada_e_ignorada(store):
+    assert store.aplicar("perfis", {"type": "UPDATE", "record": {"id": "u1"}}) is None
+    assert store.linhas("perfis") == [] and store.resyncs == []
+
+
+def test_lote_avisa_uma_vez_com_as_chaves(store):
+    avisos = []
+    store.linhas_mudaram.connect(lambda t, chaves: avisos.append((t, chaves)))
+
+    store.aplicar_lote(
+        "planos",
+        [
+            {"type": "INSERT", "record": {"id": 2}},
+            {"type": "RESYNC"},
+            {"type": "UPDATE", "record": {"id": 1}},
+        ],
+    )
+
+    assert avisos == [("planos", [(2,), (1,)])]
@@ -0,0 +1,113 @@
+"""GerenciadorLogs: consultas filtradas/paginadas e retenção do SQLite."""
+
+from datetime import timedelta
+
+import pytest
+
+from utils import logs_manager
+
+
+@pytest.fixture
+def logs(tmp_path, monkeypatch):
+    monkeypatch.setattr(logs_manager, "LOGS_DIR", tmp_path)
+    monkeypatch.setattr(logs_manager, "LOGS_DB", tmp_path / "admin_logs.db")
+    monkeypatch.setattr(logs_manager, "LOGS_FILE", tmp_path / "admin_logs.json")
+    monkeypatch.setattr(logs_manager, "SEGMENTO_ATIVO", tmp_path / "admin_logs.jsonl")
+    return logs_manager.GerenciadorLogs()
+
+
+def _inserir(logs, *entradas):
+    with logs._conexao() as conn:
+        logs._inserir(conn, entradas)
+
+
+def _dias_atras(dias: int) -> str:
+    return (logs_manager._agora() - timedelta(days=dias)).isoformat()
+
+
+def test_limpar_apaga_o_que_passou_da_retencao(logs):
+    _inserir(
+        logs,
+        {"criado_em": _dias_atras(400), "acao": "criar_usuario", "detalhes": "velho"},
+        {"criado_em": _dias_atras(1), "acao": "criar_usuario", "detalhes": "novo"},
+    )
+
+    logs.limpar(retencao_dias=365)
+
+    assert [l["detalhes"] for l in logs.consultar()] == ["novo"]
+    # O trigger tira a linha apagada do índice FTS
+    assert logs.consultar(texto="velho") == []
+
+
+def test_limpar_mantem_so_as_mais_recentes(logs):
+    _inserir(
+        logs,
+        *(
+            {"criado_em": _dias_atras(1), "acao": "a", "detalhes": f"e{i}"}
+            for i in range(10)
+        ),
+    )
+
+    logs.limpar(maximo=3)
+
+    assert [l["detalhes"] for l in logs.consultar()] == ["e9", "e8", "e7"]
+
+
+def _exemplos(logs):
+    _inserir(
+        logs,
+        {"criado_em": "2026-10-01T09:00:00+00:00", "acao": "criar_usuario",
+         "username": "ana", "detalhes": "Usuário 'joao' criado"},
+        {"criado_em": "2026-10-01T23:30:00+00:00", "acao": "deletar_usuario",
+         "username": "ana", "detalhes": "Usuário 'maria' deletado"},
+        {"criado_em": "2026-10-02T08:00:00+00:00", "acao": "criar_usuario",
+         "username": "bruno", "detalhes": "Usuário 'pedro' criado"},
+    )
+
+
+def test_consultar_filtra_por_acao_usuario_e_periodo(logs):
+    _exemplos(logs)
+
+    def detalhes(**filtros):
+        return [l["detalhes"] for l in logs.consultar(**filtros)]
+
+    assert detalhes(acao="criar_usuario") == [
+        "Usuário 'pedro' criado",
+        "Usuário 'joao' criado",
+    ]
+    assert detalhes(username="bruno") == ["Usuário 'pedro' criado"]
+    # `ate` com o dia seguinte pega o dia 01 inteiro (como a tela envia)
+    assert len(detalhes(desde="2026-10-01", ate="2026-10-02")) == 2
+    assert detalhes(desde="2026-10-02") == ["Usuário 'pedro' criado"]
+    assert detalhes(acao="criar_usuario", username="ana") == [
+        "Usuário 'joao' criado"
+    ]
+
+
+def test_consultar_texto_por_prefixo_e_sem_acento(logs):
+    if not logs._fts:
+        pytest.skip("SQLite sem FTS5")
+    _exemplos(logs)
+
+    assert [l["detalhes"] for l in logs.consultar(texto="mar usuario")] == [
+        "Usuário 'maria' deletado"
+    ]
+
+
+def test_consultar_pagina_por_id(logs):
+    _exemplos(logs)
+
+    primeira = logs.consultar(limite=2)
+    resto = logs.consultar(antes_de=primeira[-1]["id"], limite=2)
+
+    assert [l["id"] for l in primeira + resto] == sorted(
+        (l["id"] for l in logs.consultar()), reverse=True
+    )
+    assert len(resto) == 1
+
+
+def test_valores_dos_filtros(logs):
+    _exemplos(logs)
+
+    assert logs.acoes() == ["criar_usuario", "deletar_usuario"]
+    assert logs.usuarios() == ["ana", "bruno"]
@@ -0,0 +1,67 @@
+"""_pagina_keyset: filtro a partir do cursor e cursor da próxima página."""
+
+from utils.supabase_admin import _pagina_keyset
+
+
+class _Resposta:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Consulta:
+    """Anota os filtros pedidos e devolve as linhas do intervalo pedido."""
+
+    def __init__(self, linhas):
+        self._linhas = linhas
+        self.filtros = []
+        self.ordem = []
+        self.intervalo = None
+
+    def or_(self, filtro):
+        self.filtros.append(filtro)
+        return self
+
+    def order(self, coluna, desc=False):
+        self.ordem.append((coluna, desc))
+        return self
+
+    def range(self, inicio, fim):
+        self.intervalo = (inicio, fim)
+        return self
+
+    def execute(self):
+        inicio, fim = self.intervalo
+        return _Resposta(self._linhas[inicio : fim + 1])
+
+
+def _linhas(n):
+    return [{"id": f"id{n - i:03}", "criado_em": f"2026-10-{n - i:02}"} for i in range(n)]
+
+
+def test_primeira_pagina_sem_filtro_e_com_proximo_cursor():
+    consulta = _Consulta(_linhas(5))
+
+    pagina = _pagina_keyset(consulta, None, 3)
+
+    assert consulta.filtros == []
+    assert consulta.ordem == [("criado_em", True), ("id", True)]
+    assert consulta.intervalo == (0, 3)  # uma linha a mais que o limite
+    assert [l["id"] for l in pagina["linhas"]] == ["id005", "id004", "id003"]
+    assert pagina["cursor"] == {"criado_em": "2026-10-03", "id": "id003"}
+
+
+def test_cursor_vira_filtro_de_desempate_por_id():
+    consulta = _Consulta([])
+
+    _pagina_keyset(consulta, {"criado_em": "2026-10-03", "id": "id003"}, 3)
+
+    assert consulta.filtros == [
+        'criado_em.lt."2026-10-03",and(criado_em.eq."2026-10-03",id.lt."id003")'
+    ]
+
+
+def test_ultima_pagina_nao_tem_cursor():
+    pagina = _pagina_keyset(_Consulta(_linhas(3)), None, 3)
+
+    assert len(pagina["linhas"]) == 3
+    assert pagina["cursor"] is None
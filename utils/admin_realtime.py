@@ -1,8 +1,127 @@
-import asyncio
 import json
+import random
 import threading
+import time
+from datetime import datetime, timedelta, timezone
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer, Qt
 
+try:
+    import orjson
+
+    _decodificar = orjson.loads
+except ImportError:  # opcional — json da stdlib é mais lento, mas funciona
+    _decodificar = json.loads
+
+
+def _instante(valor) -> datetime | None:
+    """Timestamp ISO do Postgres/Realtime como datetime com fuso (UTC se faltar)."""
+    if not valor:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(valor).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+class _BufferEventos:
+    """
+    Fila limitada entre a thread asyncio e o Qt. Cada tabela guarda no
+    máximo `limite` linhas pendentes, uma por chave primária: eventos
+    novos substituem os anteriores da mesma linha em vez de empilhar.
+    Se uma tabela estoura o limite, o pendente dela vira um único evento
+    RESYNC — quem consome recarrega a tabela em vez de receber o lote.
+    """
+
+    def __init__(self, tabelas, limite: int):
+        self._limite = limite
+        self._lock = threading.Lock()
+        self._pendentes: dict[str, dict] = {t: {} for t in tabelas}
+        self._desde: dict[str, float] = {}  # tabela → monotonic do 1º pendente
+        self._sem_chave = 0
+        # Chaves com evento ao vivo desde a reconexão: a resync não as pisa
+        self._ao_vivo: dict[str, set] | None = None
+        self._contadores = {
+            "recebidos": 0,
+            "coalescidos": 0,
+            "descartados": 0,
+            "lotes": 0,
+        }
+        self._atraso_ms = {"ultimo": 0.0, "maximo": 0.0}
+
+    def adicionar(self, tabela: str, payload: dict, resync: bool = False) -> bool:
+        """
+        Junta o evento ao pendente da tabela pela chave primária, o último
+        vencendo. INSERT seguido de UPDATE continua INSERT (a linha é nova
+        para quem consome); INSERT seguido de DELETE some.
+        Com `resync`, a linha é ignorada se já chegou evento ao vivo dela
+        depois da reconexão — o evento é mais novo que a consulta.
+        Devolve True quando a tabela estava vazia — hora de avisar o Qt.
+        """
+        from utils.entity_store import chave_linha
+
+        tipo = payload.get("type")
+        chave = chave_linha(
+            tabela, payload.get("old_record" if tipo == "DELETE" else "record")
+        )
+        with self._lock:
+            self._contadores["recebidos"] += 1
+            pendente = self._pendentes[tabela]
+            vazia = not pendente
+            if vazia:
+                self._desde[tabela] = time.monotonic()
+            if ("RESYNC",) in pendente:
+                self._contadores["descartados"] += 1
+                return vazia
+            if chave is None:
+                # Sem chave não há o que deduplicar — o consumidor resincroniza
+                self._sem_chave += 1
+                chave = ("?", self._sem_chave)
+            elif self._ao_vivo is not None:
+                vistos = self._ao_vivo.setdefault(tabela, set())
+                if resync and chave in vistos:
+                    return vazia
+                if not resync:
+                    vistos.add(chave)
+            anterior = pendente.pop(chave, None)
+            if anterior is not None:
+                self._contadores["coalescidos"] += 1
+                if anterior.get("type") == "INSERT":
+                    if tipo == "DELETE":
+                        return vazia
+                    payload = {**payload, "type": "INSERT"}
+            pendente[chave] = payload
+            if len(pendente) > self._limite:
+                self._contadores["descartados"] += len(pendente)
+                self._pendentes[tabela] = {
+                    ("RESYNC",): {"type": "RESYNC", "record": {}, "old_record": {}}
+                }
+            return vazia
+
+    def rastrear_ao_vivo(self, ligado: bool):
+        with self._lock:
+            self._ao_vivo = {} if ligado else None
+
+    def retirar(self, tabela: str) -> list:
+        with self._lock:
+            pendente, self._pendentes[tabela] = self._pendentes[tabela], {}
+            desde = self._desde.pop(tabela, None)
+            if pendente:
+                self._contadores["lotes"] += 1
+            if desde is not None:
+                atraso = (time.monotonic() - desde) * 1000
+                self._atraso_ms["ultimo"] = atraso
+                self._atraso_ms["maximo"] = max(self._atraso_ms["maximo"], atraso)
+        return list(pendente.values())
+
+    def metricas(self) -> dict:
+        with self._lock:
+            m = dict(self._contadores)
+            m["profundidade"] = sum(len(p) for p in self._pendentes.values())
+            m["por_tabela"] = {t: len(p) for t, p in self._pendentes.items() if p}
+            m["atraso_ms"] = dict(self._atraso_ms)
+        return m
+
 
 class AdminRealtime(QObject):
     solicitacoes_mudou = pyqtSignal(dict)
@@ -15,7 +134,16 @@ class AdminRealtime(QObject):
     planos_modulos_mudou = pyqtSignal(dict)
     acessos_mudou = pyqtSignal(dict)  # mantido por compatibilidade
 
-    _sinal_tabela = pyqtSignal(str, dict)  # (tabela, payload) — thread-safe
+    # Um lote por janela de debounce, na thread principal: todos os eventos
+    # da janela, um por chave primária (o último vence), na ordem de chegada
+    lote = pyqtSignal(str, list)  # (tabela, [payload, ...])
+    # "conectando" | "conectado" | "sincronizando" | "reconectando" | "parado",
+    # com os segundos até a próxima tentativa quando reconectando
+    estado_mudou = pyqtSignal(str, float)
+
+    # Só avisa que a tabela tem pendentes (1x por lote); os eventos ficam
+    # no _BufferEventos, fora da fila de eventos do Qt
+    _sinal_tabela = pyqtSignal(str)  # tabela — thread-safe
 
     _TABELAS = {
         "solicitacoes": "solicitacoes_mudou",
@@ -27,25 +155,75 @@ class AdminRealtime(QObject):
         "planos_modulos": "planos_modulos_mudou",
     }
 
-    def __init__(self, supabase_url: str, supabase_key: str, anon_key: str = ""):
+    # Janela de debounce por tabela (ms) — única etapa entre o banco e as telas
+    _JANELA_PADRAO = 200
+    _JANELAS = {"sessoes_ativas": 1000}
+    # Linhas distintas pendentes por tabela antes de virar um RESYNC
+    _LIMITE_PENDENTES = 2000
+
+    # Um canal por tabela: [(evento, filtro), ...]; as omitidas recebem tudo.
+    # Solicitações: só INSERTs pendentes, mas todo UPDATE/DELETE (uma
+    # aprovação feita por outro admin tira a linha do filtro e precisa chegar).
+    # Sessões: o heartbeat (UPDATE) não interessa, só entrada e saída.
+    _CANAIS = {
+        "solicitacoes": (
+            ("INSERT", "status=eq.pendente"),
+            ("UPDATE", None),
+            ("DELETE", None),
+        ),
+        "sessoes_ativas": (("INSERT", None), ("DELETE", None)),
+    }
+
+    # Reconexão: espera exponencial com jitter, zerada após conexão estável
+    _ESPERA_BASE = 1.0
+    _ESPERA_MAX = 60.0
+    _CONEXAO_ESTAVEL = 30.0
+    # Folga ao pedir o delta pós-queda (relógios e transações concorrentes)
+    _FOLGA_LACUNA = timedelta(seconds=60)
+    # O delta por data não traz as linhas apagadas durante a queda: nestas
+    # tabelas uma remoção perdida deixa a tela errada, então a lacuna delas
+    # é sempre um RESYNC (pequenas no store; perfis recarrega só a página)
+    _RESYNC_NA_LACUNA = frozenset(
+        {"perfis", "planos", "modulos", "planos_modulos", "sessoes_ativas"}
+    )
+
+    def __init__(
+        self,
+        supabase_url: str,
+        supabase_key: str,
+        anon_key: str = "",
+        janelas: dict | None = None,
+        canais: dict | None = None,
+    ):
         super().__init__()
         self._url = supabase_url
         self._key = supabase_key
         self._anon = anon_key or supabase_key
         self._rodando = False
         self._loop = None
+        self._conexoes = 0
+        self._tentativas = 0
+        self.estado = "parado"
+        # Marca d'água por tabela: commit mais recente visto (hora do servidor)
+        self._marcas: dict[str, datetime] = {}
+        self._tarefa_lacuna = None
+        self._canais = {**self._CANAIS, **(canais or {})}
+        self._pausadas: frozenset = frozenset()  # trocado inteiro (thread-safe)
+        self._ws = None
+        self._ref = 0
 
         ws = supabase_url.replace("https://", "wss://").replace("http://", "ws://")
         self._ws_url = f"{ws}/realtime/v1/websocket?apikey={self._anon}&vsn=1.0.0"
 
-        # Debounce por tabela — agrupa rajadas de eventos
+        # Debounce por tabela — agrupa rajadas de eventos em um lote
         self._timers: dict[str, QTimer] = {}
-        self._payloads: dict[str, dict] = {}
+        self._buffer = _BufferEventos(self._TABELAS, self._LIMITE_PENDENTES)
+        janelas = {**self._JANELAS, **(janelas or {})}
 
         for tabela in self._TABELAS:
             t = QTimer()
             t.setSingleShot(True)
-            t.setInterval(200)
+            t.setInterval(janelas.get(tabela, self._JANELA_PADRAO))
             t.timeout.connect(lambda tb=tabela: self._emitir(tb))
             self._timers[tabela] = t
 
@@ -55,20 +233,30 @@ class AdminRealtime(QObject):
             type=Qt.ConnectionType.QueuedConnection,
         )
 
-    def _on_evento(self, tabela: str, payload: dict):
+    def _on_evento(self, tabela: str):
         """Sempre na thread principal — seguro iniciar QTimer aqui."""
-        self._payloads[tabela] = payload
-        if tabela in self._timers:
+        # Não reinicia: a janela conta do 1º evento, então rajadas contínuas
+        # ainda geram um lote a cada intervalo
+        if not self._timers[tabela].isActive():
             self._timers[tabela].start()
 
+    def metricas(self) -> dict:
+        """Profundidade da fila, eventos coalescidos/descartados e atraso."""
+        return self._buffer.metricas()
+
     def iniciar(self):
         self._rodando = True
         t = threading.Thread(target=self._run_loop, daemon=True, name="RealTimeThread")
         t.start()
         print("[Realtime] Iniciando...")
 
+    def _mudar_estado(self, estado: str, espera: float = 0.0):
+        self.estado = estado
+        self.estado_mudou.emit(estado, espera)
+
     def parar(self):
         self._rodando = False
+        self._mudar_estado("parado")
         for t in self._timers.values():
             t.stop()
         if self._loop and not self._loop.is_closed():
@@ -76,7 +264,10 @@ class AdminRealtime(QObject):
         print("[Realtime] Parado.")
 
     def _run_loop(self):
-        # Loop asyncio próprio — isolado do Qt
+        # Loop asyncio próprio — isolado do Qt. O import fica aqui, na
+        # thread do Realtime, para não pesar na abertura da janela
+        import asyncio
+
         self._loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self._loop)
         try:
@@ -97,17 +288,35 @@ class AdminRealtime(QObject):
                 self._loop.close()
 
     async def _escutar(self):
+        import asyncio
         import websockets
 
         while self._rodando:
+            inicio = time.monotonic()
+            erro = "conexão encerrada"
             try:
+                self._mudar_estado("conectando")
                 await self._conectar(websockets)
             except Exception as e:
-                if self._rodando:
-                    print(f"[Realtime] Reconectando em 5s... ({type(e).__name__}: {e})")
-                    await asyncio.sleep(5)
+                erro = f"{type(e).__name__}: {e}"
+            if not self._rodando:
+                break
+            if time.monotonic() - inicio >= self._CONEXAO_ESTAVEL:
+                self._tentativas = 0
+            espera = self._proxima_espera()
+            print(f"[Realtime] Reconectando em {espera:.1f}s... ({erro})")
+            self._mudar_estado("reconectando", espera)
+            await asyncio.sleep(espera)
+
+    def _proxima_espera(self) -> float:
+        """Exponencial com jitter: metade fixa, metade aleatória."""
+        teto = min(self._ESPERA_MAX, self._ESPERA_BASE * 2**self._tentativas)
+        self._tentativas += 1
+        return teto / 2 + random.uniform(0, teto / 2)
 
     async def _conectar(self, websockets):
+        import asyncio
+
         async with websockets.connect(
             self._ws_url,
             additional_headers={"apikey": self._anon},
@@ -115,51 +324,173 @@ class AdminRealtime(QObject):
             ping_timeout=10,
         ) as ws:
             print("[Realtime] Conectado")
-            ref = 1
-
-            await ws.send(
-                json.dumps(
-                    {
-                        "topic": "realtime:admin",
-                        "event": "phx_join",
-                        "payload": {
-                            "config": {
-                                "postgres_changes": [
-                                    {"event": "*", "schema": "public", "table": t}
-                                    for t in self._TABELAS
-                                ]
-                            }
-                        },
-                        "ref": str(ref),
-                    }
-                )
-            )
-            ref += 1
+            self._conexoes += 1
+            lacuna = self._conexoes > 1
+            if lacuna:
+                # Eventos ao vivo a partir daqui vencem as linhas da resync
+                self._buffer.rastrear_ao_vivo(True)
+            self._ws = ws
+            for tabela in self._TABELAS:
+                if tabela not in self._pausadas:
+                    await self._enviar(ws, "phx_join", tabela)
+
+            if lacuna:
+                # Em tarefa à parte: o recv continua enquanto o delta é buscado
+                self._tarefa_lacuna = asyncio.create_task(self._apos_reconectar())
+            else:
+                agora = datetime.now(timezone.utc)
+                for t in self._TABELAS:
+                    self._marcas.setdefault(t, agora)
+                self._mudar_estado("conectado")
 
             while self._rodando:
                 try:
                     raw = await asyncio.wait_for(ws.recv(), timeout=25)
-                    msg = json.loads(raw)
+                    msg = _decodificar(raw)
                     self._processar(msg)
                 except asyncio.TimeoutError:
                     # Heartbeat manual
-                    await ws.send(
-                        json.dumps(
-                            {
-                                "topic": "phoenix",
-                                "event": "heartbeat",
-                                "payload": {},
-                                "ref": str(ref),
-                            }
-                        )
-                    )
-                    ref += 1
+                    await self._enviar(ws, "heartbeat")
                 except asyncio.CancelledError:
                     break
                 except Exception as e:
                     if self._rodando:
                         print(f"[Realtime] Erro recv: {type(e).__name__}: {e}")
                     break
+            self._ws = None
+
+    # ── canais por tabela ─────────────────────────────────────
+
+    def _configuracao(self, tabela: str) -> dict:
+        mudancas = []
+        for evento, filtro in self._canais.get(tabela, (("*", None),)):
+            m = {"event": evento, "schema": "public", "table": tabela}
+            if filtro:
+                m["filter"] = filtro
+            mudancas.append(m)
+        return {"config": {"postgres_changes": mudancas}}
+
+    async def _enviar(self, ws, evento: str, tabela: str | None = None):
+        self._ref += 1
+        if evento == "heartbeat":
+            topico, payload = "phoenix", {}
+        else:
+            topico = f"realtime:admin:{tabela}"
+            payload = self._configuracao(tabela) if evento == "phx_join" else {}
+        await ws.send(
+            json.dumps(
+                {
+                    "topic": topico,
+                    "event": evento,
+                    "payload": payload,
+                    "ref": str(self._ref),
+                }
+            )
+        )
+
+    def pausar(self, *tabelas):
+        """Sai dos canais das tabelas (tela oculta). Chamar na thread principal."""
+        novas = {t for t in tabelas if t in self._TABELAS} - self._pausadas
+        if not novas:
+            return
+        self._pausadas = self._pausadas | novas
+        print(f"[Realtime] Pausado: {', '.join(sorted(novas))}")
+        self._no_loop(self._sair(novas))
+
+    def retomar(self, *tabelas):
+        """Volta aos canais e busca o que mudou enquanto estavam pausados."""
+        voltam = set(tabelas) & self._pausadas
+        if not voltam:
+            return
+        self._pausadas = self._pausadas - voltam
+        print(f"[Realtime] Retomado: {', '.join(sorted(voltam))}")
+        self._no_loop(self._reentrar(voltam))
+
+    def _no_loop(self, coro):
+        if self._loop is not None and self._loop.is_running():
+            import asyncio
+
+            asyncio.run_coroutine_threadsafe(coro, self._loop)
+        else:
+            coro.close()  # sem conexão: a próxima já entra só nos ativos
+
+    async def _sair(self, tabelas):
+        ws = self._ws
+        if ws is not None:
+            for t in tabelas:
+                await self._enviar(ws, "phx_leave", t)
+
+    async def _reentrar(self, tabelas):
+        ws = self._ws
+        if ws is None:
+            return  # a reconexão entra nos canais e cobre a lacuna
+        self._buffer.rastrear_ao_vivo(True)
+        for t in tabelas:
+            await self._enviar(ws, "phx_join", t)
+        await self._cobrir_lacuna(tabelas)
+
+    async def _apos_reconectar(self):
+        await self._cobrir_lacuna([t for t in self._TABELAS if t not in self._pausadas])
+
+    async def _cobrir_lacuna(self, tabelas):
+        """
+        Depois de uma queda (ou de retomar um canal pausado), busca só as
+        linhas com data (updated_at ou atualizado_em) posterior à marca
+        d'água de cada tabela e as injeta no buffer como eventos. Recebe um
+        RESYNC (recarga completa) a tabela de _RESYNC_NA_LACUNA, sem coluna
+        de data confiável, com delta grande demais ou com erro na consulta.
+        """
+        import asyncio
+        from utils.supabase_admin import listar_desde
+
+        self._mudar_estado("sincronizando")
+        loop = asyncio.get_running_loop()
+        total = 0
+        try:
+            for tabela in tabelas:
+                desde = self._marcas.get(tabela)
+                linhas = None
+                consulta_em = datetime.now(timezone.utc)
+                if desde is not None and tabela not in self._RESYNC_NA_LACUNA:
+                    iso = (desde - self._FOLGA_LACUNA).isoformat()
+                    # Sem UPDATE no canal, criado_em basta para achar o delta
+                    so_insercoes = all(
+                        evento not in ("*", "UPDATE")
+                        for evento, _ in self._canais.get(tabela, (("*", None),))
+                    )
+                    try:
+                        linhas = await loop.run_in_executor(
+                            None,
+                            lambda: listar_desde(
+                                tabela, iso, so_insercoes=so_insercoes
+                            ),
+                        )
+                    except Exception as e:
+                        print(f"[Realtime] Erro no delta de {tabela}: {e}")
+                if linhas is None:
+                    payloads = [{"type": "RESYNC", "record": {}, "old_record": {}}]
+                else:
+                    payloads = [self._payload_lacuna(l, desde) for l in linhas]
+                    total += len(linhas)
+                    # Coberta até a consulta: a próxima queda parte daqui
+                    self._marcas[tabela] = max(
+                        self._marcas.get(tabela, consulta_em), consulta_em
+                    )
+                for p in payloads:
+                    if self._buffer.adicionar(tabela, p, resync=True):
+                        self._sinal_tabela.emit(tabela)
+        finally:
+            self._buffer.rastrear_ao_vivo(False)
+        print(f"[Realtime] Lacuna coberta — {total} linhas alteradas")
+        if self._rodando:
+            self._mudar_estado("conectado")
+
+    @staticmethod
+    def _payload_lacuna(linha: dict, desde: datetime) -> dict:
+        # Criada depois da marca → INSERT; senão é alteração de linha existente
+        criado = _instante(linha.get("criado_em"))
+        tipo = "INSERT" if criado is not None and criado > desde else "UPDATE"
+        return {"type": tipo, "record": linha, "old_record": {}}
 
     def _processar(self, msg: dict):
         event = msg.get("event", "")
@@ -173,22 +504,29 @@ class AdminRealtime(QObject):
         if not tabela or tabela not in self._TABELAS:
             return
 
-        print(f"[Realtime] {data.get('type','?')} em: {tabela}")
-
         p = {
             "type": data.get("type"),
             "record": data.get("record", {}),
             "old_record": data.get("old_record", {}),
         }
+        commit = _instante(data.get("commit_timestamp"))
+        marca = self._marcas.get(tabela)
+        if commit is not None and (marca is None or commit > marca):
+            self._marcas[tabela] = commit
 
-        # Emite via sinal thread-safe — chega na thread principal via QueuedConnection
-        self._sinal_tabela.emit(tabela, p)
+        # Sinal só quando a tabela estava vazia — chega na thread principal
+        # via QueuedConnection; os eventos seguintes só entram no buffer
+        if self._buffer.adicionar(tabela, p):
+            self._sinal_tabela.emit(tabela)
 
     def _emitir(self, tabela: str):
-        nome = self._TABELAS.get(tabela)
-        sinal = getattr(self, nome, None)
+        lote = self._buffer.retirar(tabela)
+        if not lote:
+            return
+        self.lote.emit(tabela, lote)
+        sinal = getattr(self, self._TABELAS[tabela], None)
         if sinal:
-            sinal.emit(self._payloads.get(tabela, {}))
+            sinal.emit(lote[-1])
 
 
 # ── Instância global ───────────────────────────────────────────
@@ -197,11 +535,14 @@ _instancia: AdminRealtime | None = None
 
 
 def iniciar_realtime(
-    supabase_url: str, supabase_key: str, anon_key: str = ""
+    supabase_url: str,
+    supabase_key: str,
+    anon_key: str = "",
+    janelas: dict | None = None,
 ) -> AdminRealtime:
     global _instancia
     if _instancia is None:
-        _instancia = AdminRealtime(supabase_url, supabase_key, anon_key)
+        _instancia = AdminRealtime(supabase_url, supabase_key, anon_key, janelas)
         _instancia.iniciar()
     return _instancia
 
@@ -0,0 +1,123 @@
+"""
+Cache local de snapshots — a última versão conhecida de cada tela, em disco.
+
+Um arquivo JSON por chave em %LOCALAPPDATA%/RCC/cache/<projeto>/, onde
+<projeto> deriva do SUPABASE_URL (bancos diferentes não se misturam).
+Cada arquivo leva `versao`: formato diferente de `_VERSAO` é ignorado.
+A leitura é síncrona (arquivos pequenos, na abertura da tela); a gravação
+vai para uma thread que coalesce por chave e troca o arquivo atomicamente.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import orjson
+
+    _codificar = orjson.dumps
+    _decodificar = orjson.loads
+except ImportError:  # opcional — json da stdlib é mais lento, mas funciona
+
+    def _codificar(dados) -> bytes:
+        return json.dumps(dados, separators=(",", ":"), default=str).encode()
+
+    _decodificar = json.loads
+
+_VERSAO = 1
+
+
+def _pasta() -> Path:
+    base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    projeto = hashlib.sha1((os.getenv("SUPABASE_URL") or "").encode()).hexdigest()
+    return Path(base) / "RCC" / "cache" / projeto[:16]
+
+
+def _arquivo(chave: str) -> Path:
+    nome = "".join(c if c.isalnum() or c in "-_" else "_" for c in chave)
+    return _pasta() / f"{nome}.json"
+
+
+def ler(chave: str):
+    """Dados salvos para `chave`, ou None (ausente, corrompido ou outra versão)."""
+    try:
+        conteudo = _decodificar(_arquivo(chave).read_bytes())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(conteudo, dict) or conteudo.get("versao") != _VERSAO:
+        return None
+    return conteudo.get("dados")
+
+
+def gravar(chave: str, dados):
+    """Agenda a gravação; chamadas seguidas para a mesma chave viram uma só."""
+    if dados is None:
+        return
+    with _cond:
+        _pendentes[chave] = dados
+        _cond.notify()
+    _garantir_thread()
+
+
+def descarregar():
+    """Grava já o que estiver pendente (chamado ao fechar o app)."""
+    with _cond:
+        lote = dict(_pendentes)
+        _pendentes.clear()
+    for chave, dados in lote.items():
+        _escrever(chave, dados)
+
+
+def limpar():
+    """Apaga o cache do projeto atual (ex.: troca de banco ou formato)."""
+    pasta = _pasta()
+    for arquivo in pasta.glob("*.json"):
+        try:
+            arquivo.unlink()
+        except OSError:
+            pass
+
+
+# ── Gravação em segundo plano ──────────────────────────────────
+
+_pendentes: dict = {}
+_cond = threading.Condition()
+_escrita = threading.Lock()  # gravador e descarregar() não disputam o mesmo .tmp
+_thread: threading.Thread | None = None
+
+
+def _garantir_thread():
+    global _thread
+    with _cond:
+        if _thread is None:
+            _thread = threading.Thread(target=_gravador, daemon=True, name="CacheLocal")
+            _thread.start()
+
+
+def _gravador():
+    while True:
+        with _cond:
+            while not _pendentes:
+                _cond.wait()
+            lote = dict(_pendentes)
+            _pendentes.clear()
+        for chave, dados in lote.items():
+            _escrever(chave, dados)
+
+
+def _escrever(chave: str, dados):
+    destino = _arquivo(chave)
+    temp = destino.with_suffix(".tmp")
+    try:
+        conteudo = _codificar(
+            {"versao": _VERSAO, "salvo_em": time.time(), "dados": dados}
+        )
+        with _escrita:
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            temp.write_bytes(conteudo)
+            os.replace(temp, destino)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"[Cache] Falha ao gravar '{chave}': {e}")
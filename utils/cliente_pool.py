@@ -0,0 +1,243 @@
+"""
+Pool de clientes Supabase — reaproveita conexões HTTP keep-alive entre chamadas.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+def _erro_de_conexao(e: Exception) -> bool:
+    """True se a exceção indica conexão quebrada (cliente deve ser descartado)."""
+    try:
+        import httpx
+    except ImportError:
+        return False
+    return isinstance(e, httpx.TransportError)
+
+
+class PoolEsgotado(TimeoutError):
+    """Nenhum cliente voltou ao pool dentro de `espera_max` segundos."""
+
+
+class _Entrada:
+    __slots__ = ("cliente", "criado_em", "usado_em")
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.criado_em = time.monotonic()
+        self.usado_em = self.criado_em
+
+
+class PoolClientes:
+    """
+    Mantém até `tamanho` clientes vivos. Cada thread empresta um cliente com
+    `with pool.cliente() as cli:` e o devolve ao sair do bloco.
+    Clientes ociosos demais, velhos demais ou com erro de transporte são
+    descartados e recriados sob demanda. Com todos emprestados, quem pede
+    espera até `espera_max` segundos e recebe PoolEsgotado — um cliente
+    preso não trava as demais chamadas para sempre.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        chave: str,
+        tamanho: int = 6,
+        idade_max: float = 900.0,
+        ocioso_max: float = 120.0,
+        espera_max: float = 45.0,
+    ):
+        self._url = url
+        self._chave = chave
+        self._tamanho = max(1, tamanho)
+        self._idade_max = idade_max
+        self._ocioso_max = ocioso_max
+        self._espera_max = espera_max
+        self._livres: list[_Entrada] = []  # LIFO — reusa a conexão mais "quente"
+        self._criados = 0
+        self._cond = threading.Condition()
+        self.stats = {"criados": 0, "reusos": 0, "descartados": 0, "esgotado": 0}
+
+    # ── API pública ───────────────────────────────────────────
+
+    @property
+    def tamanho(self) -> int:
+        return self._tamanho
+
+    @contextmanager
+    def cliente(self):
+        entrada = self._emprestar()
+        saudavel = True
+        try:
+            yield entrada.cliente
+        except Exception as e:
+            if _erro_de_conexao(e):
+                saudavel = False
+            raise
+        finally:
+            self._devolver(entrada, saudavel)
+
+    def limpar(self):
+        """Fecha todos os clientes ociosos (ex.: ao encerrar o app)."""
+        with self._cond:
+            livres, self._livres = self._livres, []
+            self._criados -= len(livres)
+            self._cond.notify_all()
+        for e in livres:
+            self._fechar(e.cliente)
+
+    # ── internos ──────────────────────────────────────────────
+
+    def _expirada(self, e: _Entrada, agora: float) -> bool:
+        return (
+            agora - e.criado_em > self._idade_max
+            or agora - e.usado_em > self._ocioso_max
+        )
+
+    def _emprestar(self) -> _Entrada:
+        vencidas = []
+        prazo = time.monotonic() + self._espera_max
+        try:
+            with self._cond:
+                while True:
+                    agora = time.monotonic()
+                    while self._livres:
+                        e = self._livres.pop()
+                        if self._expirada(e, agora):
+                            self._criados -= 1
+                            self.stats["descartados"] += 1
+                            vencidas.append(e)
+                            continue
+                        self.stats["reusos"] += 1
+                        return e
+                    if self._criados < self._tamanho:
+                        self._criados += 1
+                        break
+                    restante = prazo - time.monotonic()
+                    if restante <= 0 or not self._cond.wait(restante):
+                        if self._livres or self._criados < self._tamanho:
+                            continue  # liberou no limite do prazo
+                        self.stats["esgotado"] += 1
+                        print(
+                            f"[Pool] {self._tamanho} clientes emprestados há "
+                            f"{self._espera_max:.0f}s — desistindo"
+                        )
+                        raise PoolEsgotado(
+                            f"Sem cliente livre após {self._espera_max:.0f}s"
+                        )
+        finally:
+            for e in vencidas:
+                self._fechar(e.cliente)
+
+        try:
+            entrada = _Entrada(self._criar())
+        except Exception:
+            with self._cond:
+                self._criados -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.stats["criados"] += 1
+        return entrada
+
+    def _devolver(self, entrada: _Entrada, saudavel: bool):
+        with self._cond:
+            if saudavel:
+                entrada.usado_em = time.monotonic()
+                self._livres.append(entrada)
+            else:
+                self._criados -= 1
+                self.stats["descartados"] += 1
+            self._cond.notify()
+        if not saudavel:
+            self._fechar(entrada.cliente)
+
+    def _criar(self):
+        import httpx
+        from supabase import create_client, ClientOptions
+
+        # Um httpx.Client por entrada: postgrest, auth e storage compartilham
+        # as mesmas conexões keep-alive. Service key não expira — sem refresh.
+        http = httpx.Client(
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=10,
+                max_keepalive_connections=4,
+                keepalive_expiry=self._ocioso_max,
+            ),
+        )
+        try:
+            return create_client(
+                self._url,
+                self._chave,
+                options=ClientOptions(
+                    auto_refresh_token=False,
+                    persist_session=False,
+                    httpx_client=http,
+                ),
+            )
+        except Exception:
+            http.close()
+            raise
+
+    @staticmethod
+    def _fechar(cli):
+        try:
+            cli.options.httpx_client.close()
+        except Exception:
+            pass
+
+
+# ── Instância global ───────────────────────────────────────────
+
+_pool: PoolClientes | None = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool() -> PoolClientes:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolClientes(
+                    os.getenv("SUPABASE_URL"),
+                    os.getenv("SUPABASE_SERVICE_KEY"),
+                    tamanho=int(os.getenv("RCC_POOL_CLIENTES", "6")),
+                )
+    return _pool
+
+
+# ── Fan-out de consultas ───────────────────────────────────────
+#
+# Um único executor para as sub-consultas paralelas (DataService.fetch com
+# vários fetchers, snapshot do dashboard): do tamanho do pool, já que cada
+# sub-consulta segura um cliente enquanto roda.
+
+_PREFIXO_CONSULTA = "Consulta"
+_executor: ThreadPoolExecutor | None = None
+
+
+def submeter_consulta(fn, *args) -> Future:
+    """
+    Roda fn(*args) no executor de consultas. Chamado de dentro de uma
+    sub-consulta, roda ali mesmo: esperar o próprio executor lotado travaria.
+    """
+    global _executor
+    if threading.current_thread().name.startswith(_PREFIXO_CONSULTA):
+        futuro = Future()
+        try:
+            futuro.set_result(fn(*args))
+        except Exception as e:
+            futuro.set_exception(e)
+        return futuro
+    if _executor is None:
+        tamanho = obter_pool().tamanho  # fora do lock: obter_pool também o usa
+        with _pool_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=tamanho, thread_name_prefix=_PREFIXO_CONSULTA
+                )
+    return _executor.submit(fn, *args)
@@ -3,58 +3,216 @@ DataService — sinais para os controllers e fetch thread-safe.
 """
 
 import threading
-from PyQt6.QtCore import QObject, pyqtSignal, Qt, QMetaObject
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, Qt, QMetaObject
+from utils import startup_trace as trace
+from utils.cliente_pool import submeter_consulta
+
+
+def _cronometrado(fn):
+    inicio = time.perf_counter()
+    resultado = fn()
+    return resultado, time.perf_counter() - inicio
 
 
 class _FetchWorker(QObject):
     _pronto = pyqtSignal(object)
 
-    def __init__(self, fn, callback):
+    def __init__(self, svc, fn, callback, chave=None):
         super().__init__()
+        self._svc = svc
         self._fn = fn
-        self._pronto.connect(callback, type=Qt.ConnectionType.QueuedConnection)
-
-    def start(self):
-        threading.Thread(target=self._run, daemon=True).start()
+        self._callback = callback
+        self.chave = chave
+        self.cancelado = False
+        self.tempos: dict[str, float] = {}
+        # Entrega sempre na thread principal (afinidade do worker)
+        self._pronto.connect(self._entregar, type=Qt.ConnectionType.QueuedConnection)
 
     def _run(self):
+        self._svc._ao_iniciar()
         try:
-            resultado = self._fn()
+            if self.cancelado:
+                resultado = None
+            elif isinstance(self._fn, dict):
+                resultado = self._executar_varios(self._fn)
+            else:
+                resultado = self._fn()
         except Exception as e:
             print(f"[DataService] Erro no fetch: {e}")
             resultado = None
+        finally:
+            self._svc._ao_terminar()
         self._pronto.emit(resultado)
 
+    def _entregar(self, resultado):
+        self._svc._ao_entregar(self)
+        if self.cancelado:
+            return
+        if self.chave:
+            trace.primeira_vez(f"dados {self.chave}")
+        self._callback(resultado)
+
+    def _executar_varios(self, fetchers: dict) -> dict:
+        """Roda cada fetcher em paralelo e junta tudo num único dict."""
+        inicio = time.perf_counter()
+        futuros = {
+            nome: submeter_consulta(_cronometrado, fn)
+            for nome, fn in fetchers.items()
+        }
+        resultado, erro = {}, None
+        for nome, futuro in futuros.items():
+            try:
+                resultado[nome], self.tempos[nome] = futuro.result()
+            except Exception as e:
+                erro = erro or e
+                print(f"[DataService] Erro em '{nome}': {e}")
+        self.tempos["total"] = time.perf_counter() - inicio
+        print(
+            "[DataService] tempos: "
+            + ", ".join(f"{n}={t * 1000:.0f}ms" for n, t in self.tempos.items())
+        )
+        self._svc.ultimos_tempos.update(self.tempos)
+        if erro:
+            raise erro
+        return resultado
+
+
+class WorkerEmThread(QObject):
+    """
+    Base dos workers movidos para um QThread. Chamar um método do worker
+    direto roda na thread de quem chamou (a GUI); `chamar("metodo", ...)`
+    enfileira a chamada e ela roda na thread do worker.
+    """
+
+    _pedido = pyqtSignal(str, tuple)
+
+    def __init__(self):
+        super().__init__()
+        self._pedido.connect(self._atender)
+
+    def chamar(self, metodo: str, *args):
+        self._pedido.emit(metodo, args)
+
+    # Precisa ser pyqtSlot: só assim a conexão segue a thread do worker
+    @pyqtSlot(str, tuple)
+    def _atender(self, metodo: str, args: tuple):
+        try:
+            getattr(self, metodo)(*args)
+        except Exception as e:
+            print(f"[Worker] Erro em '{metodo}': {e}")
+
 
 class DataService(QObject):
-    usuarios_mudou = pyqtSignal()
     assinaturas_mudou = pyqtSignal()
     planos_mudou = pyqtSignal()
     modulos_mudou = pyqtSignal()
     logs_mudou = pyqtSignal()
     solicitacoes_mudou = pyqtSignal()
     sessoes_mudou = pyqtSignal()
+    # Lote do Realtime por tabela ([{type, record, old_record}, ...]) — as
+    # telas paginadas corrigem as linhas afetadas em vez de recarregar tudo
+    lote_mudou = pyqtSignal(str, list)  # (tabela, payloads)
 
-    def __init__(self):
+    def __init__(self, max_workers: int = 4):
         super().__init__()
-        self._workers = []
-
-    def fetch(self, fn, callback):
-        w = _FetchWorker(fn, callback)
-        self._workers.append(w)
-        self._workers = self._workers[-50:]
-        w.start()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="Fetch"
+        )
+        self._lock = threading.Lock()
+        self._ativos: set[_FetchWorker] = set()  # mantém refs até a entrega
+        # Por chave: no máximo um fetch rodando e um aguardando (o mais novo)
+        self._rodando: dict[str, _FetchWorker] = {}
+        self._aguardando: dict[str, _FetchWorker] = {}
+        self._contadores = {
+            "na_fila": 0,
+            "em_execucao": 0,
+            "concluidos": 0,
+            "cancelados": 0,
+        }
+        self.ultimos_tempos: dict[str, float] = {}
+
+    def fetch(self, fn, callback, chave: str | None = None):
+        """
+        `fn` pode ser um callable ou um dict {nome: callable}. No segundo caso
+        os fetchers rodam em paralelo e o callback recebe {nome: resultado};
+        o tempo de cada sub-consulta fica em `ultimos_tempos`.
+
+        Com `chave`, fetches da mesma tela não se sobrepõem: enquanto um roda,
+        só o pedido mais recente fica aguardando e os anteriores são
+        cancelados sem chamar o callback — os resultados chegam em ordem.
+        Deve ser chamado na thread principal.
+        """
+        w = _FetchWorker(self, fn, callback, chave)
+        self._ativos.add(w)
+        if chave is None or chave not in self._rodando:
+            self._submeter(w)
+            return w
+        antigo = self._aguardando.get(chave)
+        if antigo is not None:
+            self._descartar(antigo)
+        self._aguardando[chave] = w
         return w
 
+    def cancelar(self, chave: str):
+        """Cancela o pedido aguardando e ignora o resultado do que está rodando."""
+        antigo = self._aguardando.pop(chave, None)
+        if antigo is not None:
+            self._descartar(antigo)
+        rodando = self._rodando.get(chave)
+        if rodando is not None and not rodando.cancelado:
+            rodando.cancelado = True
+            with self._lock:
+                self._contadores["cancelados"] += 1
+
+    def metricas(self) -> dict:
+        """Profundidade da fila, fetches em execução e totais acumulados."""
+        with self._lock:
+            m = dict(self._contadores)
+        m["aguardando"] = len(self._aguardando)
+        return m
+
+    # ── ciclo de vida dos workers ─────────────────────────────
+
+    def _submeter(self, w: _FetchWorker):
+        if w.chave is not None:
+            self._rodando[w.chave] = w
+        with self._lock:
+            self._contadores["na_fila"] += 1
+        self._executor.submit(w._run)
+
+    def _descartar(self, w: _FetchWorker):
+        w.cancelado = True
+        self._ativos.discard(w)
+        with self._lock:
+            self._contadores["cancelados"] += 1
+
+    def _ao_iniciar(self):
+        with self._lock:
+            self._contadores["na_fila"] -= 1
+            self._contadores["em_execucao"] += 1
+
+    def _ao_terminar(self):
+        with self._lock:
+            self._contadores["em_execucao"] -= 1
+            self._contadores["concluidos"] += 1
+
+    def _ao_entregar(self, w: _FetchWorker):
+        self._ativos.discard(w)
+        if w.chave is None or self._rodando.get(w.chave) is not w:
+            return
+        del self._rodando[w.chave]
+        proximo = self._aguardando.pop(w.chave, None)
+        if proximo is not None:
+            self._submeter(proximo)
+
     # ── métodos de disparo thread-safe via QueuedConnection ───
     def _emitir(self, nome_sinal, nome_log):
         """Emite sinal sempre na thread principal via invokeMethod."""
         print(f"[DataService] disparando {nome_log}")
         QMetaObject.invokeMethod(self, nome_sinal, Qt.ConnectionType.QueuedConnection)
 
-    def emitir_usuarios(self):
-        self._emitir("usuarios_mudou", "usuarios_mudou")
-
     def emitir_assinaturas(self):
         self._emitir("assinaturas_mudou", "assinaturas_mudou")
 
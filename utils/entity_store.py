@@ -0,0 +1,186 @@
+"""
+EntityStore — cópia local das tabelas indexada por chave primária,
+atualizada incrementalmente pelos eventos do Realtime.
+"""
+
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+
+# Chave primária de cada tabela espelhada
+_CHAVES = {
+    "perfis": ("id",),
+    "assinaturas": ("id",),
+    "planos": ("id",),
+    "modulos": ("id",),
+    "planos_modulos": ("plano_id", "modulo_id"),
+    "solicitacoes": ("id",),
+    "sessoes_ativas": ("user_id",),
+}
+
+# Carregadas por padrão: pequenas, sem crescer com o número de usuários.
+# perfis/assinaturas/solicitacoes as telas paginam no servidor; quem
+# precisar da cópia completa pede com carregar(["perfis", ...]).
+_PADRAO = ("planos", "modulos", "planos_modulos", "sessoes_ativas")
+
+
+def chave_linha(tabela: str, linha: dict) -> tuple | None:
+    """Tupla com a chave primária da linha, ou None se faltar alguma coluna."""
+    campos = _CHAVES.get(tabela, ("id",))
+    chave = tuple((linha or {}).get(c) for c in campos)
+    return None if any(v is None for v in chave) else chave
+
+
+class EntityStore(QObject):
+    # Um aviso por lote do Realtime com as chaves das linhas inseridas,
+    # atualizadas ou removidas (a linha atual sai de obter())
+    linhas_mudaram = pyqtSignal(str, list)  # (tabela, [chave, ...])
+    tabela_recarregada = pyqtSignal(str)
+    carregamento_completo = pyqtSignal()
+
+    def __init__(self, svc):
+        super().__init__()
+        self._svc = svc
+        self._tabelas: dict[str, dict[tuple, dict]] = {t: {} for t in _CHAVES}
+        self._carregadas: set[str] = set()
+
+        # Resync por tabela, agrupado — vários eventos incompletos viram 1 fetch
+        self._resync_pendente: set[str] = set()
+        self._timer_resync = QTimer()
+        self._timer_resync.setSingleShot(True)
+        self._timer_resync.setInterval(500)
+        self._timer_resync.timeout.connect(self._executar_resync)
+
+    # ── leitura ───────────────────────────────────────────────
+
+    def linhas(self, tabela: str) -> list:
+        return list(self._tabelas.get(tabela, {}).values())
+
+    def obter(self, tabela: str, *chave) -> dict | None:
+        return self._tabelas.get(tabela, {}).get(tuple(chave))
+
+    def carregada(self, tabela: str) -> bool:
+        return tabela in self._carregadas
+
+    @property
+    def usuarios(self) -> list:
+        return self.linhas("perfis")
+
+    @property
+    def assinaturas(self) -> list:
+        return self.linhas("assinaturas")
+
+    @property
+    def planos(self) -> list:
+        return self.linhas("planos")
+
+    @property
+    def modulos(self) -> list:
+        return self.linhas("modulos")
+
+    # ── carga completa ────────────────────────────────────────
+
+    def carregar(self, tabelas=None):
+        """Baixa as tabelas (as de _PADRAO por padrão) e substitui o conteúdo local."""
+        from utils.supabase_admin import listar_tabela
+
+        tabelas = list(tabelas or _PADRAO)
+        self._svc.fetch(
+            {t: (lambda t=t: listar_tabela(t, _CHAVES[t][0])) for t in tabelas},
+            lambda dados: self._ao_carregar(
+                dados, completo=set(_PADRAO) <= set(tabelas)
+            ),
+            chave="store:" + ",".join(sorted(tabelas)),
+        )
+
+    def resincronizar(self):
+        """Recarrega tudo que já foi carregado (recarga completa sob demanda)."""
+        self._agendar_resync(*(self._carregadas or _PADRAO))
+
+    def _ao_carregar(self, dados, completo=False):
+        if not dados:
+            return
+        for tabela, linhas in dados.items():
+            indice = {}
+            for linha in linhas or []:
+                chave = chave_linha(tabela, linha)
+                if chave is not None:
+                    indice[chave] = linha
+            self._tabelas[tabela] = indice
+            self._carregadas.add(tabela)
+            self.tabela_recarregada.emit(tabela)
+        if completo:
+            self.carregamento_completo.emit()
+
+    def _agendar_resync(self, *tabelas):
+        self._resync_pendente.update(t for t in tabelas if t in _CHAVES)
+        self._timer_resync.start()
+
+    def _executar_resync(self):
+        tabelas, self._resync_pendente = self._resync_pendente, set()
+        if tabelas:
+            self.carregar(tabelas)
+
+    # ── deltas do Realtime ────────────────────────────────────
+
+    def aplicar_lote(self, tabela: str, payloads: list):
+        """Aplica um lote do Realtime (já deduplicado por chave) em ordem."""
+        mudadas = []
+        for payload in payloads:
+            chave = self.aplicar(tabela, payload)
+            if chave is not None:
+                mudadas.append(chave)
+        if mudadas:
+            self.linhas_mudaram.emit(tabela, mudadas)
+
+    def aplicar(self, tabela: str, payload: dict) -> tuple | None:
+        """
+        Aplica um evento {type, record, old_record} na tabela local.
+        Devolve a chave da linha alterada, ou None se nada mudou no índice.
+        """
+        if tabela not in self._carregadas:
+            # Sem cópia local não há o que corrigir — nem o que resincronizar
+            # (perfis/assinaturas/solicitacoes são paginadas pelas telas)
+            return None
+        indice = self._tabelas[tabela]
+        tipo = payload.get("type")
+        novo = payload.get("record") or {}
+        antigo = payload.get("old_record") or {}
+
+        if tipo in ("INSERT", "UPDATE"):
+            chave = chave_linha(tabela, novo)
+            if chave is None:
+                # Payload sem a chave — não dá para aplicar com segurança
+                self._agendar_resync(tabela)
+                return None
+            if tipo == "UPDATE" and chave not in indice:
+                # UPDATE de linha desconhecida: perdemos o INSERT — lacuna
+                self._agendar_resync(tabela)
+            indice[chave] = novo
+            return chave
+
+        elif tipo == "DELETE":
+            # Com REPLICA IDENTITY padrão o old_record traz só a chave primária
+            chave = chave_linha(tabela, antigo)
+            if chave is None:
+                self._agendar_resync(tabela)
+                return None
+            indice.pop(chave, None)
+            return chave
+
+        elif tipo == "RESYNC":
+            # A fila do Realtime transbordou e descartou os eventos da tabela
+            self._agendar_resync(tabela)
+        return None
+
+
+# ── Instância global ───────────────────────────────────────────
+
+_store: EntityStore | None = None
+
+
+def obter_store() -> EntityStore:
+    global _store
+    if _store is None:
+        from utils.data_service import obter_service
+
+        _store = EntityStore(obter_service())
+    return _store
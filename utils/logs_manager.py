@@ -1,11 +1,56 @@
 import json
 import os
+import queue
+import sqlite3
 import threading
+import time
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
 LOGS_DIR = Path(os.environ.get("LOCALAPPDATA")) / "RCC" / "logs"
+LOGS_DB = LOGS_DIR / "admin_logs.db"
+# Formatos antigos, importados para o banco na 1ª execução
 LOGS_FILE = LOGS_DIR / "admin_logs.json"
+SEGMENTO_ATIVO = LOGS_DIR / "admin_logs.jsonl"
+
+_JANELA_GRUPO = 0.05  # espera por mais entradas antes de gravar o lote
+_MAX_LOTE = 1000
+
+# Retenção: entradas mais velhas que _RETENCAO_DIAS ou além das
+# _MAX_ENTRADAS mais recentes são apagadas pelo escritor a cada
+# _INTERVALO_LIMPEZA segundos (e ao abrir o app)
+_RETENCAO_DIAS = int(os.getenv("RCC_LOGS_RETENCAO_DIAS", "365"))
+_MAX_ENTRADAS = int(os.getenv("RCC_LOGS_MAX_ENTRADAS", "200000"))
+_INTERVALO_LIMPEZA = 6 * 3600
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id        INTEGER PRIMARY KEY,
+    criado_em TEXT NOT NULL,
+    acao      TEXT NOT NULL,
+    username  TEXT,
+    detalhes  TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_logs_criado_em ON logs (criado_em);
+CREATE INDEX IF NOT EXISTS ix_logs_acao ON logs (acao, id);
+CREATE INDEX IF NOT EXISTS ix_logs_username ON logs (username, id);
+"""
+
+_ESQUEMA_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(
+    acao, username, detalhes,
+    content='logs', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS logs_ai AFTER INSERT ON logs BEGIN
+    INSERT INTO logs_fts (rowid, acao, username, detalhes)
+    VALUES (new.id, new.acao, new.username, new.detalhes);
+END;
+CREATE TRIGGER IF NOT EXISTS logs_ad AFTER DELETE ON logs BEGIN
+    INSERT INTO logs_fts (logs_fts, rowid, acao, username, detalhes)
+    VALUES ('delete', old.id, old.acao, old.username, old.detalhes);
+END;
+"""
 
 _MENSAGENS = {
     # Usuários
@@ -21,6 +66,12 @@ _MENSAGENS = {
     "renovar_assinatura": lambda d: f"Assinatura '{d.get('plano','?')}' de '{d.get('username','?')}' renovada +{d.get('dias_adicionados','?')} dias (era: {d.get('expiracao_anterior','?')} → nova: {d.get('nova_expiracao','?')})",
     "revogar_assinatura": lambda d: f"Plano de '{d.get('username','?')}' revogado de '{d.get('plano_anterior','?')}' → Básico",
     "revogar_para_basico": lambda d: f"Plano de '{d.get('username','?')}' revogado de '{d.get('plano_anterior', d.get('plano','?'))}' → Básico",
+    # Lotes
+    "ativar_usuarios_lote": lambda d: f"{d.get('quantidade', 0)} usuários ativados ({d.get('falhas', 0)} falhas): {d.get('usuarios', '')}",
+    "desativar_usuarios_lote": lambda d: f"{d.get('quantidade', 0)} usuários desativados ({d.get('falhas', 0)} falhas): {d.get('usuarios', '')}",
+    "renovar_assinaturas_lote": lambda d: f"{d.get('quantidade', 0)} assinaturas renovadas +{d.get('dias', '?')} dias ({d.get('falhas', 0)} falhas): {d.get('usuarios', '')}",
+    "revogar_assinaturas_lote": lambda d: f"{d.get('quantidade', 0)} assinaturas revogadas → Básico ({d.get('falhas', 0)} falhas): {d.get('usuarios', '')}",
+    "aprovar_solicitacoes_lote": lambda d: f"{d.get('quantidade', 0)} solicitações aprovadas ({d.get('falhas', 0)} falhas): {d.get('usuarios', '')}",
     # Planos
     "criar_plano": lambda d: f"Plano '{d.get('nome','?')}' criado",
     "editar_plano": lambda d: f"Plano '{d.get('nome','?')}' editado",
@@ -43,6 +94,11 @@ _MENSAGENS = {
 }
 
 
+def _agora() -> datetime:
+    """Horário de Brasília (UTC-3), o mesmo gravado em `criado_em`."""
+    return datetime.now(timezone.utc) - timedelta(hours=3)
+
+
 def _formatar_detalhe(acao: str, detalhes: dict) -> str:
     fn = _MENSAGENS.get(acao)
     if fn:
@@ -59,13 +115,50 @@ def _formatar_detalhe(acao: str, detalhes: dict) -> str:
     return ", ".join(partes) if partes else "—"
 
 
+def _termos_fts(texto: str) -> str:
+    """Busca por prefixo em cada palavra: 'joao cri' → "joao"* "cri"*."""
+    termos = [t.replace('"', '""') for t in texto.split()]
+    return " ".join(f'"{t}"*' for t in termos if t)
+
+
 class GerenciadorLogs:
+    """
+    Trilha de auditoria num SQLite local, indexado por data, ação e
+    usuário, com FTS5 sobre o texto dos detalhes.
+    `registrar` só enfileira: uma thread escritora grava em lotes, cada
+    lote numa única transação.
+    """
+
     def __init__(self):
-        self._lock = threading.Lock()
         self._listeners = []  # callbacks para notificar mudança
+        self._local = threading.local()  # uma conexão por thread
         LOGS_DIR.mkdir(parents=True, exist_ok=True)
-        if not LOGS_FILE.exists():
-            LOGS_FILE.write_text("[]", encoding="utf-8")
+
+        conn = self._conexao()
+        conn.executescript(_ESQUEMA)
+        try:
+            conn.executescript(_ESQUEMA_FTS)
+            self._fts = True
+        except sqlite3.OperationalError as e:
+            # SQLite sem FTS5 — busca cai para LIKE
+            print(f"[Logs] FTS5 indisponível: {e}")
+            self._fts = False
+        self._importar_legado(conn)
+
+        # Um único escritor: registrar só enfileira
+        self._fila: queue.Queue = queue.Queue()
+        threading.Thread(target=self._escritor, name="LogsWriter", daemon=True).start()
+
+    def _conexao(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(LOGS_DB, timeout=10)
+            conn.row_factory = sqlite3.Row
+            # WAL: leituras da tela não esperam o escritor
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
 
     def registrar(
         self,
@@ -76,45 +169,217 @@ class GerenciadorLogs:
     ):
         detalhes = detalhes or {}
         entrada = {
-            "criado_em": (datetime.now(timezone.utc) - timedelta(hours=3)).isoformat(),
+            "criado_em": _agora().isoformat(),
             "acao": acao,
             "username": username,
             "detalhes": _formatar_detalhe(acao, detalhes),
         }
-        threading.Thread(target=self._salvar, args=(entrada,), daemon=True).start()
+        self._fila.put(entrada)
 
-    def _salvar(self, entrada: dict):
-        with self._lock:
-            try:
-                dados = json.loads(LOGS_FILE.read_text(encoding="utf-8"))
-                dados.insert(0, entrada)
-                LOGS_FILE.write_text(
-                    json.dumps(dados[:5000], ensure_ascii=False, indent=2),
-                    encoding="utf-8",
-                )
-                # Notifica listeners para atualizar a tela
-                for cb in self._listeners:
-                    try:
-                        cb()
-                    except Exception:
-                        pass
-            except Exception as e:
-                print(f"[Logs] Erro ao salvar: {e}")
+    # ── escritor ──────────────────────────────────────────────
 
-    def listar(self, limite: int = 200) -> list:
-        with self._lock:
+    def _escritor(self):
+        """Thread única: junta o que estiver na fila e grava de uma vez."""
+        proxima_limpeza = 0.0
+        while True:
+            if time.monotonic() >= proxima_limpeza:
+                self.limpar()
+                proxima_limpeza = time.monotonic() + _INTERVALO_LIMPEZA
+            item = self._fila.get()
+            lote, avisos = [], []
+            prazo = time.monotonic() + _JANELA_GRUPO
+            while True:
+                if isinstance(item, threading.Event):
+                    avisos.append(item)
+                else:
+                    lote.append(item)
+                if len(lote) >= _MAX_LOTE:
+                    break
+                try:
+                    item = self._fila.get(timeout=max(0, prazo - time.monotonic()))
+                except queue.Empty:
+                    break
+            if lote:
+                self._salvar(lote)
+            for aviso in avisos:
+                aviso.set()
+
+    def _salvar(self, lote: list):
+        try:
+            with self._conexao() as conn:
+                self._inserir(conn, lote)
+        except Exception as e:
+            print(f"[Logs] Erro ao salvar {len(lote)} entradas: {e}")
+            return
+        # Um aviso por lote — a tela recarrega uma vez
+        for cb in self._listeners:
             try:
-                dados = json.loads(LOGS_FILE.read_text(encoding="utf-8"))
-                return dados[:limite]
+                cb()
             except Exception:
-                return []
+                pass
+
+    @staticmethod
+    def _inserir(conn: sqlite3.Connection, entradas):
+        conn.executemany(
+            "INSERT INTO logs (criado_em, acao, username, detalhes) "
+            "VALUES (:criado_em, :acao, :username, :detalhes)",
+            (
+                {
+                    "criado_em": e.get("criado_em") or "",
+                    "acao": e.get("acao") or "",
+                    "username": e.get("username"),
+                    "detalhes": (
+                        e.get("detalhes")
+                        if isinstance(e.get("detalhes"), str)
+                        else json.dumps(e.get("detalhes"), ensure_ascii=False)
+                    ),
+                }
+                for e in entradas
+            ),
+        )
+
+    def limpar(
+        self, retencao_dias: int = _RETENCAO_DIAS, maximo: int = _MAX_ENTRADAS
+    ) -> int:
+        """
+        Aplica a retenção e devolve quantas entradas saíram. O trigger
+        logs_ad tira as mesmas linhas do índice FTS.
+        """
+        limite = (_agora() - timedelta(days=retencao_dias)).isoformat()
+        try:
+            with self._conexao() as conn:
+                apagadas = conn.execute(
+                    "DELETE FROM logs WHERE criado_em < ?", (limite,)
+                ).rowcount
+                apagadas += conn.execute(
+                    "DELETE FROM logs WHERE id <= "
+                    "(SELECT id FROM logs ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (maximo,),
+                ).rowcount
+                if apagadas and self._fts:
+                    conn.execute("INSERT INTO logs_fts (logs_fts) VALUES ('optimize')")
+        except sqlite3.Error as e:
+            print(f"[Logs] Erro na limpeza: {e}")
+            return 0
+        if apagadas:
+            print(f"[Logs] Retenção: {apagadas} entradas antigas apagadas")
+        return apagadas
+
+    # ── consultas ─────────────────────────────────────────────
+
+    def consultar(
+        self,
+        texto: str = "",
+        acao: str = None,
+        username: str = None,
+        desde: str = None,
+        ate: str = None,
+        antes_de: int = None,
+        limite: int = 200,
+    ) -> list:
+        """
+        Página de logs do mais novo para o mais antigo. Para a próxima
+        página, passe em `antes_de` o `id` da última linha recebida.
+        `desde`/`ate` são ISO 8601 comparados com `criado_em`.
+        """
+        where, params = [], []
+        if acao:
+            where.append("l.acao = ?")
+            params.append(acao)
+        if username:
+            where.append("l.username = ?")
+            params.append(username)
+        if desde:
+            where.append("l.criado_em >= ?")
+            params.append(desde)
+        if ate:
+            where.append("l.criado_em <= ?")
+            params.append(ate)
+        if antes_de is not None:
+            where.append("l.id < ?")
+            params.append(antes_de)
+
+        texto = (texto or "").strip()
+        if texto and self._fts and _termos_fts(texto):
+            where.append("l.id IN (SELECT rowid FROM logs_fts WHERE logs_fts MATCH ?)")
+            params.append(_termos_fts(texto))
+        elif texto:
+            where.append("(l.acao LIKE ? OR l.username LIKE ? OR l.detalhes LIKE ?)")
+            params += [f"%{texto}%"] * 3
+
+        sql = "SELECT l.id, l.criado_em, l.acao, l.username, l.detalhes FROM logs l"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY l.id DESC LIMIT ?"
+        params.append(limite)
+        try:
+            return [dict(r) for r in self._conexao().execute(sql, params)]
+        except sqlite3.Error as e:
+            print(f"[Logs] Erro na consulta: {e}")
+            return []
+
+    def listar(self, limite: int = 200) -> list:
+        """As `limite` entradas mais recentes, da mais nova para a mais antiga."""
+        return self.consultar(limite=limite)
+
+    def acoes(self) -> list:
+        """Ações distintas já registradas (para filtros)."""
+        cur = self._conexao().execute("SELECT DISTINCT acao FROM logs ORDER BY acao")
+        return [r[0] for r in cur]
+
+    def usuarios(self) -> list:
+        """Usernames distintos já registrados (para filtros)."""
+        cur = self._conexao().execute(
+            "SELECT DISTINCT username FROM logs WHERE username IS NOT NULL "
+            "ORDER BY username"
+        )
+        return [r[0] for r in cur]
 
     def on_novo_log(self, callback):
         """Registra callback chamado sempre que um novo log é salvo."""
         self._listeners.append(callback)
 
-    def forcar_salvar(self):
-        pass
+    def forcar_salvar(self, timeout: float = 5.0) -> bool:
+        """Grava tudo o que está na fila e espera o escritor terminar."""
+        aviso = threading.Event()
+        self._fila.put(aviso)
+        return aviso.wait(timeout)
+
+    # ── migração ──────────────────────────────────────────────
+
+    def _importar_legado(self, conn: sqlite3.Connection):
+        """Importa uma única vez o admin_logs.json e os segmentos JSONL."""
+        entradas, arquivos = [], []
+        if LOGS_FILE.exists():
+            try:
+                # O array guarda da mais nova para a mais antiga
+                entradas += reversed(
+                    json.loads(LOGS_FILE.read_text(encoding="utf-8")) or []
+                )
+                arquivos.append(LOGS_FILE)
+            except Exception as e:
+                print(f"[Logs] Erro ao ler {LOGS_FILE.name}: {e}")
+        segmentos = sorted(LOGS_DIR.glob("admin_logs.*.jsonl"))
+        if SEGMENTO_ATIVO.exists():
+            segmentos.append(SEGMENTO_ATIVO)
+        for seg in segmentos:
+            with open(seg, encoding="utf-8") as f:
+                for linha in f:
+                    try:
+                        entradas.append(json.loads(linha))
+                    except ValueError:
+                        continue  # linha truncada
+            arquivos.append(seg)
+        if not arquivos:
+            return
+
+        with conn:
+            self._inserir(conn, entradas)
+        destino = LOGS_DIR / "migrado"
+        destino.mkdir(exist_ok=True)
+        for arq in arquivos:
+            arq.replace(destino / arq.name)
+        print(f"[Logs] {len(entradas)} entradas importadas para {LOGS_DB.name}")
 
 
 _logs = GerenciadorLogs()
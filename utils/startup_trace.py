@@ -0,0 +1,166 @@
+"""
+Trace de inicialização — onde vai o tempo entre o launch e os primeiros dados.
+
+Ligado por `RCC_TRACE_INICIO=1` ou pela flag `--trace-inicio`. Registra
+imports, criação do QApplication, primeira pintura da janela, criação de
+cada página e a primeira entrega de dados por chave de fetch. O relatório
+vai para %LOCALAPPDATA%/RCC/trace_inicio.txt quando o app fecha (ou após
+`_ESPERA_RELATORIO` segundos). Desligado, cada chamada é um `if` e nada mais.
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+_T0 = time.perf_counter()
+_ESPERA_RELATORIO = 30_000  # ms
+
+# Pacotes pesados que não deveriam carregar antes da primeira pintura
+_VIGIADOS = ("supabase", "httpx", "websockets", "asyncio")
+
+ativo = os.getenv("RCC_TRACE_INICIO", "") not in ("", "0") or (
+    "--trace-inicio" in sys.argv
+)
+
+_eventos: list[tuple[float, str, str]] = []  # (ms desde o início, evento, detalhe)
+_vistos: set[str] = set()
+_lock = threading.Lock()
+_gravado = False
+
+
+def _agora() -> float:
+    return (time.perf_counter() - _T0) * 1000
+
+
+def marcar(evento: str, detalhe: str = ""):
+    """Registra um instante; `thread` vai no detalhe quando não é a principal."""
+    if not ativo:
+        return
+    t = threading.current_thread()
+    if t is not threading.main_thread():
+        detalhe = f"{detalhe} [{t.name}]".strip()
+    with _lock:
+        _eventos.append((_agora(), evento, detalhe))
+
+
+def primeira_vez(evento: str, detalhe: str = ""):
+    """Como `marcar`, mas só a primeira ocorrência de cada evento conta."""
+    if not ativo:
+        return
+    with _lock:
+        if evento in _vistos:
+            return
+        _vistos.add(evento)
+    marcar(evento, detalhe)
+
+
+@contextmanager
+def medir(evento: str):
+    """Marca a duração do bloco (ex.: um grupo de imports)."""
+    if not ativo:
+        yield
+        return
+    inicio = _agora()
+    try:
+        yield
+    finally:
+        marcar(evento, f"{_agora() - inicio:.1f}ms")
+
+
+# ── Imports pesados ────────────────────────────────────────────
+
+
+class _VigiaImports:
+    """Meta path finder que só anota quando um pacote vigiado é importado."""
+
+    def find_spec(self, nome, path=None, alvo=None):
+        if nome in _VIGIADOS:
+            primeira_vez(f"import {nome}")
+        return None  # deixa os finders normais resolverem
+
+
+# ── Primeira pintura ───────────────────────────────────────────
+
+
+def observar_pintura(janela):
+    """Marca o primeiro Paint da janela principal."""
+    if not ativo:
+        return
+    from PyQt6.QtCore import QObject, QEvent
+
+    class _Filtro(QObject):
+        def eventFilter(self, obj, ev):
+            if ev.type() == QEvent.Type.Paint:
+                primeira_vez("primeira pintura")
+                obj.removeEventFilter(self)
+            return False
+
+    janela._filtro_trace = _Filtro(janela)
+    janela.installEventFilter(janela._filtro_trace)
+
+
+# ── Relatório ──────────────────────────────────────────────────
+
+
+def _caminho() -> Path:
+    base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    return Path(base) / "RCC" / "trace_inicio.txt"
+
+
+def gravar_relatorio():
+    """Escreve o relatório (uma vez só) e devolve o caminho."""
+    global _gravado
+    if not ativo or _gravado:
+        return None
+    _gravado = True
+    with _lock:
+        eventos = sorted(_eventos)
+    linhas = [
+        f"RCC Admin — trace de inicialização ({time.strftime('%Y-%m-%d %H:%M:%S')})",
+        "",
+    ]
+    anterior = 0.0
+    for t, evento, detalhe in eventos:
+        linhas.append(f"{t:9.1f}ms  +{t - anterior:7.1f}  {evento:<32} {detalhe}")
+        anterior = t
+    pintura = next((t for t, e, _ in eventos if e == "primeira pintura"), None)
+    if pintura is not None:
+        # Só conta o que travou a thread principal; as de fundo vêm com [nome]
+        vigiados = {f"import {n}" for n in _VIGIADOS}
+        cedo = [
+            e for t, e, d in eventos if e in vigiados and t < pintura and "[" not in d
+        ]
+        linhas += [
+            "",
+            "Pesados na thread principal antes da 1ª pintura: "
+            + (", ".join(cedo) or "nenhum"),
+        ]
+    caminho = _caminho()
+    try:
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        caminho.write_text("\n".join(linhas) + "\n", encoding="utf-8")
+        print(f"[Trace] Relatório em {caminho}")
+    except OSError as e:
+        print(f"[Trace] Não foi possível gravar o relatório: {e}")
+        return None
+    return caminho
+
+
+def agendar_relatorio(app):
+    """Grava ao sair do app ou, no máximo, `_ESPERA_RELATORIO` ms depois."""
+    if not ativo:
+        return
+    from PyQt6.QtCore import QTimer
+
+    app.aboutToQuit.connect(gravar_relatorio)
+    QTimer.singleShot(_ESPERA_RELATORIO, gravar_relatorio)
+
+
+if ativo:
+    sys.meta_path.insert(0, _VigiaImports())
+    for _nome in _VIGIADOS:
+        if _nome in sys.modules:
+            primeira_vez(f"import {_nome}", "já carregado")
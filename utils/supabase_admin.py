@@ -1,23 +1,23 @@
+import json
 import os
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
-from dotenv import load_dotenv
-from supabase import create_client, Client
+from pathlib import Path
+from config import SUPABASE_URL, SUPABASE_SERVICE_KEY  # noqa: F401 (carrega o .env)
+from utils.cliente_pool import obter_pool, submeter_consulta
 
-load_dotenv()
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 BASICO_ID = os.getenv("PLANO_BASICO_ID", "11111111-1111-1111-1111-111111111111")
 
 
-def _cliente() -> Client:
-    return create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+def _cliente():
+    """Empresta um cliente do pool global — use sempre com `with _cliente() as cli:`."""
+    return obter_pool().cliente()
 
 
 # ═══════════════════════════════════════════════════════════════
-# LOGS — arquivo JSON local via logs_manager
+# LOGS — trilha de auditoria local (SQLite) via logs_manager
 # ═══════════════════════════════════════════════════════════════
 
 try:
@@ -34,17 +34,275 @@ except ImportError:
         def listar(self, limite=200):
             return []
 
+        def consultar(self, *a, **kw):
+            return []
+
+        def acoes(self):
+            return []
+
+        def usuarios(self):
+            return []
+
     _logs = _LogsMudo()
 
 
+# ═══════════════════════════════════════════════════════════════
+# IDENTIDADES — username/plano já vistos, para montar logs sem ida ao banco
+# ═══════════════════════════════════════════════════════════════
+
+_identidades: dict[str, dict] = {}
+_identidades_lock = threading.Lock()
+
+
+def lembrar_identidade(user_id: str, **campos):
+    """Guarda username/plano_nome/expira_em conhecidos de um usuário."""
+    campos = {k: v for k, v in campos.items() if v is not None}
+    if not user_id or not campos:
+        return
+    with _identidades_lock:
+        _identidades.setdefault(user_id, {}).update(campos)
+
+
+def _identidade(user_id: str) -> dict:
+    with _identidades_lock:
+        return dict(_identidades.get(user_id, {}))
+
+
+def _lembrar_linhas(linhas: list, chave: str = "user_id"):
+    for l in linhas or []:
+        lembrar_identidade(
+            l.get(chave),
+            username=l.get("username"),
+            plano_nome=l.get("plano_nome"),
+            expira_em=l.get("expira_em"),
+        )
+
+
+# ═══════════════════════════════════════════════════════════════
+# TABELAS CRUAS — usadas pelo EntityStore
+# ═══════════════════════════════════════════════════════════════
+
+
+def listar_tabela(
+    tabela: str, ordem: str, colunas: str = "*", lote: int = 1000
+) -> list:
+    """
+    Baixa a tabela inteira em blocos de `lote` linhas (limite do PostgREST),
+    ordenada por `ordem` para a paginação ser estável.
+    Diferente dos listar_* de tela, propaga erros: o store não pode trocar
+    uma tabela válida por uma lista vazia só porque a rede falhou.
+    """
+    linhas = []
+    with _cliente() as cli:
+        inicio = 0
+        while True:
+            r = (
+                cli.table(tabela)
+                .select(colunas)
+                .order(ordem)
+                .range(inicio, inicio + lote - 1)
+                .execute()
+            )
+            linhas.extend(r.data or [])
+            if len(r.data or []) < lote:
+                return linhas
+            inicio += lote
+
+
+_COLUNAS_MARCA = ("updated_at", "atualizado_em", "criado_em")
+_marca_por_tabela: dict[str, str | None] = {}  # tabela → coluna que funcionou
+
+
+def _coluna_ausente(e: Exception) -> bool:
+    """42703: a coluna do filtro não existe na tabela."""
+    return getattr(e, "code", None) == "42703" or "42703" in str(e)
+
+
+def listar_desde(
+    tabela: str,
+    desde: str,
+    maximo: int = 2000,
+    lote: int = 1000,
+    so_insercoes: bool = False,
+) -> list | None:
+    """
+    Linhas de `tabela` alteradas/criadas depois de `desde` (ISO 8601), pela
+    primeira coluna de _COLUNAS_MARCA que a tabela tiver, em blocos de
+    `lote` linhas (limite do PostgREST). Usado para cobrir a lacuna depois
+    de uma queda do Realtime.
+    None quando não dá para responder só com o delta — tabela sem coluna
+    de data, mais de `maximo` linhas, ou só criado_em numa tabela que
+    também recebe UPDATE (`so_insercoes` falso): aí vale recarregar a
+    tabela toda.
+    """
+    colunas = (
+        (_marca_por_tabela[tabela],) if tabela in _marca_por_tabela else _COLUNAS_MARCA
+    )
+    with _cliente() as cli:
+        for coluna in colunas:
+            if coluna is None:
+                break
+            if coluna == "criado_em" and not so_insercoes:
+                return None  # só traria os INSERTs; UPDATEs da queda sumiriam
+            linhas = []
+            try:
+                while True:
+                    r = (
+                        cli.table(tabela)
+                        .select("*")
+                        .gt(coluna, desde)
+                        .order(coluna)
+                        .range(len(linhas), len(linhas) + lote - 1)
+                        .execute()
+                    )
+                    linhas.extend(r.data or [])
+                    if len(r.data or []) < lote or len(linhas) > maximo:
+                        break
+            except Exception as e:
+                if not _coluna_ausente(e):
+                    raise
+                continue
+            _marca_por_tabela[tabela] = coluna
+            return None if len(linhas) > maximo else linhas
+    _marca_por_tabela[tabela] = None
+    return None
+
+
+# ═══════════════════════════════════════════════════════════════
+# CACHE DE REFERÊNCIA — planos e módulos quase nunca mudam
+# ═══════════════════════════════════════════════════════════════
+
+_TTL_REFERENCIA = float(os.getenv("RCC_TTL_REFERENCIA", "300"))
+
+
+class _CacheTTL:
+    """
+    Um valor com TTL e stale-while-revalidate. Dentro do TTL é servido da
+    memória; vencido, o valor antigo é servido e revalidado numa thread;
+    invalidado (ou nunca carregado), é buscado na hora por quem pediu.
+    Erro na busca não apaga o último valor bom.
+    """
+
+    def __init__(self, nome: str, buscar, ttl: float):
+        self._nome = nome
+        self._buscar = buscar
+        self._ttl = ttl
+        self._valor = None
+        self._em = 0.0
+        self._versao = 0  # muda a cada invalidação: busca antiga não grava
+        self._revalidando = False
+        self._lock = threading.Lock()
+        self.stats = {
+            "acertos": 0,
+            "velhos": 0,
+            "faltas": 0,
+            "revalidacoes": 0,
+            "invalidacoes": 0,
+            "erros": 0,
+        }
+
+    def obter(self, fresco: bool = False) -> list:
+        with self._lock:
+            valor, versao = self._valor, self._versao
+            if valor is not None and not fresco:
+                if time.monotonic() - self._em < self._ttl:
+                    self.stats["acertos"] += 1
+                    return list(valor)
+                self.stats["velhos"] += 1
+                if not self._revalidando:
+                    self._revalidando = True
+                    threading.Thread(
+                        target=self._revalidar,
+                        args=(versao,),
+                        daemon=True,
+                        name=f"Revalidar-{self._nome}",
+                    ).start()
+                return list(valor)
+            self.stats["faltas"] += 1
+        try:
+            return list(self._carregar(versao))
+        except Exception:
+            if valor is None:
+                raise
+            with self._lock:
+                self.stats["erros"] += 1
+            print(f"[Cache] {self._nome}: erro ao atualizar, servindo o anterior")
+            return list(valor)
+
+    def invalidar(self):
+        with self._lock:
+            self._valor = None
+            self._versao += 1
+            self.stats["invalidacoes"] += 1
+
+    def _carregar(self, versao: int) -> list:
+        valor = self._buscar() or []
+        with self._lock:
+            if versao == self._versao:
+                self._valor, self._em = valor, time.monotonic()
+        return valor
+
+    def _revalidar(self, versao: int):
+        try:
+            self._carregar(versao)
+            with self._lock:
+                self.stats["revalidacoes"] += 1
+        except Exception as e:
+            with self._lock:
+                self.stats["erros"] += 1
+            print(f"[Cache] {self._nome}: revalidação falhou: {e}")
+        finally:
+            with self._lock:
+                self._revalidando = False
+
+
+def _buscar_modulos() -> list:
+    with _cliente() as cli:
+        return cli.table("modulos").select("*").order("nome").execute().data
+
+
+def _buscar_planos() -> list:
+    with _cliente() as cli:
+        return (
+            cli.table("planos")
+            .select("*, planos_modulos(modulo_id)")
+            .order("nome")
+            .execute()
+            .data
+        )
+
+
+_cache_modulos = _CacheTTL("modulos", _buscar_modulos, _TTL_REFERENCIA)
+_cache_planos = _CacheTTL("planos", _buscar_planos, _TTL_REFERENCIA)
+
+# Tabela do Realtime → caches que ela torna inválidos
+_INVALIDA = {
+    "modulos": (_cache_modulos,),
+    "planos": (_cache_planos,),
+    "planos_modulos": (_cache_planos,),
+}
+
+
+def invalidar_referencia(tabela: str):
+    """Descarta o cache afetado por mudança em `tabela` (Realtime ou escrita local)."""
+    for cache in _INVALIDA.get(tabela, ()):
+        cache.invalidar()
+
+
+def estatisticas_referencia() -> dict:
+    """{"planos": {acertos, velhos, faltas, ...}, "modulos": {...}}."""
+    return {"planos": dict(_cache_planos.stats), "modulos": dict(_cache_modulos.stats)}
+
+
 # ═══════════════════════════════════════════════════════════════
 # MÓDULOS
 # ═══════════════════════════════════════════════════════════════
 
 
-def listar_modulos() -> list:
+def listar_modulos(fresco: bool = False) -> list:
+    """Do cache de referência; `fresco=True` ignora o TTL e busca agora."""
     try:
-        return _cliente().table("modulos").select("*").order("nome").execute().data
+        return _cache_modulos.obter(fresco)
     except Exception as e:
         print(f"Erro ao listar módulos: {e}")
         return []
@@ -52,64 +310,77 @@ def listar_modulos() -> list:
 
 def criar_modulo(id_modulo: str, nome: str, descricao: str = "") -> tuple[bool, str]:
     try:
-        _cliente().table("modulos").insert(
-            {
-                "id": id_modulo.lower().replace(" ", "_"),
-                "nome": nome,
-                "descricao": descricao,
-                "ativo": True,
-            }
-        ).execute()
-        _logs.registrar("criar_modulo", detalhes={"nome": nome, "modulo": id_modulo})
-        return True, "Módulo criado."
+        with _cliente() as cli:
+            cli.table("modulos").insert(
+                {
+                    "id": id_modulo.lower().replace(" ", "_"),
+                    "nome": nome,
+                    "descricao": descricao,
+                    "ativo": True,
+                }
+            ).execute()
+            _logs.registrar(
+                "criar_modulo", detalhes={"nome": nome, "modulo": id_modulo}
+            )
+            return True, "Módulo criado."
     except Exception as e:
         return False, f"Erro: {e}"
+    finally:
+        invalidar_referencia("modulos")
 
 
 def editar_modulo(id_modulo: str, nome: str, descricao: str) -> tuple[bool, str]:
     try:
-        _cliente().table("modulos").update({"nome": nome, "descricao": descricao}).eq(
-            "id", id_modulo
-        ).execute()
-        _logs.registrar("editar_modulo", detalhes={"nome": nome, "modulo": id_modulo})
-        return True, "Módulo atualizado."
+        with _cliente() as cli:
+            cli.table("modulos").update({"nome": nome, "descricao": descricao}).eq(
+                "id", id_modulo
+            ).execute()
+            _logs.registrar(
+                "editar_modulo", detalhes={"nome": nome, "modulo": id_modulo}
+            )
+            return True, "Módulo atualizado."
     except Exception as e:
         return False, f"Erro: {e}"
+    finally:
+        invalidar_referencia("modulos")
 
 
 def ativar_modulo(id_modulo: str, ativo: bool) -> tuple[bool, str]:
     try:
-        _cliente().table("modulos").update({"ativo": ativo}).eq(
-            "id", id_modulo
-        ).execute()
-        _logs.registrar(
-            "ativar_modulo" if ativo else "desativar_modulo",
-            detalhes={"modulo": id_modulo},
-        )
-        return True, "Módulo atualizado."
+        with _cliente() as cli:
+            cli.table("modulos").update({"ativo": ativo}).eq("id", id_modulo).execute()
+            _logs.registrar(
+                "ativar_modulo" if ativo else "desativar_modulo",
+                detalhes={"modulo": id_modulo},
+            )
+            return True, "Módulo atualizado."
     except Exception as e:
         return False, f"Erro: {e}"
+    finally:
+        invalidar_referencia("modulos")
 
 
 def excluir_modulo(modulo_id: str) -> tuple[bool, str]:
     try:
-        vinculado = (
-            _cliente()
-            .table("planos_modulos")
-            .select("plano_id")
-            .eq("modulo_id", modulo_id)
-            .execute()
-        )
-        if vinculado.data:
-            return (
-                False,
-                "Módulo vinculado a um ou mais planos. Remova-o dos planos antes.",
+        with _cliente() as cli:
+            vinculado = (
+                cli.table("planos_modulos")
+                .select("plano_id")
+                .eq("modulo_id", modulo_id)
+                .execute()
             )
-        _cliente().table("modulos").delete().eq("id", modulo_id).execute()
-        _logs.registrar("excluir_modulo", detalhes={"modulo_id": modulo_id})
-        return True, "Módulo excluído."
+            if vinculado.data:
+                return (
+                    False,
+                    "Módulo vinculado a um ou mais planos. Remova-o dos planos antes.",
+                )
+            cli.table("modulos").delete().eq("id", modulo_id).execute()
+            _logs.registrar("excluir_modulo", detalhes={"modulo_id": modulo_id})
+            return True, "Módulo excluído."
     except Exception as e:
         return False, str(e)
+    finally:
+        invalidar_referencia("modulos")
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -117,16 +388,10 @@ def excluir_modulo(modulo_id: str) -> tuple[bool, str]:
 # ═══════════════════════════════════════════════════════════════
 
 
-def listar_planos() -> list:
+def listar_planos(fresco: bool = False) -> list:
+    """Do cache de referência; `fresco=True` ignora o TTL e busca agora."""
     try:
-        return (
-            _cliente()
-            .table("planos")
-            .select("*, planos_modulos(modulo_id)")
-            .order("nome")
-            .execute()
-            .data
-        )
+        return _cache_planos.obter(fresco)
     except Exception as e:
         print(f"Erro ao listar planos: {e}")
         return []
@@ -134,204 +399,358 @@ def listar_planos() -> list:
 
 def criar_plano(nome: str, descricao: str, modulos: list) -> tuple[bool, str]:
     try:
-        r = (
-            _cliente()
-            .table("planos")
-            .insert({"nome": nome, "descricao": descricao, "ativo": True})
-            .execute()
-        )
-        plano_id = r.data[0]["id"]
-        if modulos:
-            _cliente().table("planos_modulos").insert(
-                [{"plano_id": plano_id, "modulo_id": m} for m in modulos]
-            ).execute()
-        _logs.registrar("criar_plano", detalhes={"nome": nome})
-        return True, "Plano criado."
+        with _cliente() as cli:
+            r = (
+                cli.table("planos")
+                .insert({"nome": nome, "descricao": descricao, "ativo": True})
+                .execute()
+            )
+            plano_id = r.data[0]["id"]
+            if modulos:
+                cli.table("planos_modulos").insert(
+                    [{"plano_id": plano_id, "modulo_id": m} for m in modulos]
+                ).execute()
+            _logs.registrar("criar_plano", detalhes={"nome": nome})
+            return True, "Plano criado."
     except Exception as e:
         return False, f"Erro: {e}"
+    finally:
+        invalidar_referencia("planos")
 
 
 def editar_plano(plano_id: str, nome: str, descricao: str) -> tuple[bool, str]:
     try:
-        _cliente().table("planos").update({"nome": nome, "descricao": descricao}).eq(
-            "id", plano_id
-        ).execute()
-        _logs.registrar("editar_plano", detalhes={"nome": nome})
-        return True, "Plano atualizado."
+        with _cliente() as cli:
+            cli.table("planos").update({"nome": nome, "descricao": descricao}).eq(
+                "id", plano_id
+            ).execute()
+            _logs.registrar("editar_plano", detalhes={"nome": nome})
+            return True, "Plano atualizado."
     except Exception as e:
         return False, f"Erro: {e}"
+    finally:
+        invalidar_referencia("planos")
 
 
 def adicionar_modulo_plano(plano_id: str, modulo_id: str) -> tuple[bool, str]:
     try:
-        _cliente().table("planos_modulos").insert(
-            {"plano_id": plano_id, "modulo_id": modulo_id}
-        ).execute()
-        return True, "Módulo adicionado."
+        with _cliente() as cli:
+            cli.table("planos_modulos").insert(
+                {"plano_id": plano_id, "modulo_id": modulo_id}
+            ).execute()
+            return True, "Módulo adicionado."
     except Exception as e:
         return False, f"Erro: {e}"
+    finally:
+        invalidar_referencia("planos")
 
 
 def remover_modulo_plano(plano_id: str, modulo_id: str) -> tuple[bool, str]:
     try:
-        _cliente().table("planos_modulos").delete().eq("plano_id", plano_id).eq(
-            "modulo_id", modulo_id
-        ).execute()
-        return True, "Módulo removido."
+        with _cliente() as cli:
+            cli.table("planos_modulos").delete().eq("plano_id", plano_id).eq(
+                "modulo_id", modulo_id
+            ).execute()
+            return True, "Módulo removido."
     except Exception as e:
         return False, f"Erro: {e}"
+    finally:
+        invalidar_referencia("planos")
 
 
 def ativar_plano(plano_id: str, ativo: bool) -> tuple[bool, str]:
     try:
-        plano = (
-            _cliente()
-            .table("planos")
-            .select("nome")
-            .eq("id", plano_id)
-            .single()
-            .execute()
-        )
-        nome_plano = plano.data.get("nome", "?") if plano.data else "?"
-        _cliente().table("planos").update({"ativo": ativo}).eq("id", plano_id).execute()
-        acao = "ativar_plano" if ativo else "desativar_plano"
-        _logs.registrar(acao, detalhes={"nome": nome_plano})
-        return True, "Plano atualizado."
+        with _cliente() as cli:
+            plano = (
+                cli.table("planos").select("nome").eq("id", plano_id).single().execute()
+            )
+            nome_plano = plano.data.get("nome", "?") if plano.data else "?"
+            cli.table("planos").update({"ativo": ativo}).eq("id", plano_id).execute()
+            acao = "ativar_plano" if ativo else "desativar_plano"
+            _logs.registrar(acao, detalhes={"nome": nome_plano})
+            return True, "Plano atualizado."
     except Exception as e:
         return False, f"Erro: {e}"
+    finally:
+        invalidar_referencia("planos")
 
 
 def excluir_plano(plano_id: str) -> bool:
     try:
-        plano = (
-            _cliente()
-            .table("planos")
-            .select("nome")
-            .eq("id", plano_id)
-            .single()
-            .execute()
-        )
-        nome_plano = plano.data.get("nome", "?") if plano.data else "?"
-        _cliente().table("planos_modulos").delete().eq("plano_id", plano_id).execute()
-        _cliente().table("planos").delete().eq("id", plano_id).execute()
-        _logs.registrar("excluir_plano", detalhes={"nome": nome_plano})
-        return True
+        with _cliente() as cli:
+            plano = (
+                cli.table("planos").select("nome").eq("id", plano_id).single().execute()
+            )
+            nome_plano = plano.data.get("nome", "?") if plano.data else "?"
+            cli.table("planos_modulos").delete().eq("plano_id", plano_id).execute()
+            cli.table("planos").delete().eq("id", plano_id).execute()
+            _logs.registrar("excluir_plano", detalhes={"nome": nome_plano})
+            return True
     except Exception as e:
         print(f"Erro ao excluir plano: {e}")
         return False
+    finally:
+        invalidar_referencia("planos")
 
 
 # ═══════════════════════════════════════════════════════════════
-# USUÁRIOS
+# PAGINAÇÃO — keyset por (criado_em, id), busca no servidor com ilike
 # ═══════════════════════════════════════════════════════════════
 
+_PAGINA = 100
 
-def listar_usuarios() -> list:
-    try:
-        # 2 queries em vez de N+1
-        perfis = (
-            _cliente()
-            .table("perfis")
-            .select("*")
-            .order("criado_em", desc=True)
-            .execute()
+
+def _termo_ilike(busca: str) -> str:
+    """Padrão `%busca%` com os curingas digitados pelo usuário escapados."""
+    escapado = busca.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escapado}%"
+
+
+def _pagina_keyset(consulta, cursor: dict | None, limite: int) -> dict:
+    """
+    Executa `consulta` ordenada por criado_em/id decrescentes a partir do
+    cursor. Pede uma linha a mais para saber se existe próxima página.
+    """
+    if cursor:
+        c, i = cursor["criado_em"], cursor["id"]
+        consulta = consulta.or_(
+            f'criado_em.lt."{c}",and(criado_em.eq."{c}",id.lt."{i}")'
         )
-        if not perfis.data:
-            return []
-        # Busca todas as assinaturas ativas de uma vez
-        ids = [p["id"] for p in perfis.data]
-        ass_todas = (
-            _cliente()
-            .table("v_assinaturas")
+    linhas = (
+        consulta.order("criado_em", desc=True)
+        .order("id", desc=True)
+        .range(0, limite)
+        .execute()
+        .data
+        or []
+    )
+    proximo = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        proximo = {"criado_em": linhas[-1]["criado_em"], "id": linhas[-1]["id"]}
+    return {"linhas": linhas, "cursor": proximo}
+
+
+_VIEW_USUARIOS = "v_usuarios_com_assinatura"
+_view_usuarios_ausente_ate = 0.0
+
+
+def _relacao_ausente(e: Exception) -> bool:
+    """PGRST205 / 42P01: a tabela ou view não existe no schema."""
+    codigo = getattr(e, "code", None)
+    return codigo in ("PGRST205", "42P01") or any(
+        c in str(e) for c in ("PGRST205", "42P01")
+    )
+
+
+def _anexar_assinaturas(cli, perfis: list) -> list:
+    """Preenche `assinatura` de cada perfil com in_() em blocos curtos."""
+    por_usuario = {}
+    for bloco in _em_blocos([p["id"] for p in perfis]):
+        r = (
+            cli.table("v_assinaturas")
             .select("*")
             .eq("ativo", True)
-            .in_("user_id", ids)
+            .in_("user_id", bloco)
+            .order("criado_em", desc=True)
             .execute()
         )
-        # Indexa por user_id (pega a mais recente de cada usuário)
-        ass_map = {}
-        for a in ass_todas.data or []:
-            uid = a.get("user_id")
-            if uid not in ass_map:
-                ass_map[uid] = a
-        for p in perfis.data:
-            p["assinatura"] = ass_map.get(p["id"])
-        return perfis.data
-    except Exception as e:
-        print(f"Erro ao listar usuários: {e}")
-        return []
+        for a in r.data or []:
+            por_usuario.setdefault(a.get("user_id"), a)
+    for p in perfis:
+        p["assinatura"] = por_usuario.get(p["id"])
+    return perfis
+
+
+def _perfis_com_assinatura(cli, montar) -> dict:
+    """
+    Executa `montar(consulta)` sobre a view v_usuarios_com_assinatura, que
+    já traz cada perfil com a assinatura ativa mais recente em `assinatura`:
+
+        create view v_usuarios_com_assinatura as
+        select p.*, (select to_jsonb(a) from v_assinaturas a
+                     where a.user_id = p.id and a.ativo
+                     order by a.criado_em desc limit 1) as assinatura
+        from perfis p;
+
+    Sem a view no banco, consulta `perfis` e anexa as assinaturas com
+    in_() em blocos. `montar` devolve uma página {"linhas", "cursor"}.
+    """
+    global _view_usuarios_ausente_ate
+    pagina = None
+    if time.monotonic() >= _view_usuarios_ausente_ate:
+        try:
+            pagina = montar(cli.table(_VIEW_USUARIOS).select("*"))
+        except Exception as e:
+            if not _relacao_ausente(e):
+                raise
+            _view_usuarios_ausente_ate = time.monotonic() + _RPC_SNAPSHOT_RETENTAR
+            print(f"[Usuarios] {_VIEW_USUARIOS} ausente — usando in_() em blocos")
+    if pagina is None:
+        pagina = montar(cli.table("perfis").select("*"))
+        _anexar_assinaturas(cli, pagina["linhas"])
+    _lembrar_linhas(pagina["linhas"], chave="id")
+    _lembrar_linhas([p["assinatura"] for p in pagina["linhas"] if p.get("assinatura")])
+    return pagina
+
+
+def pagina_usuarios(busca: str = "", cursor=None, limite: int = _PAGINA) -> dict:
+    """
+    Uma página de perfis (com a assinatura ativa) filtrada por username.
+    Devolve {"linhas", "cursor"}; cursor None quando não há mais páginas.
+    Erros sobem para o DataService, que entrega None à tela.
+    """
+
+    def _montar(consulta):
+        if busca.strip():
+            consulta = consulta.ilike("username", _termo_ilike(busca.strip()))
+        return _pagina_keyset(consulta, cursor, limite)
+
+    with _cliente() as cli:
+        return _perfis_com_assinatura(cli, _montar)
+
+
+def pagina_assinaturas(busca: str = "", cursor=None, limite: int = _PAGINA) -> dict:
+    """
+    Página da tela de assinaturas: primeiro as assinaturas pagas ativas,
+    depois os usuários sem nenhuma (marcados com `_sem_assinatura`).
+    O cursor guarda a fase: {"fase": "ass" | "sem", "pos": cursor keyset}.
+    """
+    cursor = cursor or {"fase": "ass", "pos": None}
+    termo = _termo_ilike(busca.strip()) if busca.strip() else None
+    with _cliente() as cli:
+        if cursor["fase"] == "ass":
+            consulta = (
+                cli.table("v_assinaturas")
+                .select("*")
+                .eq("ativo", True)
+                .neq("plano_id", BASICO_ID)
+            )
+            if termo:
+                consulta = consulta.ilike("username", termo)
+            pagina = _pagina_keyset(consulta, cursor["pos"], limite)
+            _lembrar_linhas(pagina["linhas"])
+            pos = pagina["cursor"]
+            return {
+                "linhas": pagina["linhas"],
+                "cursor": {"fase": "ass" if pos else "sem", "pos": pos},
+            }
+
+        # Fase "sem": perfis sem assinatura paga ativa. Páginas que o filtro
+        # esvazia são puladas para a tabela não receber página em branco.
+        pos = cursor["pos"]
+        while True:
+            consulta = cli.table("perfis").select("*")
+            if termo:
+                consulta = consulta.ilike("username", termo)
+            pagina = _pagina_keyset(consulta, pos, limite)
+            ids = [p["id"] for p in pagina["linhas"]]
+            pagos = set()
+            if ids:
+                r = (
+                    cli.table("v_assinaturas")
+                    .select("user_id")
+                    .eq("ativo", True)
+                    .neq("plano_id", BASICO_ID)
+                    .in_("user_id", ids)
+                    .execute()
+                )
+                pagos = {a.get("user_id") for a in r.data or []}
+            linhas = [
+                {**p, "_sem_assinatura": True}
+                for p in pagina["linhas"]
+                if p["id"] not in pagos
+            ]
+            pos = pagina["cursor"]
+            if linhas or pos is None:
+                _lembrar_linhas(linhas, chave="id")
+                return {
+                    "linhas": linhas,
+                    "cursor": {"fase": "sem", "pos": pos} if pos else None,
+                }
+
+
+# ═══════════════════════════════════════════════════════════════
+# USUÁRIOS
+# ═══════════════════════════════════════════════════════════════
+
+
+def _ja_registrado(msg: str) -> bool:
+    """
+    E-mail já existe no Auth: "User already registered" ou, nas versões
+    novas do GoTrue, "...has already been registered".
+    """
+    return "already registered" in msg or "already been registered" in msg
 
 
 def criar_usuario(username: str, senha: str) -> tuple[bool, str]:
     try:
-        email = f"{username.lower().strip()}@rcc.app"
-        response = _cliente().auth.admin.create_user(
-            {
-                "email": email,
-                "password": senha,
-                "email_confirm": True,
-            }
-        )
-        user_id = response.user.id
-        _cliente().table("perfis").update({"username": username.lower().strip()}).eq(
-            "id", user_id
-        ).execute()
-        _logs.registrar("criar_usuario", detalhes={"username": username})
-        return True, user_id
+        with _cliente() as cli:
+            email = f"{username.lower().strip()}@rcc.app"
+            response = cli.auth.admin.create_user(
+                {
+                    "email": email,
+                    "password": senha,
+                    "email_confirm": True,
+                }
+            )
+            user_id = response.user.id
+            cli.table("perfis").update({"username": username.lower().strip()}).eq(
+                "id", user_id
+            ).execute()
+            _logs.registrar("criar_usuario", detalhes={"username": username})
+            return True, user_id
     except Exception as e:
         msg = str(e)
-        if "already registered" in msg:
+        if _ja_registrado(msg):
             return False, "Username já está em uso."
         return False, f"Erro: {msg}"
 
 
 def editar_username(user_id: str, novo_username: str) -> tuple[bool, str]:
     try:
-        _cliente().table("perfis").update(
-            {"username": novo_username.lower().strip()}
-        ).eq("id", user_id).execute()
-        _logs.registrar("editar_username", detalhes={"username": novo_username})
-        return True, "Username atualizado."
+        with _cliente() as cli:
+            cli.table("perfis").update({"username": novo_username.lower().strip()}).eq(
+                "id", user_id
+            ).execute()
+            _logs.registrar("editar_username", detalhes={"username": novo_username})
+            return True, "Username atualizado."
     except Exception as e:
         return False, f"Erro: {e}"
 
 
+def _username_retornado(resposta, user_id: str) -> str:
+    """Username da linha devolvida pelo update (returning=representation)."""
+    linhas = getattr(resposta, "data", None) or []
+    username = linhas[0].get("username") if linhas else None
+    if username:
+        lembrar_identidade(user_id, username=username)
+    return username or _identidade(user_id).get("username") or user_id
+
+
 def ativar_usuario(user_id: str) -> tuple[bool, str]:
     try:
-        _cliente().auth.admin.update_user_by_id(user_id, {"ban_duration": "none"})
-        _cliente().table("perfis").update({"ativo": True}).eq("id", user_id).execute()
-        perfil = (
-            _cliente()
-            .table("perfis")
-            .select("username")
-            .eq("id", user_id)
-            .single()
-            .execute()
-        )
-        username = perfil.data.get("username", user_id) if perfil.data else user_id
-        _logs.registrar("ativar_usuario", detalhes={"username": username})
-        return True, "Usuário ativado."
+        with _cliente() as cli:
+            cli.auth.admin.update_user_by_id(user_id, {"ban_duration": "none"})
+            # O update já devolve a linha — username vem junto
+            r = cli.table("perfis").update({"ativo": True}).eq("id", user_id).execute()
+            username = _username_retornado(r, user_id)
+            _logs.registrar("ativar_usuario", detalhes={"username": username})
+            return True, "Usuário ativado."
     except Exception as e:
         return False, f"Erro: {e}"
 
 
 def desativar_usuario(user_id: str) -> tuple[bool, str]:
     try:
-        # 1. Ban no Auth — bloqueia novos logins e invalida sessão
-        _cliente().auth.admin.update_user_by_id(user_id, {"ban_duration": "876000h"})
-        # 2. Marca perfil como inativo — NÃO toca em assinaturas
-        _cliente().table("perfis").update({"ativo": False}).eq("id", user_id).execute()
-        perfil = (
-            _cliente()
-            .table("perfis")
-            .select("username")
-            .eq("id", user_id)
-            .single()
-            .execute()
-        )
-        username = perfil.data.get("username", user_id) if perfil.data else user_id
-        _logs.registrar("desativar_usuario", detalhes={"username": username})
-        return True, "Usuário desativado."
+        with _cliente() as cli:
+            # 1. Ban no Auth — bloqueia novos logins e invalida sessão
+            cli.auth.admin.update_user_by_id(user_id, {"ban_duration": "876000h"})
+            # 2. Marca perfil como inativo — NÃO toca em assinaturas
+            r = cli.table("perfis").update({"ativo": False}).eq("id", user_id).execute()
+            username = _username_retornado(r, user_id)
+            _logs.registrar("desativar_usuario", detalhes={"username": username})
+            return True, "Usuário desativado."
     except Exception as e:
         print(f"[desativar_usuario] ERRO: {e}")
         return False, f"Erro: {e}"
@@ -339,27 +758,21 @@ def desativar_usuario(user_id: str) -> tuple[bool, str]:
 
 def resetar_senha(user_id: str, nova_senha: str) -> tuple[bool, str]:
     try:
-        _cliente().auth.admin.update_user_by_id(user_id, {"password": nova_senha})
-        _logs.registrar("resetar_senha", detalhes={"user_id": user_id})
-        return True, "Senha resetada."
+        with _cliente() as cli:
+            cli.auth.admin.update_user_by_id(user_id, {"password": nova_senha})
+            _logs.registrar("resetar_senha", detalhes={"user_id": user_id})
+            return True, "Senha resetada."
     except Exception as e:
         return False, f"Erro: {e}"
 
 
-def deletar_usuario(user_id: str) -> tuple[bool, str]:
+def deletar_usuario(user_id: str, username: str = None) -> tuple[bool, str]:
     try:
-        perfil = (
-            _cliente()
-            .table("perfis")
-            .select("username")
-            .eq("id", user_id)
-            .single()
-            .execute()
-        )
-        username = perfil.data.get("username", user_id) if perfil.data else user_id
-        _cliente().auth.admin.delete_user(user_id)
-        _logs.registrar("deletar_usuario", detalhes={"username": username})
-        return True, "Usuário deletado."
+        username = username or _identidade(user_id).get("username") or user_id
+        with _cliente() as cli:
+            cli.auth.admin.delete_user(user_id)
+            _logs.registrar("deletar_usuario", detalhes={"username": username})
+            return True, "Usuário deletado."
     except Exception as e:
         return False, f"Erro: {e}"
 
@@ -371,7 +784,8 @@ def deletar_usuario(user_id: str) -> tuple[bool, str]:
 
 def listar_sessoes_ativas() -> list:
     try:
-        return _cliente().table("sessoes_ativas").select("user_id").execute().data
+        with _cliente() as cli:
+            return cli.table("sessoes_ativas").select("user_id").execute().data
     except Exception as e:
         print(f"Erro ao listar sessões: {e}")
         return []
@@ -382,60 +796,50 @@ def listar_sessoes_ativas() -> list:
 # ═══════════════════════════════════════════════════════════════
 
 
-def listar_assinaturas() -> list:
+def _nova_expiracao(retorno, expira_antiga: str, dias: int) -> str:
+    """
+    Expiração após renovar: a devolvida pela RPC, se vier; senão a mesma
+    regra da RPC (soma a partir da expiração atual, ou de agora se já venceu).
+    """
+    if isinstance(retorno, list):
+        retorno = retorno[0] if retorno else None
+    if isinstance(retorno, dict):
+        retorno = retorno.get("expira_em")
+    if isinstance(retorno, str) and retorno:
+        return retorno
+    if not expira_antiga:
+        return ""
     try:
-        return (
-            _cliente()
-            .table("v_assinaturas")
-            .select("*")
-            .eq("ativo", True)
-            .neq("plano_id", BASICO_ID)
-            .order("criado_em", desc=True)
-            .execute()
-            .data
-        )
-    except Exception as e:
-        print(f"Erro ao listar assinaturas: {e}")
-        return []
-
-
-def renovar_assinatura(user_id: str, dias: int) -> tuple[bool, str]:
+        base = datetime.fromisoformat(expira_antiga.replace("Z", "+00:00"))
+    except ValueError:
+        return ""
+    return (max(base, datetime.now(timezone.utc)) + timedelta(days=dias)).isoformat()
+
+
+def renovar_assinatura(
+    user_id: str,
+    dias: int,
+    username: str = None,
+    plano_nome: str = None,
+    expira_em: str = None,
+) -> tuple[bool, str]:
+    """username/plano_nome/expira_em vêm da linha da tela ou do cache de identidades."""
     try:
-        # Busca dados antes de renovar para registrar no log
-        perfil = (
-            _cliente()
-            .table("perfis")
-            .select("username")
-            .eq("id", user_id)
-            .single()
-            .execute()
-        )
-        username = perfil.data.get("username", user_id) if perfil.data else user_id
-        ass = (
-            _cliente()
-            .table("v_assinaturas")
-            .select("plano_nome,expira_em")
-            .eq("user_id", user_id)
-            .eq("ativo", True)
-            .limit(1)
-            .execute()
-        )
-        plano_nome = ass.data[0].get("plano_nome", "?") if ass.data else "?"
-        expira_antiga = ass.data[0].get("expira_em", "") if ass.data else ""
-        _cliente().rpc(
-            "renovar_assinatura_admin", {"p_user_id": user_id, "p_dias": dias}
-        ).execute()
-        # Busca nova expiração após renovar
-        ass2 = (
-            _cliente()
-            .table("v_assinaturas")
-            .select("expira_em")
-            .eq("user_id", user_id)
-            .eq("ativo", True)
-            .limit(1)
-            .execute()
+        ident = _identidade(user_id)
+        username = username or ident.get("username") or user_id
+        plano_nome = plano_nome or ident.get("plano_nome") or "?"
+        expira_antiga = expira_em if expira_em is not None else ident.get("expira_em")
+        with _cliente() as cli:
+            r = cli.rpc(
+                "renovar_assinatura_admin", {"p_user_id": user_id, "p_dias": dias}
+            ).execute()
+        expira_nova = _nova_expiracao(r.data, expira_antiga or "", dias)
+        lembrar_identidade(
+            user_id,
+            username=username,
+            plano_nome=None if plano_nome == "?" else plano_nome,
+            expira_em=expira_nova or None,
         )
-        expira_nova = ass2.data[0].get("expira_em", "") if ass2.data else ""
         _logs.registrar(
             "renovar_assinatura",
             detalhes={
@@ -453,28 +857,16 @@ def renovar_assinatura(user_id: str, dias: int) -> tuple[bool, str]:
         return False, f"Erro: {e}"
 
 
-def revogar_assinatura(user_id: str) -> tuple[bool, str]:
+def revogar_assinatura(
+    user_id: str, username: str = None, plano_nome: str = None
+) -> tuple[bool, str]:
     try:
-        perfil = (
-            _cliente()
-            .table("perfis")
-            .select("username")
-            .eq("id", user_id)
-            .single()
-            .execute()
-        )
-        username = perfil.data.get("username", user_id) if perfil.data else user_id
-        ass = (
-            _cliente()
-            .table("v_assinaturas")
-            .select("plano_nome")
-            .eq("user_id", user_id)
-            .eq("ativo", True)
-            .limit(1)
-            .execute()
-        )
-        plano_anterior = ass.data[0].get("plano_nome", "?") if ass.data else "?"
-        _cliente().rpc("revogar_para_basico", {"p_user_id": user_id}).execute()
+        ident = _identidade(user_id)
+        username = username or ident.get("username") or user_id
+        plano_anterior = plano_nome or ident.get("plano_nome") or "?"
+        with _cliente() as cli:
+            cli.rpc("revogar_para_basico", {"p_user_id": user_id}).execute()
+        lembrar_identidade(user_id, plano_nome="Básico", expira_em="")
         _logs.registrar(
             "revogar_assinatura",
             detalhes={"username": username, "plano_anterior": plano_anterior},
@@ -489,17 +881,26 @@ def revogar_assinatura(user_id: str) -> tuple[bool, str]:
 # ═══════════════════════════════════════════════════════════════
 
 
+# Colunas que as telas mostram — nunca senha_real: a lista vai para o
+# cache em disco (cache_local) junto com o snapshot do dashboard
+_COLUNAS_SOLICITACAO = ("id", "username", "status", "criado_em")
+
+
+def _solicitacao_publica(sol: dict) -> dict:
+    return {c: sol.get(c) for c in _COLUNAS_SOLICITACAO if c in sol}
+
+
 def listar_solicitacoes() -> list:
     try:
-        return (
-            _cliente()
-            .table("solicitacoes")
-            .select("*")
-            .eq("status", "pendente")
-            .order("criado_em")
-            .execute()
-            .data
-        )
+        with _cliente() as cli:
+            return (
+                cli.table("solicitacoes")
+                .select(",".join(_COLUNAS_SOLICITACAO))
+                .eq("status", "pendente")
+                .order("criado_em")
+                .execute()
+                .data
+            )
     except Exception as e:
         print(f"Erro ao listar solicitações: {e}")
         return []
@@ -507,120 +908,570 @@ def listar_solicitacoes() -> list:
 
 def aprovar_solicitacao(sol_id: str, username: str, dias: int) -> tuple[bool, str]:
     try:
-        sol = (
-            _cliente()
-            .table("solicitacoes")
-            .select("*")
-            .eq("id", sol_id)
-            .single()
-            .execute()
-        )
-        username = sol.data["username"]
-        senha = sol.data["senha_real"]
-        email = f"{username.lower().strip()}@rcc.app"
-        response = _cliente().auth.admin.create_user(
-            {
-                "email": email,
-                "password": senha,
-                "email_confirm": True,
-            }
-        )
-        user_id = response.user.id
-        _cliente().table("perfis").update({"username": username.lower().strip()}).eq(
-            "id", user_id
-        ).execute()
-        _cliente().table("solicitacoes").update({"status": "aprovado"}).eq(
-            "id", sol_id
-        ).execute()
-        _logs.registrar("aprovar_solicitacao", detalhes={"username": username})
-        return True, f"Usuário '{username}' aprovado."
+        with _cliente() as cli:
+            sol = (
+                cli.table("solicitacoes")
+                .select("*")
+                .eq("id", sol_id)
+                .single()
+                .execute()
+            )
+            username = sol.data["username"]
+            senha = sol.data["senha_real"]
+            email = f"{username.lower().strip()}@rcc.app"
+            response = cli.auth.admin.create_user(
+                {
+                    "email": email,
+                    "password": senha,
+                    "email_confirm": True,
+                }
+            )
+            user_id = response.user.id
+            cli.table("perfis").update({"username": username.lower().strip()}).eq(
+                "id", user_id
+            ).execute()
+            cli.table("solicitacoes").update({"status": "aprovado"}).eq(
+                "id", sol_id
+            ).execute()
+            _logs.registrar("aprovar_solicitacao", detalhes={"username": username})
+            return True, f"Usuário '{username}' aprovado."
     except Exception as e:
         return False, f"Erro: {e}"
 
 
 def rejeitar_solicitacao(sol_id: str) -> tuple[bool, str]:
     try:
-        _cliente().table("solicitacoes").update({"status": "rejeitado"}).eq(
-            "id", sol_id
-        ).execute()
-        _logs.registrar("rejeitar_solicitacao", detalhes={})
-        return True, "Solicitação rejeitada."
+        with _cliente() as cli:
+            cli.table("solicitacoes").update({"status": "rejeitado"}).eq(
+                "id", sol_id
+            ).execute()
+            _logs.registrar("rejeitar_solicitacao", detalhes={})
+            return True, "Solicitação rejeitada."
     except Exception as e:
         return False, f"Erro: {e}"
 
 
+# ── Aprovação em lote ─────────────────────────────────────────
+#
+# Pipeline: (1) busca as solicitações que faltam em blocos in_(),
+# (2) cria os usuários no Auth em paralelo (pool de lotes), (3) grava os
+# usernames em perfis com um upsert por bloco e (4) marca as solicitações
+# como aprovadas com um update in_() por bloco. Só entram solicitações
+# ainda pendentes — outro admin pode ter decidido no meio do caminho.
+# Cada usuário é anotado num diário em disco antes e depois da criação:
+# se o app fechar no meio, a próxima execução retoma sem recriar quem já
+# existe (o "já registrado" de quem estava criando vira o id dele).
+
+_DIARIO_APROVACOES = (
+    Path(os.environ.get("LOCALAPPDATA") or Path.home()) / "RCC" / "aprovacoes.json"
+)
+_diario_lock = threading.Lock()
+
+
+def _ler_diario() -> dict:
+    try:
+        return json.loads(_DIARIO_APROVACOES.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _gravar_diario(diario: dict):
+    if not diario:
+        _DIARIO_APROVACOES.unlink(missing_ok=True)
+        return
+    _DIARIO_APROVACOES.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _DIARIO_APROVACOES.with_suffix(".tmp")
+    tmp.write_text(json.dumps(diario, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(_DIARIO_APROVACOES)
+
+
+def aprovacoes_interrompidas() -> list:
+    """Solicitações de um lote anterior que não chegou ao fim."""
+    with _diario_lock:
+        return [
+            {"id": sol_id, "username": e.get("username")}
+            for sol_id, e in _ler_diario().items()
+        ]
+
+
+_NAO_PENDENTE = "Solicitação não encontrada ou não está mais pendente."
+
+
+def _id_por_email(cli, email: str, lote: int = 1000) -> str | None:
+    """Id do usuário do Auth com este e-mail (o Auth não filtra: pagina)."""
+    pagina = 1
+    while True:
+        usuarios = cli.auth.admin.list_users(page=pagina, per_page=lote) or []
+        for u in usuarios:
+            if (u.email or "").lower() == email:
+                return u.id
+        if len(usuarios) < lote:
+            return None
+        pagina += 1
+
+
+def aprovar_solicitacoes(solicitacoes: list, progresso=None) -> dict:
+    """
+    Aprova várias solicitações. `progresso(sol_id, estado, msg)` é chamado
+    da thread de trabalho a cada passo (estados: criando, criado, aprovado,
+    erro). Retorna {sol_id: (ok, msg)}.
+    """
+    avisar = progresso or (lambda *a: None)
+    with _diario_lock:
+        diario = _ler_diario()
+        for s in solicitacoes:
+            diario.setdefault(s["id"], {"username": s.get("username")})
+        _gravar_diario(diario)
+    ids = list(dict.fromkeys(s["id"] for s in solicitacoes))
+    nomes = {sid: diario[sid].get("username") for sid in ids}
+    resultados: dict = {}
+
+    # 1. Dados completos (senha) só de quem ainda não tem usuário criado
+    faltam = [sid for sid in ids if not diario[sid].get("user_id")]
+    linhas = {}
+    for bloco in _em_blocos(faltam):
+        try:
+            with _cliente() as cli:
+                r = (
+                    cli.table("solicitacoes")
+                    .select("*")
+                    .in_("id", bloco)
+                    .eq("status", "pendente")
+                    .execute()
+                )
+            linhas.update({l["id"]: l for l in r.data or []})
+            nomes.update({l["id"]: l.get("username") for l in r.data or []})
+        except Exception as e:
+            for sid in bloco:
+                resultados[sid] = (False, f"Erro: {e}")
+                avisar(sid, "erro", str(e))
+            continue
+        for sid in bloco:
+            if sid not in linhas:
+                resultados[sid] = (False, _NAO_PENDENTE)
+                avisar(sid, "erro", _NAO_PENDENTE)
+
+    # 2. Criação no Auth — única etapa por item, com concorrência limitada
+    def _criar(sid):
+        sol = linhas[sid]
+        avisar(sid, "criando", "")
+        username = sol["username"].lower().strip()
+        email = f"{username}@rcc.app"
+        with _diario_lock:
+            retomando = diario[sid].get("criando", False)
+            diario[sid] = {"username": username, "criando": True}
+            _gravar_diario(diario)
+        with _cliente() as cli:
+            try:
+                r = cli.auth.admin.create_user(
+                    {
+                        "email": email,
+                        "password": sol["senha_real"],
+                        "email_confirm": True,
+                    }
+                )
+                user_id = r.user.id
+            except Exception as e:
+                # Execução anterior caiu entre criar e anotar: o usuário é nosso
+                if not retomando or not _ja_registrado(str(e)):
+                    raise
+                user_id = _id_por_email(cli, email)
+                if user_id is None:
+                    raise
+        with _diario_lock:
+            diario[sid] = {"username": username, "user_id": user_id}
+            _gravar_diario(diario)
+        avisar(sid, "criado", "")
+
+    pendentes = [sid for sid in faltam if sid not in resultados]
+    for sid, (ok, msg) in _por_item(_criar, pendentes).items():
+        if not ok:
+            if _ja_registrado(msg):
+                msg = "Username já está em uso."
+            resultados[sid] = (False, msg)
+            avisar(sid, "erro", msg)
+
+    # 3 e 4. Perfis e solicitações em blocos
+    criados = [
+        sid for sid in ids if diario[sid].get("user_id") and sid not in resultados
+    ]
+    for bloco in _em_blocos(criados):
+        perfis = [
+            {"id": diario[sid]["user_id"], "username": diario[sid]["username"]}
+            for sid in bloco
+        ]
+        try:
+            with _cliente() as cli:
+                try:
+                    cli.table("perfis").upsert(perfis, returning="minimal").execute()
+                except Exception as e:
+                    # upsert recusado (ex.: coluna obrigatória): um update por perfil
+                    print(f"[Aprovação] upsert de perfis falhou ({e}) — por item")
+                    for p in perfis:
+                        cli.table("perfis").update({"username": p["username"]}).eq(
+                            "id", p["id"]
+                        ).execute()
+                r = (
+                    cli.table("solicitacoes")
+                    .update({"status": "aprovado"})
+                    .in_("id", bloco)
+                    .eq("status", "pendente")
+                    .execute()
+                )
+            aprovadas = {l.get("id") for l in r.data or []}
+        except Exception as e:
+            for sid in bloco:
+                resultados[sid] = (False, f"Erro: {e}")
+                avisar(sid, "erro", str(e))
+            continue
+        with _diario_lock:
+            for sid in bloco:
+                diario.pop(sid, None)
+            _gravar_diario(diario)
+        for sid in bloco:
+            if sid in aprovadas:
+                resultados[sid] = (True, "Aprovado.")
+                avisar(sid, "aprovado", "")
+            else:
+                # Decidida por outro admin depois que o usuário foi criado
+                resultados[sid] = (False, _NAO_PENDENTE)
+                avisar(sid, "erro", _NAO_PENDENTE)
+
+    # Falhas definitivas saem do diário; só fica o que pode ser retomado
+    with _diario_lock:
+        for sid, (ok, _) in resultados.items():
+            if not ok and not diario.get(sid, {}).get("user_id"):
+                diario.pop(sid, None)
+        _gravar_diario(diario)
+
+    _registrar_lote("aprovar_solicitacoes_lote", resultados, nomes)
+    return resultados
+
+
 # ═══════════════════════════════════════════════════════════════
 # RELATÓRIOS
 # ═══════════════════════════════════════════════════════════════
 
 
-def resumo_geral() -> dict:
-    try:
-        agora = datetime.now(timezone.utc)
-        em_7_dias = (agora + timedelta(days=7)).isoformat()
-        agora_iso = agora.isoformat()
-        cli = _cliente()
-        # count="exact" retorna .count sem baixar os dados — muito mais rápido
-        r_total = cli.table("perfis").select("id", count="exact").execute()
-        r_ativos = (
-            cli.table("perfis").select("id", count="exact").eq("ativo", True).execute()
-        )
-        r_ass = (
-            cli.table("assinaturas")
+def _executar_paralelo(consultas: dict) -> dict:
+    """Consultas independentes em paralelo, cada uma com seu cliente do pool."""
+    futuros = {nome: submeter_consulta(fn) for nome, fn in consultas.items()}
+    return {nome: f.result() for nome, f in futuros.items()}
+
+
+def _consultas_resumo() -> dict:
+    """Um callable por contador do resumo — count="exact" não baixa as linhas."""
+    agora = datetime.now(timezone.utc)
+    em_7_dias = (agora + timedelta(days=7)).isoformat()
+    agora_iso = agora.isoformat()
+
+    def _contar(montar):
+        def _executar():
+            with _cliente() as cli:
+                return montar(cli).execute().count or 0
+
+        return _executar
+
+    return {
+        "total_usuarios": _contar(
+            lambda cli: cli.table("perfis").select("id", count="exact")
+        ),
+        "usuarios_ativos": _contar(
+            lambda cli: cli.table("perfis")
+            .select("id", count="exact")
+            .eq("ativo", True)
+        ),
+        "assinaturas_ativas": _contar(
+            lambda cli: cli.table("assinaturas")
             .select("id", count="exact")
             .eq("ativo", True)
             .neq("plano_id", BASICO_ID)
-            .execute()
-        )
-        r_expir = (
-            cli.table("assinaturas")
+        ),
+        "expirando_7_dias": _contar(
+            lambda cli: cli.table("assinaturas")
             .select("id", count="exact")
             .eq("ativo", True)
             .lte("expira_em", em_7_dias)
             .gte("expira_em", agora_iso)
-            .execute()
-        )
-        r_expirada = (
-            cli.table("assinaturas")
+        ),
+        "expiradas": _contar(
+            lambda cli: cli.table("assinaturas")
             .select("id", count="exact")
             .eq("ativo", True)
             .lt("expira_em", agora_iso)
-            .execute()
-        )
+        ),
+    }
+
+
+def resumo_geral() -> dict:
+    try:
+        return _executar_paralelo(_consultas_resumo())
+    except Exception as e:
+        print(f"Erro resumo: {e}")
+        return {}
+
+
+# Função agregadora no Postgres — se não estiver implantada, tenta de novo
+# só depois deste intervalo para não pagar um 404 a cada evento
+_RPC_SNAPSHOT = "painel_snapshot"
+_RPC_SNAPSHOT_RETENTAR = 600
+_rpc_snapshot_ausente_ate = 0.0
+
+
+def _funcao_ausente(e: Exception) -> bool:
+    """PostgREST responde PGRST202 quando a função RPC não existe no schema."""
+    return getattr(e, "code", None) == "PGRST202" or "PGRST202" in str(e)
+
+
+def snapshot_dashboard(dias: int = 7) -> dict:
+    """
+    Contadores, solicitações pendentes e assinaturas expirando em uma única
+    ida ao servidor, via rpc("painel_snapshot", {p_basico_id, p_dias}).
+    A função deve retornar um JSON {"resumo": {...mesmas chaves de
+    resumo_geral()}, "solicitacoes": [...], "expirando": [...]}; das
+    solicitações só ficam as _COLUNAS_SOLICITACAO, seja qual for a função.
+    Sem a função no banco, cai nas consultas atuais executadas em paralelo.
+    """
+    global _rpc_snapshot_ausente_ate
+    if time.monotonic() >= _rpc_snapshot_ausente_ate:
+        try:
+            with _cliente() as cli:
+                r = cli.rpc(
+                    _RPC_SNAPSHOT, {"p_basico_id": BASICO_ID, "p_dias": dias}
+                ).execute()
+            dados = r.data or {}
+            return {
+                "resumo": dados.get("resumo") or {},
+                "solicitacoes": [
+                    _solicitacao_publica(s) for s in dados.get("solicitacoes") or []
+                ],
+                "expirando": dados.get("expirando") or [],
+            }
+        except Exception as e:
+            if _funcao_ausente(e):
+                _rpc_snapshot_ausente_ate = time.monotonic() + _RPC_SNAPSHOT_RETENTAR
+                print(
+                    f"[Dashboard] {_RPC_SNAPSHOT} ausente — usando consultas paralelas"
+                )
+            else:
+                print(f"Erro snapshot: {e}")
+
+    try:
+        consultas = _consultas_resumo()
+        consultas["_solicitacoes"] = listar_solicitacoes
+        consultas["_expirando"] = lambda: listar_expirando(dias)
+        r = _executar_paralelo(consultas)
         return {
-            "total_usuarios": r_total.count or 0,
-            "usuarios_ativos": r_ativos.count or 0,
-            "assinaturas_ativas": r_ass.count or 0,
-            "expirando_7_dias": r_expir.count or 0,
-            "expiradas": r_expirada.count or 0,
+            "solicitacoes": r.pop("_solicitacoes"),
+            "expirando": r.pop("_expirando"),
+            "resumo": r,
         }
     except Exception as e:
-        print(f"Erro resumo: {e}")
+        print(f"Erro snapshot: {e}")
         return {}
 
 
 def listar_expirando(dias: int = 7) -> list:
     try:
-        agora = datetime.now(timezone.utc)
-        em_x_dias = (agora + timedelta(days=dias)).isoformat()
-        agora_iso = agora.isoformat()
-        return (
-            _cliente()
-            .table("v_assinaturas")
-            .select("*")
-            .eq("ativo", True)
-            .neq("plano_id", BASICO_ID)
-            .lte("expira_em", em_x_dias)
-            .gte("expira_em", agora_iso)
-            .order("expira_em")
-            .execute()
-            .data
-        )
+        with _cliente() as cli:
+            agora = datetime.now(timezone.utc)
+            em_x_dias = (agora + timedelta(days=dias)).isoformat()
+            agora_iso = agora.isoformat()
+            return (
+                cli.table("v_assinaturas")
+                .select("*")
+                .eq("ativo", True)
+                .neq("plano_id", BASICO_ID)
+                .lte("expira_em", em_x_dias)
+                .gte("expira_em", agora_iso)
+                .order("expira_em")
+                .execute()
+                .data
+            )
     except Exception as e:
         print(f"Erro expirando: {e}")
         return []
 
 
+# ═══════════════════════════════════════════════════════════════
+# OPERAÇÕES EM LOTE — in_() em blocos, RPCs com array e pool limitado
+# ═══════════════════════════════════════════════════════════════
+
+_BLOCO_LOTE = 200  # ids por requisição (mantém a URL do in_() curta)
+_executor_lotes = ThreadPoolExecutor(max_workers=6, thread_name_prefix="Lote")
+_rpcs_lote_ausentes: dict[str, float] = {}  # nome → monotonic até tentar de novo
+
+
+def _em_blocos(itens: list, tamanho: int = _BLOCO_LOTE):
+    for i in range(0, len(itens), tamanho):
+        yield itens[i : i + tamanho]
+
+
+def _rpc_lote(nome: str, params: dict) -> bool:
+    """
+    Chama a RPC que recebe um array de ids. False se ela não existe no
+    banco (o chamador cai para uma chamada por item); outros erros sobem.
+    """
+    if time.monotonic() < _rpcs_lote_ausentes.get(nome, 0.0):
+        return False
+    try:
+        with _cliente() as cli:
+            cli.rpc(nome, params).execute()
+        return True
+    except Exception as e:
+        if not _funcao_ausente(e):
+            raise
+        _rpcs_lote_ausentes[nome] = time.monotonic() + _RPC_SNAPSHOT_RETENTAR
+        print(f"[Lote] {nome} ausente — uma chamada por item")
+        return False
+
+
+def _por_item(fn, ids: list) -> dict:
+    """Roda fn(id) no pool de lotes; {id: (ok, msg)} sem interromper nos erros."""
+
+    def _um(uid):
+        try:
+            fn(uid)
+            return True, "ok"
+        except Exception as e:
+            return False, f"Erro: {e}"
+
+    futuros = {uid: _executor_lotes.submit(_um, uid) for uid in ids}
+    return {uid: f.result() for uid, f in futuros.items()}
+
+
+def _registrar_lote(acao: str, resultados: dict, nomes: dict, **extra):
+    """Uma única entrada de log para o lote inteiro."""
+    ok = [nomes.get(uid) or uid for uid, (sucesso, _) in resultados.items() if sucesso]
+    falhas = len(resultados) - len(ok)
+    if not ok and not falhas:
+        return
+    _logs.registrar(
+        acao,
+        detalhes={
+            "quantidade": len(ok),
+            "falhas": falhas,
+            "usuarios": ", ".join(ok[:20]) + ("…" if len(ok) > 20 else ""),
+            **extra,
+        },
+    )
+
+
+def _nomes(itens: list) -> dict:
+    nomes = {}
+    for it in itens:
+        uid = it.get("user_id") or it.get("id")
+        nomes[uid] = it.get("username") or _identidade(uid).get("username") or uid
+    return nomes
+
+
+def definir_usuarios_ativos(itens: list, ativo: bool) -> dict:
+    """
+    Ativa/desativa vários usuários. `itens` são linhas com `id` (e de
+    preferência `username`). O ban no Auth é por usuário (no pool); o
+    perfis.ativo vai num update com in_() por bloco.
+    Retorna {user_id: (ok, msg)}.
+    """
+    nomes = _nomes(itens)
+    ids = list(nomes)
+    ban = "none" if ativo else "876000h"
+
+    def _banir(uid):
+        with _cliente() as cli:
+            cli.auth.admin.update_user_by_id(uid, {"ban_duration": ban})
+
+    resultados = _por_item(_banir, ids)
+    ok_ids = [uid for uid, (sucesso, _) in resultados.items() if sucesso]
+    for bloco in _em_blocos(ok_ids):
+        try:
+            with _cliente() as cli:
+                cli.table("perfis").update({"ativo": ativo}).in_("id", bloco).execute()
+        except Exception as e:
+            for uid in bloco:
+                resultados[uid] = (False, f"Erro: {e}")
+    _registrar_lote(
+        "ativar_usuarios_lote" if ativo else "desativar_usuarios_lote",
+        resultados,
+        nomes,
+    )
+    return resultados
+
+
+def renovar_assinaturas(itens: list, dias: int) -> dict:
+    """
+    Renova várias assinaturas por `dias`. Usa a RPC
+    renovar_assinaturas_admin(p_user_ids, p_dias) por bloco; sem ela,
+    renovar_assinatura_admin por item no pool. Retorna {user_id: (ok, msg)}.
+    """
+    nomes = _nomes(itens)
+    ids = list(nomes)
+    resultados = {}
+
+    def _um(uid):
+        with _cliente() as cli:
+            cli.rpc(
+                "renovar_assinatura_admin", {"p_user_id": uid, "p_dias": dias}
+            ).execute()
+
+    for bloco in _em_blocos(ids):
+        try:
+            if _rpc_lote(
+                "renovar_assinaturas_admin", {"p_user_ids": bloco, "p_dias": dias}
+            ):
+                resultados.update({uid: (True, "ok") for uid in bloco})
+                continue
+        except Exception as e:
+            resultados.update({uid: (False, f"Erro: {e}") for uid in bloco})
+            continue
+        resultados.update(_por_item(_um, bloco))
+
+    for it in itens:
+        uid = it.get("user_id") or it.get("id")
+        if resultados.get(uid, (False,))[0]:
+            antiga = it.get("expira_em") or _identidade(uid).get("expira_em") or ""
+            lembrar_identidade(
+                uid, expira_em=_nova_expiracao(None, antiga, dias) or None
+            )
+    _registrar_lote("renovar_assinaturas_lote", resultados, nomes, dias=dias)
+    return resultados
+
+
+def revogar_assinaturas(itens: list) -> dict:
+    """Volta vários usuários para o plano Básico. Retorna {user_id: (ok, msg)}."""
+    nomes = _nomes(itens)
+    ids = list(nomes)
+    resultados = {}
+
+    def _um(uid):
+        with _cliente() as cli:
+            cli.rpc("revogar_para_basico", {"p_user_id": uid}).execute()
+
+    for bloco in _em_blocos(ids):
+        try:
+            if _rpc_lote("revogar_para_basico_lote", {"p_user_ids": bloco}):
+                resultados.update({uid: (True, "ok") for uid in bloco})
+                continue
+        except Exception as e:
+            resultados.update({uid: (False, f"Erro: {e}") for uid in bloco})
+            continue
+        resultados.update(_por_item(_um, bloco))
+
+    for uid, (sucesso, _) in resultados.items():
+        if sucesso:
+            lembrar_identidade(uid, plano_nome="Básico", expira_em="")
+    _registrar_lote("revogar_assinaturas_lote", resultados, nomes)
+    return resultados
+
+
+def resumo_lote(resultados: dict) -> tuple[bool, str]:
+    """(tudo_ok, mensagem) para exibir ao fim de uma operação em lote."""
+    falhas = [msg for ok, msg in resultados.values() if not ok]
+    total = len(resultados)
+    if not falhas:
+        return True, f"{total} de {total} concluídos."
+    return False, f"{total - len(falhas)} de {total} concluídos. Falhas: {falhas[0]}"
+
+
 # ═══════════════════════════════════════════════════════════════
 # LOGS
 # ═══════════════════════════════════════════════════════════════
@@ -628,3 +1479,15 @@ def listar_expirando(dias: int = 7) -> list:
 
 def listar_logs(limite: int = 200) -> list:
     return _logs.listar(limite)
+
+
+def consultar_logs(
+    texto: str = "", antes_de: int = None, limite: int = 200, **filtros
+) -> list:
+    """Busca paginada nos logs locais — ver GerenciadorLogs.consultar."""
+    return _logs.consultar(texto, antes_de=antes_de, limite=limite, **filtros)
+
+
+def filtros_logs() -> dict:
+    """Valores distintos para os filtros da tela: {"acoes", "usuarios"}."""
+    return {"acoes": _logs.acoes(), "usuarios": _logs.usuarios()}
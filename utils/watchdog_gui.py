@@ -0,0 +1,83 @@
+"""
+Watchdog do event loop — acusa travadas da thread principal (modo debug).
+
+Ligado por `RCC_WATCHDOG_MS=<limite>` ou pela flag `--watchdog` (limite
+padrão `_LIMITE_PADRAO`). Um QTimer na GUI marca o último tick; uma thread
+de fundo confere e, se a GUI passar do limite sem tick, imprime a pilha
+da thread principal naquele momento — é ali que está a chamada bloqueante.
+"""
+
+import os
+import sys
+import threading
+import time
+import traceback
+
+_LIMITE_PADRAO = 250  # ms
+_TICK = 50  # ms
+
+_instancia = None
+
+
+def _limite_configurado() -> int | None:
+    valor = os.getenv("RCC_WATCHDOG_MS", "")
+    if valor.isdigit() and int(valor) > 0:
+        return int(valor)
+    return _LIMITE_PADRAO if "--watchdog" in sys.argv else None
+
+
+class WatchdogGUI:
+    def __init__(self, limite_ms: int):
+        from PyQt6.QtCore import QTimer
+
+        self._limite = limite_ms / 1000
+        self._ultimo_tick = time.monotonic()
+        self._id_principal = threading.main_thread().ident
+        self._travada_desde: float | None = None
+        self.travadas = 0
+        self._timer = QTimer()
+        self._timer.setInterval(_TICK)
+        self._timer.timeout.connect(self._tick)
+
+    def iniciar(self):
+        self._ultimo_tick = time.monotonic()
+        self._timer.start()
+        threading.Thread(target=self._vigiar, daemon=True, name="WatchdogGUI").start()
+        print(f"[Watchdog] Ativo — limite {self._limite * 1000:.0f}ms")
+
+    def _tick(self):
+        agora = time.monotonic()
+        if self._travada_desde is not None:
+            duracao = (agora - self._travada_desde) * 1000
+            print(f"[Watchdog] GUI voltou após ~{duracao:.0f}ms travada")
+            self._travada_desde = None
+        self._ultimo_tick = agora
+
+    def _vigiar(self):
+        while True:
+            time.sleep(_TICK / 1000)
+            ultimo = self._ultimo_tick
+            atraso = time.monotonic() - ultimo - _TICK / 1000
+            if atraso < self._limite or self._travada_desde is not None:
+                continue
+            # Uma pilha por travada: só volta a acusar depois do próximo tick
+            self._travada_desde = ultimo
+            self.travadas += 1
+            frame = sys._current_frames().get(self._id_principal)
+            pilha = "".join(traceback.format_stack(frame)) if frame else "?\n"
+            print(
+                f"[Watchdog] GUI travada há {atraso * 1000:.0f}ms — "
+                f"pilha da thread principal:\n{pilha}",
+                end="",
+            )
+
+
+def iniciar_watchdog() -> WatchdogGUI | None:
+    """Liga o watchdog se configurado; chamar depois de criar o QApplication."""
+    global _instancia
+    limite = _limite_configurado()
+    if limite is None or _instancia is not None:
+        return _instancia
+    _instancia = WatchdogGUI(limite)
+    _instancia.iniciar()
+    return _instancia